@@ -1,9 +1,27 @@
+import contextlib
 import os
+import sys
 import shutil
 import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
 
-def organize_images_by_prefix(cutai_image_path, result_root_dir, subfolder_name):
+# 引入仓库根目录下的公共模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.fileops import DEFAULT_WORKERS, FileOpExecutor, MoveJournal, format_progress, undo_journal
+
+IMAGE_SUFFIXES = ('.png', '.jpg', '.jpeg', '.gif', '.bmp')
+PREFIX_PATTERN = re.compile(r'^([^_]+)_')
+JOURNAL_NAME_FORMAT = "_移动日志_%Y%m%d_%H%M%S.jsonl"
+
+def open_move_journal(result_dir):
+    """在结果目录下新建移动日志，用于撤销本次移动"""
+    journal_path = os.path.join(result_dir, datetime.now().strftime(JOURNAL_NAME_FORMAT))
+    print(f"移动日志: {journal_path}")
+    return MoveJournal(journal_path)
+
+def organize_images_by_prefix(cutai_image_path, result_root_dir, subfolder_name, journal=None):
     """
     按照图片文件名前缀分类整理文件，并将结果放到指定的结果根目录下
     
@@ -11,7 +29,9 @@ def organize_images_by_prefix(cutai_image_path, result_root_dir, subfolder_name)
         cutai_image_path (str): CutAIImage文件夹的路径
         result_root_dir (str): 结果根目录路径
         subfolder_name (str): 子文件夹名称（用于区分不同来源）
+        journal (MoveJournal): 传入时改为移动文件（同盘重命名），并记录到移动日志；为空时复制
     """
+    action = "移动" if journal else "复制"
     
     # 检查路径是否存在
     if not os.path.exists(cutai_image_path):
@@ -86,10 +106,13 @@ def organize_images_by_prefix(cutai_image_path, result_root_dir, subfolder_name)
             dst_path = os.path.join(target_dir, image_file)
             
             try:
-                shutil.copy2(src_path, dst_path)  # 使用copy2保留文件元数据
-                print(f"    复制图片: {image_file}")
+                if journal:
+                    journal.move(src_path, dst_path)
+                else:
+                    shutil.copy2(src_path, dst_path)  # 使用copy2保留文件元数据
+                print(f"    {action}图片: {image_file}")
             except Exception as e:
-                print(f"    复制图片失败 {image_file}: {e}")
+                print(f"    {action}图片失败 {image_file}: {e}")
         
         # 复制JSON文件到结果目录
         for json_file in files_dict['jsons']:
@@ -97,21 +120,158 @@ def organize_images_by_prefix(cutai_image_path, result_root_dir, subfolder_name)
             dst_path = os.path.join(target_dir, json_file)
             
             try:
-                shutil.copy2(src_path, dst_path)  # 使用copy2保留文件元数据
-                print(f"    复制JSON: {json_file}")
+                if journal:
+                    journal.move(src_path, dst_path)
+                else:
+                    shutil.copy2(src_path, dst_path)  # 使用copy2保留文件元数据
+                print(f"    {action}JSON: {json_file}")
             except Exception as e:
-                print(f"    复制JSON失败 {json_file}: {e}")
+                print(f"    {action}JSON失败 {json_file}: {e}")
     
     print(f"  分类完成！共处理了 {len(prefix_files)} 个前缀类别")
     return len(prefix_files)
 
-def process_all_subfolders(root_path):
+def scan_prefix_files(cutai_image_path):
+    """
+    单次 scandir 收集文件名，用集合查找配对 JSON，不再逐个 os.path.exists
+    配对规则与 organize_images_by_prefix 相同
+
+    Returns:
+        dict: {prefix: {'images': [...], 'jsons': [...]}}
+    """
+    with os.scandir(cutai_image_path) as it:
+        names = [entry.name for entry in it if not entry.is_dir()]
+    name_set = set(names)
+
+    prefix_files = {}
+    for file in names:
+        lower = file.lower()
+        if lower.endswith(IMAGE_SUFFIXES):
+            json_file = file.rsplit('.', 1)[0] + '.json'
+            image_file = file
+        elif lower.endswith('.json'):
+            image_file = file.rsplit('.', 1)[0] + '.png'
+            if image_file not in name_set:
+                continue
+            json_file = file
+        else:
+            continue
+        match = PREFIX_PATTERN.match(file)
+        if not match:
+            continue
+        # dict 保序去重
+        entry = prefix_files.setdefault(match.group(1), {'images': {}, 'jsons': {}})
+        entry['images'][image_file] = None
+        if json_file in name_set:
+            entry['jsons'][json_file] = None
+
+    return {prefix: {'images': list(d['images']), 'jsons': list(d['jsons'])}
+            for prefix, d in prefix_files.items()}
+
+def plan_copy_pairs(cutai_image_path, result_root_dir):
+    """
+    扫描单个 CutAIImage 文件夹，返回 (前缀类别数, [(源路径, 目标路径), ...])
+    """
+    prefix_files = scan_prefix_files(cutai_image_path)
+    pairs = []
+    for prefix, files_dict in prefix_files.items():
+        target_dir = os.path.join(result_root_dir, prefix)
+        for name in files_dict['images'] + files_dict['jsons']:
+            pairs.append((os.path.join(cutai_image_path, name), os.path.join(target_dir, name)))
+    return len(prefix_files), pairs
+
+def find_cutai_folders(root_path, result_dir_name="结果"):
+    """
+    递归查找所有 CutAIImage 文件夹（不再进入 CutAIImage 内部遍历）
+
+    Returns:
+        tuple: (CutAIImage 路径列表, 扫描目录数)
+    """
+    cutai_paths = []
+    total_dirs_scanned = 0
+    for dirpath, dirnames, filenames in os.walk(root_path):
+        # os.walk 已列出子目录，直接判断即可，无需再逐目录 isdir
+        if "CutAIImage" in dirnames:
+            cutai_paths.append(os.path.join(dirpath, "CutAIImage"))
+        dirnames[:] = [d for d in dirnames if d not in (result_dir_name, "CutAIImage")]
+        total_dirs_scanned += 1
+    return cutai_paths, total_dirs_scanned
+
+def process_all_subfolders_parallel(root_path, max_workers=DEFAULT_WORKERS, move=False):
+    """
+    并行批量模式：各 CutAIImage 文件夹相互独立，并发扫描后将全部文件交给并发后端批量复制
+    只输出每个文件夹的汇总与整体进度，不逐文件打印
+
+    Args:
+        root_path (str): 根目录路径
+        max_workers (int): 并发线程数
+        move (bool): 移动而非复制，并写移动日志
+    """
+    action = "移动" if move else "复制"
+    if not os.path.exists(root_path):
+        print(f"错误：根目录 {root_path} 不存在")
+        return
+
+    print(f"开始扫描根目录(递归，并行模式): {root_path}")
+    print("=" * 60)
+
+    result_dir = os.path.join(root_path, "结果")
+    os.makedirs(result_dir, exist_ok=True)
+    print(f"创建结果文件夹: {result_dir}")
+
+    cutai_paths, total_dirs_scanned = find_cutai_folders(root_path)
+    print(f"找到 {len(cutai_paths)} 个CutAIImage文件夹，并发扫描中...")
+
+    total_processed = 0
+    all_pairs = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for cutai_path, (prefix_count, pairs) in zip(
+                cutai_paths, pool.map(lambda p: plan_copy_pairs(p, result_dir), cutai_paths)):
+            print(f"  {cutai_path}: {prefix_count} 个前缀类别, {len(pairs)} 个文件")
+            total_processed += prefix_count
+            all_pairs.extend(pairs)
+
+    # 不同文件夹的同名文件指向同一目标时只保留最后一个（与串行覆盖结果一致），避免并发写同一文件
+    unique_pairs = list({dst: (src, dst) for src, dst in all_pairs}.values())
+    if move and len(unique_pairs) < len(all_pairs):
+        # 移动时不覆盖：同名的其余文件留在原位置
+        print(f"  注意：{len(all_pairs) - len(unique_pairs)} 个文件与其他文件夹中的文件同名，保留在原位置不移动")
+    all_pairs = unique_pairs
+
+    # 预先创建分类文件夹，避免各线程重复创建
+    for target_dir in {os.path.dirname(dst) for _, dst in all_pairs}:
+        os.makedirs(target_dir, exist_ok=True)
+
+    print(f"开始{action} {len(all_pairs)} 个文件...")
+    executor = FileOpExecutor(
+        max_workers=max_workers,
+        on_progress=lambda stats: print(f"\r  {format_progress(stats)}", end="", flush=True),
+    )
+    if move:
+        with open_move_journal(result_dir) as journal:
+            stats = executor.run(lambda pair: journal.move(*pair), all_pairs)
+    else:
+        stats = executor.copy_pairs(all_pairs)
+    print()
+    for (src, _), e in stats['errors']:
+        print(f"    {action}失败 {src}: {e}")
+
+    print("\n" + "=" * 60)
+    print(f"扫描完成！耗时 {stats['elapsed']:.1f} 秒")
+    print(f"累计扫描目录数: {total_dirs_scanned}")
+    print(f"找到 {len(cutai_paths)} 个CutAIImage文件夹")
+    print(f"总共处理了 {total_processed} 个前缀类别")
+    print(f"{action}成功 {stats['done'] - stats['failed']} 个文件，失败 {stats['failed']} 个")
+    print(f"所有分类结果已保存到: {result_dir}")
+
+def process_all_subfolders(root_path, move=False):
     """
     遍历根目录下的所有嵌套子文件夹，找到任意层级的 CutAIImage 文件夹并进行分类整理
     将所有结果统一放到根目录下的"结果"文件夹中
     
     Args:
         root_path (str): 根目录路径
+        move (bool): 移动而非复制，并写移动日志
     """
     
     if not os.path.exists(root_path):
@@ -129,22 +289,23 @@ def process_all_subfolders(root_path):
     total_processed = 0
     total_cutai_folders = 0
     total_dirs_scanned = 0
-    
-    # 递归遍历所有层级
-    for dirpath, dirnames, filenames in os.walk(root_path):
-        # 跳过结果文件夹以避免自包含
-        dirnames[:] = [d for d in dirnames if d != "结果"]
-        total_dirs_scanned += 1
+    # 移动模式下出错时也会关闭移动日志，已完成的移动仍可撤销
+    with open_move_journal(result_dir) if move else contextlib.nullcontext() as journal:
+        # 递归遍历所有层级
+        for dirpath, dirnames, filenames in os.walk(root_path):
+            # 跳过结果文件夹以避免自包含
+            dirnames[:] = [d for d in dirnames if d != "结果"]
+            total_dirs_scanned += 1
         
-        # 检查当前目录是否包含 CutAIImage
-        if "CutAIImage" in dirnames:
-            cutai_path = os.path.join(dirpath, "CutAIImage")
-            print(f"  找到CutAIImage文件夹: {cutai_path}")
-            total_cutai_folders += 1
-            # 使用所在上级目录名作为 subfolder_name
-            subfolder_name = os.path.basename(dirpath) or "root"
-            processed_count = organize_images_by_prefix(cutai_path, result_dir, subfolder_name)
-            total_processed += processed_count
+            # 检查当前目录是否包含 CutAIImage
+            if "CutAIImage" in dirnames:
+                cutai_path = os.path.join(dirpath, "CutAIImage")
+                print(f"  找到CutAIImage文件夹: {cutai_path}")
+                total_cutai_folders += 1
+                # 使用所在上级目录名作为 subfolder_name
+                subfolder_name = os.path.basename(dirpath) or "root"
+                processed_count = organize_images_by_prefix(cutai_path, result_dir, subfolder_name, journal)
+                total_processed += processed_count
     
     print("\n" + "=" * 60)
     print(f"扫描完成！")
@@ -162,9 +323,11 @@ def main():
     print("请选择处理模式：")
     print("1. 处理单个CutAIImage文件夹")
     print("2. 批量处理根目录下的所有子文件夹中的CutAIImage")
+    print("3. 并行批量处理（多个CutAIImage文件夹并发整理，适合大批量）")
+    print("4. 撤销移动（按移动日志把文件移回原位置）")
     
     while True:
-        choice = input("请输入选择 (1 或 2): ").strip()
+        choice = input("请输入选择 (1、2、3 或 4): ").strip()
         
         if choice == "1":
             # 模式1：处理单个CutAIImage文件夹
@@ -174,8 +337,40 @@ def main():
             # 模式2：批量处理所有子文件夹
             process_batch_folders()
             break
+        elif choice == "3":
+            # 模式3：并行批量处理
+            process_batch_folders(parallel=True)
+            break
+        elif choice == "4":
+            # 模式4：撤销移动
+            undo_move()
+            break
         else:
-            print("无效选择，请输入 1 或 2")
+            print("无效选择，请输入 1、2、3 或 4")
+
+def ask_move_mode():
+    """询问复制还是移动"""
+    print("操作方式：直接回车 = 复制（原文件保留）；输入 m = 移动（同盘为重命名，跨盘复制校验后删除，可撤销）")
+    return input("请选择操作方式: ").strip().lower() == "m"
+
+def undo_move():
+    """按移动日志撤销移动"""
+    print("\n=== 模式4：撤销移动 ===")
+    journal_path = input("请输入移动日志文件路径 (_移动日志_*.jsonl): ").strip().strip('"')
+    if not os.path.isfile(journal_path):
+        print(f"文件不存在: {journal_path}")
+        return
+    confirm = input("确认把日志中的文件全部移回原位置吗？(y/N): ").strip().lower()
+    if confirm not in ['y', 'yes', '是']:
+        print("操作已取消")
+        return
+    stats = undo_journal(journal_path)
+    for (current, original), e in stats['errors']:
+        if isinstance(e, FileExistsError):
+            print(f"  原位置已有文件，未覆盖: {original}（文件仍在 {current}）")
+        else:
+            print(f"  还原失败 {current}: {e}")
+    print(f"撤销完成！还原 {stats['done'] - stats['failed']} 个文件，失败 {stats['failed']} 个")
 
 def process_single_folder():
     """处理单个CutAIImage文件夹"""
@@ -217,18 +412,23 @@ def process_single_folder():
     print(f"结果将保存到: {result_dir}")
     
     # 确认操作
+    move = ask_move_mode()
     print(f"\n即将整理文件夹: {cutai_path}")
-    print("此操作将按照图片文件名前缀创建分类文件夹并复制文件到结果目录")
+    print(f"此操作将按照图片文件名前缀创建分类文件夹并{'移动' if move else '复制'}文件到结果目录")
     
     confirm = input("确认继续吗？(y/N): ").strip().lower()
     if confirm in ['y', 'yes', '是']:
-        organize_images_by_prefix(cutai_path, result_dir, "单个文件夹")
+        with open_move_journal(result_dir) if move else contextlib.nullcontext() as journal:
+            organize_images_by_prefix(cutai_path, result_dir, "单个文件夹", journal)
     else:
         print("操作已取消")
 
-def process_batch_folders():
+def process_batch_folders(parallel=False):
     """批量处理根目录下的所有子文件夹"""
-    print("\n=== 模式2：批量处理所有子文件夹 ===")
+    if parallel:
+        print("\n=== 模式3：并行批量处理所有子文件夹 ===")
+    else:
+        print("\n=== 模式2：批量处理所有子文件夹 ===")
     
     # 获取用户输入的根目录路径
     while True:
@@ -248,12 +448,16 @@ def process_batch_folders():
             continue
     
     # 确认操作
+    move = ask_move_mode()
     print(f"\n即将扫描根目录: {root_path}")
     print("此操作将递归遍历所有子文件夹，找到任意层级的 CutAIImage 并进行分类整理")
     
     confirm = input("确认继续吗？(y/N): ").strip().lower()
     if confirm in ['y', 'yes', '是']:
-        process_all_subfolders(root_path)
+        if parallel:
+            process_all_subfolders_parallel(root_path, move=move)
+        else:
+            process_all_subfolders(root_path, move=move)
     else:
         print("操作已取消")
 
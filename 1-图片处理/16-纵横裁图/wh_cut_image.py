@@ -8,9 +8,19 @@
 
 import os
 import re
+import sys
+from pathlib import Path
+
 import cv2
 import numpy as np
 
+# 引入仓库根目录下的公共模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common import profiling
+from common.imagecache import DecodedImageCache
+from common.imageio import read_image_size
+from common.progress import ProgressReporter
+
 ####################################
 # 配置区域
 ####################################
@@ -21,8 +31,9 @@ INPUT_PATHS = [
     # r"16-纵横裁图/路径2"
 ]
 
-# 处理方式: "width" -> 按宽裁切拼接, "height" -> 按高裁切拼接
-PROCESS_MODE = "width"   # 可选: "width" / "height"
+# 处理方式: "width" -> 按宽裁切拼接, "height" -> 按高裁切拼接,
+#          "auto" -> 按每个文件夹第一张图片的宽高决定（宽 >= 高 按宽，否则按高；只读文件头）
+PROCESS_MODE = "width"   # 可选: "width" / "height" / "auto"
 # PROCESS_MODE = "height"   # 可选: "width" / "height"
 
 # 文件夹命名匹配规则：大写字母+数字
@@ -31,6 +42,20 @@ FOLDER_PATTERN = r"^[A-Z]\d+$"
 # 支持的图片格式py
 IMG_EXTS = [".jpg", ".jpeg", ".png", ".bmp", ".tiff"]
 
+# 解码缓存目录（建议本地 SSD）：反复处理同一批网络盘图片时跳过读取与解码；为空则不使用
+DECODE_CACHE_DIR = ""
+# 解码缓存大小上限（GB），超出时淘汰最久未使用的图片
+DECODE_CACHE_MAX_GB = 20
+
+# 分阶段计时：结束时打印遍历 / 解码 / 裁切 / 编码写入各阶段的耗时；PROFILE_TRACE 非空时同时输出 Chrome trace JSON
+PROFILE = False
+PROFILE_TRACE = ""
+
+# 逐张打印 "[OK] 输入 -> 输出"；默认只显示单行汇总进度（数量、速率、预计剩余时间）
+VERBOSE = False
+# 逐张处理结果写入 JSON Lines 日志（追加）；为空则不写
+LOG_JSONL = ""
+
 ####################################
 # 工具函数
 ####################################
@@ -48,20 +73,36 @@ def imread_unicode(path):
 def imwrite_unicode(path, img):
     """解决 OpenCV 不支持中文路径写入的问题"""
     ext = os.path.splitext(path)[1]
-    _, buf = cv2.imencode(ext, img)
-    buf.tofile(path)
+    with profiling.stage("编码"):
+        _, buf = cv2.imencode(ext, img)
+    with profiling.stage("写入"):
+        buf.tofile(path)
+    profiling.add_bytes("写入", buf.nbytes)
 
 ####################################
 # 处理逻辑
 ####################################
 
-def process_image(img_path, mode):
+def process_image(img_path, mode, cache=None, reporter=None):
     """按指定模式处理单张图片"""
-    img = imread_unicode(img_path)
+    with profiling.stage("读取解码"):
+        img = cache.get(img_path) if cache is not None else imread_unicode(img_path)
     if img is None:
-        print(f"[WARN] 无法读取图片: {img_path}")
+        message = f"[WARN] 无法读取图片: {img_path}"
+        if reporter is not None:
+            reporter.warn(message, event="unreadable", path=img_path)
+        else:
+            print(message)
         return None
+    profiling.count("图片")
+
+    with profiling.stage("裁切拼接"):
+        result = cut_and_join(img, img_path, mode)
+    return result
 
+
+def cut_and_join(img, img_path, mode):
+    """按模式把图片切成两半并重新拼接"""
     h, w = img.shape[:2]
 
     if mode == "width":
@@ -71,7 +112,6 @@ def process_image(img_path, mode):
         # 拼接：上方是左半部分，下方是右半部分
         result = cv2.vconcat([left, right])
     elif mode == "height":
-        print(img_path)
         mid = h // 2
         top = img[:mid, :]
         bottom = img[mid:, :]
@@ -83,42 +123,75 @@ def process_image(img_path, mode):
     return result
 
 
-def process_folder(folder, mode):
-    """处理单个符合条件的文件夹"""
+def detect_mode(folder):
+    """按文件夹中第一张图片的宽高决定处理方式（只读文件头，不解码）"""
+    for root, _, files in os.walk(folder):
+        for file in sorted(files):
+            if os.path.splitext(file)[1].lower() in IMG_EXTS:
+                size = read_image_size(os.path.join(root, file))
+                if size:
+                    return "width" if size[0] >= size[1] else "height"
+    return "width"
+
+
+def process_folder(folder, mode, cache=None, reporter=None):
+    """处理单个符合条件的文件夹；reporter 为空时使用本文件夹独立的进度显示"""
+    own_reporter = reporter is None
+    if own_reporter:
+        reporter = ProgressReporter("裁图", verbose=VERBOSE, log_path=LOG_JSONL)
+    if mode == "auto":
+        mode = detect_mode(folder)
+        reporter.info(f"[自动] {folder} -> {mode}")
     suffix = "_whalf_cut" if mode == "width" else "_hhalf_cut"
     output_root = folder + suffix
 
-    for root, _, files in os.walk(folder):
+    # 先列出整个文件夹（只是列目录），得到总数后进度才能给出预计剩余时间
+    walked = [(root, [f for f in files if os.path.splitext(f)[1].lower() in IMG_EXTS])
+              for root, _, files in profiling.timed_iter("遍历目录", os.walk(folder))]
+    reporter.add_total(sum(len(files) for _, files in walked))
+
+    for root, files in walked:
         rel_path = os.path.relpath(root, folder)
         out_dir = os.path.join(output_root, rel_path)
         os.makedirs(out_dir, exist_ok=True)
 
         processed = 0
         for file in files:
-            if os.path.splitext(file)[1].lower() in IMG_EXTS:
-                in_path = os.path.join(root, file)
-                in_path = os.path.normpath(in_path)
-                out_path = os.path.join(out_dir, file)
-                out_path = os.path.normpath(out_path)
+            in_path = os.path.join(root, file)
+            in_path = os.path.normpath(in_path)
+            out_path = os.path.join(out_dir, file)
+            out_path = os.path.normpath(out_path)
+
+            result = process_image(in_path, mode, cache, reporter)
+            if result is not None:
+                imwrite_unicode(out_path, result)
+                processed += 1
+                reporter.detail(f"[OK] {in_path} -> {out_path}", event="ok", src=in_path, dst=out_path)
+            reporter.update(failed=result is None)
 
-                result = process_image(in_path, mode)
-                if result is not None:
-                    imwrite_unicode(out_path, result)
-                    processed += 1
-                    print(f"[OK] {in_path} -> {out_path}")
+        reporter.detail(f"[完成] {root} -> 处理 {processed} 张图片")
 
-        print(f"[完成] {root} -> 处理 {processed} 张图片")
+    if own_reporter:
+        reporter.close()
 
 
 def main():
+    if PROFILE:
+        profiling.enable(trace_path=PROFILE_TRACE)
+    cache = DecodedImageCache(DECODE_CACHE_DIR, int(DECODE_CACHE_MAX_GB * 1024 ** 3)) if DECODE_CACHE_DIR else None
+    reporter = ProgressReporter("裁图", verbose=VERBOSE, log_path=LOG_JSONL)
     for base_path in INPUT_PATHS:
-        for root, dirs, _ in os.walk(base_path):
+        for root, dirs, _ in profiling.timed_iter("查找目录", os.walk(base_path)):
             for d in dirs:
                 if re.match(FOLDER_PATTERN, d):
                     folder_path = os.path.join(root, d)
                     folder_path = os.path.normpath(folder_path)
-                    print(f"[处理目录] {folder_path}")
-                    process_folder(folder_path, PROCESS_MODE)
+                    reporter.info(f"[处理目录] {folder_path}")
+                    process_folder(folder_path, PROCESS_MODE, cache, reporter)
+    reporter.close()
+    if cache is not None:
+        cache.save()
+        print(f"[缓存] 命中 {cache.hits} 张，解码 {cache.misses} 张，缓存大小 {cache.total_bytes / 1024 ** 3:.2f} GB")
 
 
 if __name__ == "__main__":
@@ -11,8 +11,15 @@
 """
 
 import os
+import sys
 import json
 import shutil
+from pathlib import Path
+
+# 引入仓库根目录下的公共模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common import profiling
+from common.checksum import ChecksumManifest
 
 # ==================== 配置区域 ====================
 # 在这里修改你的路径配置
@@ -43,6 +50,13 @@ PRESERVE_RELATIVE_STRUCTURE = False
 # 新增：是否将指定标签作为“排除”规则（True=出现任一指定标签则跳过不复制；False=出现任一指定标签则复制）
 EXCLUDE_ON_LABELS = False
 
+# 复制时同时计算校验和，写入 result/_checksums.json（仅复制模式有效；可用 3-文件夹处理/22-校验复制结果 校验）
+VERIFY_CHECKSUM = False
+
+# 分阶段计时：结束时打印遍历 / 解析 / 复制各阶段的耗时与字节数；PROFILE_TRACE 非空时同时输出 Chrome trace JSON
+PROFILE = False
+PROFILE_TRACE = ""
+
 # ==================== 配置区域结束 ====================
 
 
@@ -100,8 +114,13 @@ def find_and_copy_files_with_label(source_path: str, target_label: str, target_p
 	print(f"开始查找并{mode_str}文件（{struct_str}）...")
 	print("=" * 60)
 	
+	manifest = None
+	if VERIFY_CHECKSUM and not MOVE_INSTEAD_OF_COPY and not dry_run:
+		manifest = ChecksumManifest(result_root)
+	
 	# 遍历所有子文件夹
-	for root, dirs, files in os.walk(source_path):
+	# timed_iter 原样传出 os.walk 的 dirs 列表，下面的原地剪枝仍然生效
+	for root, dirs, files in profiling.timed_iter("遍历目录", os.walk(source_path)):
 		# 跳过目标文件夹，避免无限递归
 		dirs[:] = [d for d in dirs if not d.startswith('.') and d != 'result']
 		
@@ -109,8 +128,9 @@ def find_and_copy_files_with_label(source_path: str, target_label: str, target_p
 			if file.lower().endswith('.json'):
 				json_path = os.path.join(root, file)
 				try:
-					with open(json_path, 'r', encoding='utf-8') as f:
+					with profiling.stage("解析JSON"), open(json_path, 'r', encoding='utf-8') as f:
 						data = json.load(f)
+					profiling.count("JSON")
 					# 解析 shapes
 					shapes = data.get('shapes', [])
 					if not isinstance(shapes, list):
@@ -139,7 +159,9 @@ def find_and_copy_files_with_label(source_path: str, target_label: str, target_p
 					image_name = data.get('imagePath', '')
 					if image_name:
 						image_path = os.path.join(root, image_name)
-						if os.path.exists(image_path):
+						with profiling.stage("检查图片"):
+							image_exists = os.path.exists(image_path)
+						if image_exists:
 							# 目标子目录
 							if PRESERVE_RELATIVE_STRUCTURE:
 								rel_dir = os.path.relpath(root, source_path)
@@ -152,7 +174,8 @@ def find_and_copy_files_with_label(source_path: str, target_label: str, target_p
 							else:
 								print(f"[DRY-RUN] 将创建目标子目录: {target_dir}")
 							# 执行复制/剪切
-							copied = copy_or_move_single_file_pair(json_path, image_path, target_dir, dry_run)
+							with profiling.stage("复制/剪切"):
+								copied = copy_or_move_single_file_pair(json_path, image_path, target_dir, dry_run, manifest)
 							if copied:
 								copied_count += 1
 								print(f"✓ 已{mode_str}第 {copied_count} 对文件 -> {target_dir}")
@@ -164,10 +187,14 @@ def find_and_copy_files_with_label(source_path: str, target_label: str, target_p
 				except Exception as e:
 					print(f"警告：处理文件 {json_path} 时出错: {e}")
 	
+	if manifest is not None:
+		manifest.save()
+		print(f"校验清单: {manifest.path}")
+	
 	return copied_count
 
 
-def copy_or_move_single_file_pair(json_path: str, image_path: str, result_dir: str, dry_run: bool = False) -> bool:
+def copy_or_move_single_file_pair(json_path: str, image_path: str, result_dir: str, dry_run: bool = False, manifest: ChecksumManifest = None) -> bool:
 	"""
 	复制或剪切单个文件对（JSON + 图片）到指定的结果子目录
 	
@@ -176,6 +203,7 @@ def copy_or_move_single_file_pair(json_path: str, image_path: str, result_dir: s
 		image_path: 图片文件路径
 		result_dir: 目标子目录（可能是 result 根，或附加相对结构）
 		dry_run: 是否为试运行模式
+		manifest: 校验清单；传入时复制同时计算哈希并记录
 		
 	Returns:
 		是否处理成功
@@ -202,12 +230,17 @@ def copy_or_move_single_file_pair(json_path: str, image_path: str, result_dir: s
 			print(f"✓ 剪切JSON: {json_name}")
 			shutil.move(image_path, target_image)
 			print(f"✓ 剪切图片: {image_name}")
+			profiling.add_file_bytes("剪切", target_json)
+			profiling.add_file_bytes("剪切", target_image)
 		else:
 			# 复制JSON与图片
-			shutil.copy2(json_path, target_json)
+			copy_func = manifest.copy if manifest is not None else shutil.copy2
+			copy_func(json_path, target_json)
 			print(f"✓ 复制JSON: {json_name}")
-			shutil.copy2(image_path, target_image)
+			copy_func(image_path, target_image)
 			print(f"✓ 复制图片: {image_name}")
+			profiling.add_file_bytes("复制", target_json)
+			profiling.add_file_bytes("复制", target_image)
 		return True
 		
 	except Exception as e:
@@ -218,6 +251,8 @@ def copy_or_move_single_file_pair(json_path: str, image_path: str, result_dir: s
 
 def main():
 	"""主函数"""
+	if PROFILE:
+		profiling.enable(trace_path=PROFILE_TRACE)
 	print("钢网毛刺图片筛选工具 v2.0")
 	print("=" * 50)
 	print(f"源路径: {SOURCE_PATH}")
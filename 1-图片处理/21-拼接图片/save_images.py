@@ -1,6 +1,13 @@
-import cv2
-import numpy as np
 import os
+import re
+import sys
+from pathlib import Path
+
+# 引入仓库根目录下的公共模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.imagecache import DecodedImageCache
+from common.imageio import is_image, imwrite_unicode
+from common.mosaic import build_mosaic, grid_shape, save_mosaic_pages
 
 # =============================
 # 配置区域
@@ -8,41 +15,72 @@ import os
 folder = r"C:\\Users\\Administrator\\Desktop\\part\\Cut"  # 👉 修改为你的文件夹路径
 output_path = os.path.join(folder, "merged.jpg")
 
-# =============================
-# 读取图像
-# =============================
-images = []
-for i in range(1, 7):
-    img_path = os.path.join(folder, f"{i}.jpg")
-    if not os.path.exists(img_path):
-        raise FileNotFoundError(f"未找到文件: {img_path}")
-    img = cv2.imread(img_path)
-    if img is None:
-        raise ValueError(f"无法读取图像: {img_path}")
-    images.append(img)
+# 要拼接的图片（按顺序，行优先）；设为 None 则使用文件夹内全部图片（按文件名中的数字排序）
+image_names = [f"{i}.jpg" for i in range(1, 7)]
 
-# =============================
-# 检查尺寸并统一大小
-# =============================
-# 以第一张图片为基准统一尺寸
-h, w = images[0].shape[:2]
-images = [cv2.resize(img, (w, h)) for img in images]
+# 网格列数 / 行数（0 表示按图片数自动计算）
+cols = 2
+rows = 0
 
-# =============================
-# 拼接操作
-# =============================
-row1 = np.hstack((images[0], images[1]))
-row2 = np.hstack((images[2], images[3]))
-row3 = np.hstack((images[4], images[5]))
-merged = np.vstack((row1, row2, row3))
+# 格子尺寸 (宽, 高)；None 表示以第一张图片为基准
+tile_size = None
+
+# 格子间距（像素）与背景灰度
+gap = 0
+background = 0
+
+# "stretch" 拉伸填满格子（与原脚本一致），"contain" 保持比例居中
+fit = "stretch"
+
+# 每页最多行数：0 表示输出一张大图；大于 0 时分页输出 merged_001.jpg、merged_002.jpg ...（图片很多时内存占用有上限）
+rows_per_page = 0
+
+# 解码缓存目录（反复拼接同一批图片时跳过读取与解码）；为空则不使用
+decode_cache_dir = ""
+
+
+def natural_key(name):
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", name)]
+
+
+def main():
+    # =============================
+    # 收集图像
+    # =============================
+    if image_names is None:
+        names = sorted((n for n in os.listdir(folder) if is_image(n) and
+                        os.path.abspath(os.path.join(folder, n)) != os.path.abspath(output_path)), key=natural_key)
+    else:
+        names = list(image_names)
+    paths = [os.path.join(folder, name) for name in names]
+    for path in paths:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"未找到文件: {path}")
+    if not paths:
+        raise FileNotFoundError(f"文件夹中没有图片: {folder}")
+
+    cache = DecodedImageCache(decode_cache_dir) if decode_cache_dir else None
+    options = dict(tile_size=tile_size, gap=gap, background=background, fit=fit,
+                   loader=cache.get if cache is not None else None)
+
+    # =============================
+    # 拼接与保存
+    # =============================
+    if rows_per_page > 0:
+        _, page_cols = grid_shape(len(paths), cols, rows)
+        saved = save_mosaic_pages(paths, output_path, page_cols, rows_per_page, **options)
+        print(f"拼接完成，共 {len(paths)} 张，输出 {len(saved)} 页:")
+        for path in saved:
+            print(f"  {path}")
+    else:
+        merged = build_mosaic(paths, cols=cols, rows=rows, **options)
+        if not imwrite_unicode(output_path, merged):
+            raise OSError(f"保存失败: {output_path}")
+        grid_rows, grid_cols = grid_shape(len(paths), cols, rows)
+        print(f"拼接完成（{grid_rows}x{grid_cols}，{merged.shape[1]}x{merged.shape[0]}），输出文件: {output_path}")
+    if cache is not None:
+        cache.save()
 
-# =============================
-# 保存与显示
-# =============================
-cv2.imwrite(output_path, merged)
-print(f"拼接完成，输出文件: {output_path}")
 
-# 如果你想显示结果
-# cv2.imshow("Merged", merged)
-# cv2.waitKey(0)
-# cv2.destroyAllWindows()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+缺陷裁图总览（标注质检用）
+
+把含指定标签的每个标注区域（多边形 / 矩形的外接框，外扩少许边距）裁出缩略图，按标签分页拼接：
+  - 先用标签扫描缓存（common.annotations.LabelScanCache，保存在用户缓存目录）筛出含目标标签的 JSON，未变化的 JSON 不再重新读取；
+    只对命中的 JSON 读取 shapes
+  - 缩略图在线程池中生成；JPEG 按所需分辨率用 IMREAD_REDUCED_COLOR_2/4/8 缩小解码，
+    只需要缩略图时解码量减少到 1/4 ~ 1/64
+  - 按 JSON 顺序逐张写入分页画布，每个标签同一时间只保留一页，数千张裁图内存占用也有上限
+  - 每页旁边输出同名 .csv，记录每个格子对应的 JSON 与裁剪框，便于回查原图
+
+输出：<OUTPUT_DIR>/<标签>_001.jpg、<标签>_001.csv ...
+"""
+
+import csv
+import os
+import sys
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# 引入仓库根目录下的公共模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.annotations import LabelScanCache, read_json_shapes
+from common.fileops import DEFAULT_WORKERS
+from common.imageio import IMAGE_EXTS, REDUCED_COLOR_FLAGS, reduce_factor_for
+from common.mosaic import PagedMosaicWriter
+
+# ==================== 配置区域 ====================
+# 标注数据根目录（递归查找 LabelMe JSON，图片与 JSON 同目录同名）
+SOURCE_PATHS = [
+    r"C:\Users\Administrator\Desktop\BBB\BBB",
+]
+
+# 目标标签（子串匹配，与 find_steel_burr_images_v2.py 一致）；为空则为所有标签各生成一组总览
+TARGET_LABELS = [
+    "法兰流纹",
+]
+
+# 输出目录
+OUTPUT_DIR = r"C:\Users\Administrator\Desktop\BBB\BBB-总览"
+
+# 缩略图边长、每页 列数 x 行数、格子间距
+THUMB_SIZE = 160
+COLS = 10
+ROWS = 8
+GAP = 4
+
+# 裁剪框外扩比例（相对框的宽高），保留一些周围区域便于判断
+MARGIN = 0.2
+
+# 缩略图左上角标注序号（与 csv 中的格子序号对应）
+DRAW_INDEX = True
+
+# 线程数
+WORKERS = DEFAULT_WORKERS
+# ==================== 配置区域结束 ====================
+
+Box = Tuple[float, float, float, float]
+
+
+def match_label(label: str) -> Optional[str]:
+    """返回命中的目标标签（TARGET_LABELS 为空时返回标签本身），未命中返回 None"""
+    if not TARGET_LABELS:
+        return label
+    for target in TARGET_LABELS:
+        if target and target in label:
+            return target
+    return None
+
+
+def find_image(json_path: str) -> Optional[str]:
+    stem = os.path.splitext(json_path)[0]
+    for ext in IMAGE_EXTS:
+        for candidate in (stem + ext, stem + ext.upper()):
+            if os.path.exists(candidate):
+                return candidate
+    return None
+
+
+def collect_tasks(source: str) -> List[Tuple[str, str, List[Tuple[str, Box]]]]:
+    """
+    用标签扫描缓存筛选 JSON，再读取命中文件的标注框
+
+    Returns:
+        [(json 路径, 图片路径, [(目标标签, (x1, y1, x2, y2)), ...]), ...]
+    """
+    cache = LabelScanCache(source, "json")
+    labels, reread = cache.scan()
+    cache.save()
+    matched = sorted(rel for rel, file_labels in labels.items() if any(match_label(l) for l in file_labels))
+    print(f"  {source}: {len(labels)} 个 JSON（重新读取 {reread} 个），命中 {len(matched)} 个")
+
+    tasks = []
+    for rel in matched:
+        json_path = os.path.join(source, rel)
+        try:
+            _, _, shapes = read_json_shapes(json_path)
+        except Exception as e:
+            print(f"  警告：无法读取 {json_path}: {e}")
+            continue
+        boxes = []
+        for label, _, points in shapes:
+            target = match_label(label)
+            if target is None:
+                continue
+            pts = np.asarray([pt[:2] for pt in points], dtype=np.float64)
+            x1, y1 = pts.min(axis=0)
+            x2, y2 = pts.max(axis=0)
+            boxes.append((target, (x1, y1, x2, y2)))
+        image_path = find_image(json_path)
+        if image_path is None:
+            print(f"  警告：找不到图片: {json_path}")
+            continue
+        if boxes:
+            tasks.append((json_path, image_path, boxes))
+    return tasks
+
+
+def reduce_factor(boxes: List[Tuple[str, Box]]) -> int:
+    """在保证最小的裁剪区域仍不小于缩略图的前提下，选取最大的缩小解码倍数"""
+    smallest = min(max(x2 - x1, y2 - y1) * (1 + 2 * MARGIN) for _, (x1, y1, x2, y2) in boxes)
+    return reduce_factor_for((smallest, smallest), THUMB_SIZE)
+
+
+def make_thumbnails(task) -> List[Tuple[str, np.ndarray, Box]]:
+    """解码一张图片并裁出其中所有目标框，返回 [(目标标签, 裁图, 原图坐标裁剪框), ...]"""
+    json_path, image_path, boxes = task
+    factor = reduce_factor(boxes)
+    try:
+        stream = np.fromfile(image_path, dtype=np.uint8)
+    except OSError:
+        return []
+    img = cv2.imdecode(stream, REDUCED_COLOR_FLAGS[factor])
+    if img is None:
+        return []
+    h, w = img.shape[:2]
+    results = []
+    for target, (x1, y1, x2, y2) in boxes:
+        mx, my = (x2 - x1) * MARGIN, (y2 - y1) * MARGIN
+        cx1, cy1 = max(0.0, x1 - mx), max(0.0, y1 - my)
+        cx2, cy2 = x2 + mx, y2 + my
+        sx1, sy1 = int(cx1 / factor), int(cy1 / factor)
+        sx2, sy2 = min(w, max(sx1 + 1, int(np.ceil(cx2 / factor)))), min(h, max(sy1 + 1, int(np.ceil(cy2 / factor))))
+        if sx1 >= w or sy1 >= h:
+            continue
+        crop = img[sy1:sy2, sx1:sx2]
+        # 先缩到缩略图大小，避免大裁图在主线程中缩放
+        scale = THUMB_SIZE / max(crop.shape[:2])
+        if scale < 1:
+            crop = cv2.resize(crop, (max(1, int(crop.shape[1] * scale)), max(1, int(crop.shape[0] * scale))),
+                              interpolation=cv2.INTER_AREA)
+        box = (int(round(cx1)), int(round(cy1)), int(round(min(cx2, w * factor))), int(round(min(cy2, h * factor))))
+        results.append((target, crop, box))
+    return results
+
+
+def safe_name(label: str) -> str:
+    return "".join("_" if ch in '\\/:*?"<>|' else ch for ch in label)
+
+
+def main():
+    print("缺陷裁图总览")
+    print("=" * 50)
+    print(f"目标标签: {TARGET_LABELS or '全部'}")
+
+    tasks = []
+    for source in SOURCE_PATHS:
+        if not os.path.isdir(source):
+            print(f"警告：路径不存在，跳过: {source}")
+            continue
+        tasks.extend(collect_tasks(source))
+    print(f"待处理图片: {len(tasks)} 张，标注框: {sum(len(t[2]) for t in tasks)} 个")
+    if not tasks:
+        return
+
+    writers: Dict[str, PagedMosaicWriter] = {}
+    rows_by_label: Dict[str, List[list]] = defaultdict(list)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    def write_index(label: str, page: int) -> None:
+        index_path = f"{os.path.join(OUTPUT_DIR, safe_name(label))}_{page:03d}.csv"
+        with open(index_path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["格子序号", "JSON", "x1", "y1", "x2", "y2"])
+            writer.writerows(rows_by_label.pop(label, []))
+
+    # executor.map 按提交顺序返回结果，总览顺序与 JSON 顺序一致
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        for task, thumbs in zip(tasks, pool.map(make_thumbnails, tasks)):
+            if not thumbs:
+                print(f"  警告：无法读取图片: {task[1]}")
+                continue
+            for target, crop, box in thumbs:
+                writer = writers.get(target)
+                if writer is None:
+                    writer = writers[target] = PagedMosaicWriter(
+                        os.path.join(OUTPUT_DIR, safe_name(target)), COLS, ROWS, (THUMB_SIZE, THUMB_SIZE),
+                        gap=GAP, background=40)
+                page, slot = writer.add(crop, str(writer.slot + 1) if DRAW_INDEX else None)
+                rows_by_label[target].append([slot, task[0], *box])
+                if writer.slot == 0:  # 本页已写满并保存
+                    write_index(target, page)
+
+    print("\n" + "=" * 50)
+    for target, writer in sorted(writers.items()):
+        has_partial = writer.slot > 0
+        writer.flush()
+        if has_partial:
+            write_index(target, len(writer.saved))
+        print(f"{target}: {len(writer.saved)} 页")
+    print(f"输出目录: {OUTPUT_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+图片尺寸 / 格式统计
+
+统计训练数据根目录下所有图片的分辨率、通道数、位深与编码方式，并找出与同组多数图片不一致的图片
+（尺寸不同、灰度图混在彩色图中等），这类图片会导致拼接（save_images.py）或训练出错：
+  - 目录并发遍历（common.discovery.list_files），只读文件头（JPEG SOF / PNG IHDR / BMP 信息头），不解码像素
+  - 结果保存为列式表（根目录下 _image_profile.npz，NumPy 结构化数组 + 目录数组 + 文件名，压缩保存），
+    再次运行时 大小 + 修改时间 未变的图片直接复用，只读取新增或修改过的图片
+  - 文件名按 UTF-8 拼接为一个字节数组 + 偏移量保存（每行只存文件名，目录由 dir 列指向目录数组），
+    不使用定长 Unicode 数组（按最长路径分配，百万张图片要数百 MB）
+  - 直方图与异常检测都是对整列的 NumPy 运算，百万张图片也在一秒内完成
+
+输出：控制台直方图；每个根目录下 _image_profile_outliers.csv（异常图片清单）
+"""
+
+import csv
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 引入仓库根目录下的公共模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.discovery import list_files
+from common.fileops import DEFAULT_WORKERS, FileOpExecutor, format_progress
+from common.imageio import IMAGE_FORMATS, is_image, read_image_info
+
+# ==================== 配置区域 ====================
+# 要统计的根目录（递归查找图片）
+SOURCE_PATHS = [
+    r"C:\Users\Administrator\Desktop\BBB\BBB",
+]
+
+# 只统计该相对路径前缀下的图片（/ 分隔，如 "B25/内侧压伤"）；为空则统计全部
+PATH_PREFIX = ""
+
+# 要输出的直方图（每项为一组字段，可选 width / height / channels / bits / format / progressive）
+HISTOGRAMS = [
+    ("width", "height"),
+    ("channels",),
+    ("format", "bits"),
+    ("format", "progressive"),
+]
+
+# 每个直方图最多显示的行数
+TOP_N = 15
+
+# 异常检测分组："dir" 按图片所在目录（同一目录的图片应尺寸一致，如拼接 / 裁图目录），"root" 整个根目录一组
+OUTLIER_GROUP = "dir"
+
+# 允许的尺寸 [(宽, 高), ...]；为空则以组内最常见的尺寸为准
+EXPECTED_SIZES = []
+
+# 线程数
+WORKERS = DEFAULT_WORKERS
+# ==================== 配置区域结束 ====================
+
+PROFILE_NAME = "_image_profile.npz"
+OUTLIER_NAME = "_image_profile_outliers.csv"
+
+# format 列：0 表示文件头无法解析（损坏或 TIFF 等其他格式），其余为 IMAGE_FORMATS 中的序号 + 1
+FORMAT_NAMES = ("其他",) + IMAGE_FORMATS
+
+PROFILE_DTYPE = np.dtype([
+    ("size", "<i8"),
+    ("mtime_ns", "<i8"),
+    ("dir", "<i4"),
+    ("width", "<i4"),
+    ("height", "<i4"),
+    ("channels", "u1"),
+    ("bits", "u1"),
+    ("format", "u1"),
+    ("progressive", "?"),
+])
+
+
+def pack_names(names: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """字符串列表 -> (UTF-8 拼接后的 uint8 数组, int64 偏移量，长度为 n + 1)"""
+    encoded = [name.encode("utf-8") for name in names]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded], dtype=np.int64)
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def unpack_names(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+    data = blob.tobytes()
+    bounds = offsets.tolist()
+    return [data[a:b].decode("utf-8") for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+def rel_path(dirs: np.ndarray, dir_index: int, name: str) -> str:
+    """由目录数组与文件名还原相对路径（/ 分隔）"""
+    folder = dirs[dir_index]
+    return f"{folder}/{name}" if folder else name
+
+
+def load_profile(root: str) -> Optional[Tuple[np.ndarray, List[str], np.ndarray]]:
+    """读取已保存的统计表，返回 (表, 文件名列表, 目录数组)；不存在或损坏时返回 None"""
+    path = os.path.join(root, PROFILE_NAME)
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            table, dirs = data["table"], data["dirs"]
+            names = unpack_names(data["names"], data["name_offsets"])
+    except (OSError, ValueError, KeyError, UnicodeDecodeError):
+        return None
+    if table.dtype != PROFILE_DTYPE or len(table) != len(names):
+        return None
+    return table, names, dirs
+
+
+def save_profile(root: str, table: np.ndarray, names: Sequence[str], dirs: np.ndarray) -> None:
+    path = os.path.join(root, PROFILE_NAME)
+    tmp_path = path + ".tmp"
+    blob, offsets = pack_names(names)
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(f, table=table, names=blob, name_offsets=offsets, dirs=dirs)
+    os.replace(tmp_path, path)
+
+
+def update_profile(root: str) -> Tuple[np.ndarray, List[str], np.ndarray, int]:
+    """
+    遍历根目录并更新统计表
+
+    Returns:
+        (表, 文件名列表, 目录数组, 重新读取文件头的图片数)；第 i 张图片的相对路径为 rel_path(dirs, table["dir"][i], names[i])
+    """
+    current = list_files(root, is_image, prune=lambda name: name.startswith("."), max_workers=WORKERS)
+    rels = sorted(current)
+    table = np.zeros(len(rels), dtype=PROFILE_DTYPE)
+    if rels:
+        stats = np.array([current[rel] for rel in rels], dtype=np.int64)
+        table["size"], table["mtime_ns"] = stats[:, 0], stats[:, 1]
+
+    split = [rel.rpartition("/") for rel in rels]
+    names = [name for _, _, name in split]
+    dirs, dir_index = np.unique(np.array([folder for folder, _, _ in split], dtype=str), return_inverse=True)
+    table["dir"] = dir_index.reshape(-1)
+    del split
+
+    # 大小与修改时间未变的图片沿用上次的结果
+    stale = list(range(len(rels)))
+    previous = load_profile(root)
+    if previous is not None and len(rels):
+        old_table, old_names, old_dirs = previous
+        old_row = {rel_path(old_dirs, d, name): i
+                   for i, (d, name) in enumerate(zip(old_table["dir"].tolist(), old_names))}
+        rows = np.array([old_row.get(rel, -1) for rel in rels], dtype=np.int64)
+        known = rows >= 0
+        old = old_table[np.where(known, rows, 0)]
+        same = known & (old["size"] == table["size"]) & (old["mtime_ns"] == table["mtime_ns"])
+        for field in ("width", "height", "channels", "bits", "format", "progressive"):
+            table[field][same] = old[field][same]
+        stale = np.flatnonzero(~same).tolist()
+
+    def read(i: int) -> int:
+        info = read_image_info(os.path.join(root, rels[i]))
+        if info is not None:
+            fmt, width, height, channels, bits, progressive = info
+            # 每个下标只由一个线程写入
+            table[i] = (table[i]["size"], table[i]["mtime_ns"], table[i]["dir"], width, height, channels,
+                        bits, IMAGE_FORMATS.index(fmt) + 1, progressive)
+        return 0
+
+    if stale:
+        executor = FileOpExecutor(WORKERS, on_progress=lambda s: print(f"\r  读取文件头: {format_progress(s)}",
+                                                                     end="", flush=True))
+        executor.run(read, stale)
+        print()
+    save_profile(root, table, names, dirs)
+    return table, names, dirs, len(stale)
+
+
+def _combine(columns: Sequence[np.ndarray]) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """把多列编码为一列 int64（各列先 np.unique 编号再按混合进制合并），比结构化数组上的 np.unique 快得多"""
+    combined = np.zeros(len(columns[0]), dtype=np.int64)
+    uniques = []
+    for column in columns:
+        values, inverse = np.unique(column, return_inverse=True)
+        combined = combined * len(values) + inverse.reshape(-1)
+        uniques.append(values)
+    return combined, uniques
+
+
+def histogram(table: np.ndarray, fields: Sequence[str]) -> List[Tuple[tuple, int]]:
+    """按字段组合统计图片数，返回 [(字段值, 数量), ...]（数量从多到少）"""
+    if len(table) == 0:
+        return []
+    combined, uniques = _combine([table[field] for field in fields])
+    codes, counts = np.unique(combined, return_counts=True)
+    order = np.argsort(-counts, kind="stable")
+    rows = []
+    for code, count in zip(codes[order].tolist(), counts[order].tolist()):
+        values = []
+        for values_of_field in reversed(uniques):
+            code, index = divmod(code, len(values_of_field))
+            values.append(values_of_field[index].item())
+        rows.append((tuple(reversed(values)), count))
+    return rows
+
+
+def format_value(field: str, value) -> str:
+    if field == "format":
+        return FORMAT_NAMES[value]
+    if field == "progressive":
+        return "渐进/隔行" if value else "基线"
+    return str(value)
+
+
+def group_mode(groups: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """每组中出现次数最多的 key，返回与 groups 对齐的数组"""
+    values, inverse = np.unique(keys, return_inverse=True)
+    codes, counts = np.unique(groups * len(values) + inverse.reshape(-1), return_counts=True)
+    code_groups = codes // len(values)
+    # 按 组号 升序、次数 降序排列后，每组第一项即众数
+    order = np.lexsort((-counts, code_groups))
+    codes, code_groups = codes[order], code_groups[order]
+    first = np.ones(len(codes), dtype=bool)
+    first[1:] = code_groups[1:] != code_groups[:-1]
+    mode = np.zeros(int(groups.max()) + 1, dtype=keys.dtype)
+    mode[code_groups[first]] = values[codes[first] % len(values)]
+    return mode[groups]
+
+
+def find_outliers(table: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    异常检测
+
+    Returns:
+        {原因: 布尔掩码}
+    """
+    if len(table) == 0:
+        return {}
+    groups = table["dir"].astype(np.int64) if OUTLIER_GROUP == "dir" else np.zeros(len(table), dtype=np.int64)
+    readable = table["format"] > 0
+    size_key = (table["width"].astype(np.int64) << 32) | table["height"].astype(np.int64)
+    if EXPECTED_SIZES:
+        allowed = np.array([(int(w) << 32) | int(h) for w, h in EXPECTED_SIZES], dtype=np.int64)
+        wrong_size = ~np.isin(size_key, allowed)
+    else:
+        wrong_size = size_key != group_mode(groups, size_key)
+    # 灰度图 / 彩色图 / 带透明通道 与同组多数不一致
+    wrong_channels = table["channels"] != group_mode(groups, table["channels"].astype(np.int64))
+    return {
+        "文件头无法解析": ~readable,
+        "尺寸不一致": readable & wrong_size,
+        "通道数不一致": readable & wrong_channels,
+        "位深不是 8 位": readable & (table["bits"] != 8),
+    }
+
+
+def write_outliers(root: str, table: np.ndarray, names: List[str], dirs: np.ndarray,
+                   outliers: Dict[str, np.ndarray]) -> int:
+    flagged = np.zeros(len(table), dtype=bool)
+    for mask in outliers.values():
+        flagged |= mask
+    out_path = os.path.join(root, OUTLIER_NAME)
+    with open(out_path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["路径", "原因", "宽", "高", "通道数", "位深", "格式"])
+        for i in np.flatnonzero(flagged):
+            row = table[i]
+            reasons = "；".join(reason for reason, mask in outliers.items() if mask[i])
+            writer.writerow([rel_path(dirs, row["dir"], names[i]), reasons, row["width"], row["height"], row["channels"], row["bits"],
+                             FORMAT_NAMES[row["format"]]])
+    return int(flagged.sum())
+
+
+def report(root: str) -> None:
+    table, names, dirs, reread = update_profile(root)
+    print(f"  图片 {len(table)} 张（读取文件头 {reread} 张），目录 {len(dirs)} 个，"
+          f"共 {table['size'].sum() / 1024 ** 3:.2f} GB")
+    if PATH_PREFIX:
+        prefix = PATH_PREFIX.strip("/") + "/"
+        # 前缀以 / 结尾，只需比较目录部分
+        selected = np.char.startswith(np.char.add(dirs, "/"), prefix)[table["dir"]]
+        table = table[selected]
+        names = [names[i] for i in np.flatnonzero(selected).tolist()]
+        print(f"  前缀 {prefix}: {len(table)} 张")
+
+    for fields in HISTOGRAMS:
+        print(f"\n  [{' x '.join(fields)}]")
+        rows = histogram(table, fields)
+        for values, count in rows[:TOP_N]:
+            text = " x ".join(format_value(field, value) for field, value in zip(fields, values))
+            print(f"    {text:<24} {count:>8}  {count / len(table):6.1%}")
+        if len(rows) > TOP_N:
+            print(f"    ... 其余 {len(rows) - TOP_N} 种，共 {sum(c for _, c in rows[TOP_N:])} 张")
+
+    outliers = find_outliers(table)
+    print("\n  [异常]")
+    for reason, mask in outliers.items():
+        print(f"    {reason:<12} {int(mask.sum()):>8}")
+    flagged = write_outliers(root, table, names, dirs, outliers)
+    print(f"  异常图片 {flagged} 张，清单: {os.path.join(root, OUTLIER_NAME)}")
+
+
+def main():
+    print("图片尺寸 / 格式统计")
+    print("=" * 50)
+    for source in SOURCE_PATHS:
+        if not os.path.isdir(source):
+            print(f"警告：路径不存在，跳过: {source}")
+            continue
+        print(f"\n{source}")
+        report(os.path.abspath(source))
+
+
+if __name__ == "__main__":
+    main()
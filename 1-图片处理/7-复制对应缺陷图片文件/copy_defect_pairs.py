@@ -3,9 +3,16 @@
 
 import json
 import os
+import sys
 import shutil
+from pathlib import Path
 from typing import Dict, Iterable, List, Optional, Set, Tuple
 
+# 引入仓库根目录下的公共模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common import profiling
+from common.checksum import ChecksumManifest
+
 
 # =========================
 # 配置区：在此直接修改参数
@@ -57,6 +64,13 @@ CASE_INSENSITIVE = False
 # 演练模式：只打印将要复制的文件，不实际复制
 DRY_RUN = False
 
+# 复制时同时计算校验和，写入 OUT_ROOT/_checksums.json（可用 3-文件夹处理/22-校验复制结果 校验）
+VERIFY_CHECKSUM = False
+
+# 分阶段计时：结束时打印遍历 / 解析 / 复制各阶段的耗时与复制字节数；PROFILE_TRACE 非空时同时输出 Chrome trace JSON
+PROFILE = False
+PROFILE_TRACE = ""
+
 
 IMAGE_EXTS_DEFAULT = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff"}
 
@@ -161,26 +175,39 @@ def copy_pair(
 	out_root: str,
 	overwrite: bool,
 	dry_run: bool,
+	manifest: Optional[ChecksumManifest] = None,
 ) -> Tuple[str, str]:
-	image_dst, json_dst = compute_dst_paths(
-		src_root=src_root,
-		pair_dir=pair_dir,
-		image_src=image_src,
-		json_src=json_src,
-		out_root=out_root,
-		overwrite=overwrite,
-	)
+	# 建目录与同名检查在网络盘上每次都是往返，单独计时
+	with profiling.stage("计算目标路径"):
+		image_dst, json_dst = compute_dst_paths(
+			src_root=src_root,
+			pair_dir=pair_dir,
+			image_src=image_src,
+			json_src=json_src,
+			out_root=out_root,
+			overwrite=overwrite,
+		)
 	if dry_run:
 		print(f"[DRY-RUN] 复制到: {image_dst}")
 		print(f"[DRY-RUN] 复制到: {json_dst}")
 	else:
-		ensure_dir(os.path.dirname(image_dst))
-		shutil.copy2(image_src, image_dst)
-		shutil.copy2(json_src, json_dst)
+		with profiling.stage("复制"):
+			ensure_dir(os.path.dirname(image_dst))
+			if manifest is not None:
+				profiling.add_bytes("复制", manifest.copy(image_src, image_dst))
+				profiling.add_bytes("复制", manifest.copy(json_src, json_dst))
+			else:
+				shutil.copy2(image_src, image_dst)
+				shutil.copy2(json_src, json_dst)
+				profiling.add_file_bytes("复制", image_dst)
+				profiling.add_file_bytes("复制", json_dst)
+		profiling.count("复制对")
 	return image_dst, json_dst
 
 
 def main() -> None:
+	if PROFILE:
+		profiling.enable(trace_path=PROFILE_TRACE)
 	src_root = os.path.abspath(SRC_ROOT)
 	out_root = os.path.abspath(OUT_ROOT)
 
@@ -205,14 +232,16 @@ def main() -> None:
 	print(f"图片后缀: {sorted(image_exts)}  大小写不敏感: {CASE_INSENSITIVE}")
 
 	ensure_dir(out_root)
+	manifest = ChecksumManifest(out_root) if VERIFY_CHECKSUM and not DRY_RUN else None
 
 	total_pairs = 0
 
-	for image_path, json_path, base, pair_dir in collect_pairs(src_root, image_exts):
+	for image_path, json_path, base, pair_dir in profiling.timed_iter("遍历配对", collect_pairs(src_root, image_exts)):
 		if copied_pairs >= limit:
 			break
 		total_pairs += 1
-		labels = read_defect_labels_from_json(json_path)
+		with profiling.stage("解析JSON"):
+			labels = read_defect_labels_from_json(json_path)
 		if not labels:
 			continue
 		# 标准化labels
@@ -238,11 +267,16 @@ def main() -> None:
 					out_root=out_root,
 					overwrite=(OVERWRITE and not force_unique),
 					dry_run=DRY_RUN,
+					manifest=manifest,
 				)
 				copied_pairs += 1
 				if copied_pairs >= limit:
 					break
 
+	if manifest is not None:
+		manifest.save()
+		print(f"校验清单: {manifest.path}")
+
 	print("—— 处理完成 ——")
 	print(f"扫描到成对文件: {total_pairs}")
 	print(f"实际复制对数: {copied_pairs}（每图复制 {per_image} 份，受全局上限 {limit} 限制）")
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LabelMe JSON 批量转换为 YOLO txt（增量）
+
+  - 类别编号来自 label_name.txt（行号即编号，与 yolo_label_counter.py 一致）
+  - 每个 JSON 只取出图片尺寸与 shapes 的 标签 / 类型 / 点，同一文件的所有 shape 拼成一个数组，
+    一次 reduceat 求出全部外接框并归一化
+  - 转换在进程池中并行执行（JSON 解析与数值计算受 GIL 限制，多进程才能用满 CPU）
+  - 输出目录下记录每个 JSON 的 大小 + 修改时间，再次运行时只转换新增或修改过的 JSON；
+    label_name.txt 变化时全部重新生成；源 JSON 已删除的输出随之删除
+  - 可同时把图片复制（或硬链接）到 images 目录，得到 <OUTPUT_ROOT>/images|labels/<OUTPUT_NAME> 结构
+
+依赖：pip install numpy（可选 orjson，加快 JSON 解析）
+"""
+
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# 引入仓库根目录下的公共模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.annotations import read_json_shapes, read_label_names
+from common.fileops import FileOpExecutor, copy_file
+from common.imageio import IMAGE_EXTS
+from common.sync import link_or_copy
+
+# ==================== 配置区域 ====================
+# LabelMe 标注目录（递归查找 JSON，图片与 JSON 同目录同名）
+INPUT_ROOT = r"Y:\2_标注数据\2025-08-04领益 东莞  B747 Hinge AOI 改造C241104\20251016"
+
+# 训练数据根目录（其下 images / labels）与本次输出的子文件夹名
+OUTPUT_ROOT = r"S:\train_data_yzh\747hingedata\F"
+OUTPUT_NAME = "train_20251016_F"
+
+# 类别映射文件
+LABEL_MAPPING_FILE = r"S:\train_data_yzh\747hingedata\F\label_name.txt"
+
+# 是否保留 INPUT_ROOT 下的子目录结构（False 时全部平铺，重名文件只保留第一个）
+KEEP_STRUCTURE = False
+
+# 是否同时输出图片，以及是否用硬链接代替复制（同一磁盘时不占用额外空间）
+COPY_IMAGES = True
+LINK_IMAGES = False
+
+# 没有任何目标的 JSON 是否输出空 txt（作为负样本）
+WRITE_EMPTY = True
+
+# 是否删除源 JSON 已不存在的输出
+REMOVE_STALE = True
+
+# 是否强制全部重新转换
+FORCE = False
+
+# 转换进程数
+WORKERS = os.cpu_count() or 4
+# ==================== 配置区域结束 ====================
+
+STATE_NAME = "_labelme2yolo_state.json"
+
+# 子进程中的类别映射（由 init_worker 设置，避免随每个任务传递）
+_CLASS_IDS: Dict[str, int] = {}
+
+
+def init_worker(class_ids: Dict[str, int]) -> None:
+    global _CLASS_IDS
+    _CLASS_IDS = class_ids
+
+
+def shapes_to_boxes(shapes: list, width: float, height: float) -> np.ndarray:
+    """所有 shape 的外接框，返回归一化的 (n, 4) [cx, cy, w, h]"""
+    counts = [len(points) for _, _, points in shapes]
+    points = np.asarray([pt[:2] for _, _, pts in shapes for pt in pts], dtype=np.float64)
+    starts = np.concatenate(([0], np.cumsum(counts[:-1]))).astype(np.intp)
+    mins = np.minimum.reduceat(points, starts, axis=0)
+    maxs = np.maximum.reduceat(points, starts, axis=0)
+
+    # 圆：第一个点为圆心，第二个点在圆周上
+    for i, (_, shape_type, pts) in enumerate(shapes):
+        if shape_type == "circle" and len(pts) >= 2:
+            center = points[starts[i]]
+            radius = np.hypot(*(points[starts[i] + 1] - center))
+            mins[i], maxs[i] = center - radius, center + radius
+
+    size = np.array([width, height], dtype=np.float64)
+    mins = np.clip(mins / size, 0.0, 1.0)
+    maxs = np.clip(maxs / size, 0.0, 1.0)
+    return np.concatenate(((mins + maxs) / 2, maxs - mins), axis=1)
+
+
+def convert_one(task: Tuple[str, str]) -> Tuple[str, int, List[str], Optional[str]]:
+    """
+    转换单个 JSON（在子进程中执行）
+
+    Returns:
+        (json 路径, 写入的框数, 未知标签列表, 错误信息)
+    """
+    json_path, txt_path = task
+    try:
+        width, height, shapes = read_json_shapes(json_path)
+        if not width or not height:
+            return json_path, 0, [], "缺少 imageWidth / imageHeight"
+        unknown = [label for label, _, _ in shapes if label not in _CLASS_IDS]
+        shapes = [s for s in shapes if s[0] in _CLASS_IDS]
+        lines: List[str] = []
+        if shapes:
+            boxes = shapes_to_boxes(shapes, width, height)
+            keep = (boxes[:, 2] > 0) & (boxes[:, 3] > 0)
+            for (label, _, _), (cx, cy, w, h) in zip(
+                    (s for s, k in zip(shapes, keep) if k), boxes[keep]):
+                lines.append(f"{_CLASS_IDS[label]} {cx:.6f} {cy:.6f} {w:.6f} {h:.6f}\n")
+        if not lines and not WRITE_EMPTY:
+            if os.path.exists(txt_path):
+                os.remove(txt_path)
+            return json_path, 0, unknown, None
+        os.makedirs(os.path.dirname(txt_path), exist_ok=True)
+        tmp_path = txt_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        os.replace(tmp_path, txt_path)
+        return json_path, len(lines), unknown, None
+    except Exception as e:
+        return json_path, 0, [], str(e)
+
+
+def scan_input(root: str) -> Tuple[Dict[str, Tuple[int, int]], Dict[str, str]]:
+    """
+    一次遍历收集 JSON 与图片
+
+    Returns:
+        ({json 相对路径: (大小, mtime_ns)}, {不含扩展名的相对路径: 图片相对路径})
+    """
+    jsons: Dict[str, Tuple[int, int]] = {}
+    images: Dict[str, str] = {}
+    stack = [("", root)]
+    while stack:
+        rel_dir, abs_dir = stack.pop()
+        try:
+            it = os.scandir(abs_dir)
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((rel, entry.path))
+                    continue
+                stem, ext = os.path.splitext(rel)
+                ext = ext.lower()
+                if ext == ".json" and not entry.name.startswith("_"):
+                    st = entry.stat()
+                    jsons[rel] = (st.st_size, st.st_mtime_ns)
+                elif ext in IMAGE_EXTS:
+                    images.setdefault(stem, rel)
+    return jsons, images
+
+
+def output_stem(rel_json: str) -> str:
+    """JSON 相对路径 -> 输出相对路径（不含扩展名）"""
+    stem = os.path.splitext(rel_json)[0]
+    return stem if KEEP_STRUCTURE else os.path.basename(stem)
+
+
+def load_state(path: str) -> dict:
+    if os.path.isfile(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    return {}
+
+
+def save_state(path: str, state: dict) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def main():
+    print("LabelMe -> YOLO 转换")
+    print("=" * 50)
+    if not os.path.isdir(INPUT_ROOT):
+        print(f"错误：输入目录不存在: {INPUT_ROOT}")
+        return
+    if not os.path.isfile(LABEL_MAPPING_FILE):
+        print(f"错误：类别映射文件不存在: {LABEL_MAPPING_FILE}")
+        return
+
+    names = read_label_names(LABEL_MAPPING_FILE)
+    class_ids = {name: idx for idx, name in names.items()}
+    print(f"类别: {len(class_ids)} 个")
+
+    label_dir = os.path.join(OUTPUT_ROOT, "labels", OUTPUT_NAME)
+    image_dir = os.path.join(OUTPUT_ROOT, "images", OUTPUT_NAME)
+    os.makedirs(label_dir, exist_ok=True)
+    state_path = os.path.join(label_dir, STATE_NAME)
+    state = load_state(state_path)
+    settings = {"classes": [[idx, name] for idx, name in sorted(names.items())], "keep_structure": KEEP_STRUCTURE,
+                "write_empty": WRITE_EMPTY, "copy_images": COPY_IMAGES}
+    if FORCE or state.get("settings") != settings:
+        if state:
+            print("类别映射或输出设置已变化，全部重新转换")
+        state = {}
+    done_files: Dict[str, list] = state.get("files", {})
+
+    start = time.perf_counter()
+    jsons, images = scan_input(INPUT_ROOT)
+    print(f"JSON: {len(jsons)} 个  图片: {len(images)} 张（扫描 {time.perf_counter() - start:.1f} 秒）")
+
+    # 平铺时检查重名
+    owners: Dict[str, str] = {}
+    duplicates = []
+    for rel in sorted(jsons):
+        stem = output_stem(rel)
+        if stem in owners:
+            duplicates.append(rel)
+        else:
+            owners[stem] = rel
+    for rel in duplicates:
+        print(f"  ⚠ 重名，跳过: {rel}（已有 {owners[output_stem(rel)]}）")
+        del jsons[rel]
+
+    changed = [rel for rel, stat in jsons.items() if done_files.get(rel) != list(stat)]
+    print(f"需要转换: {len(changed)} 个（未变化 {len(jsons) - len(changed)} 个）")
+
+    # 删除源 JSON 已不存在的输出
+    stale = [rel for rel in done_files if rel not in jsons]
+    if REMOVE_STALE and stale:
+        for rel in stale:
+            stem = output_stem(rel)
+            for path in [os.path.join(label_dir, stem + ".txt")] + [
+                    os.path.join(image_dir, stem + ext) for ext in IMAGE_EXTS]:
+                if os.path.exists(path):
+                    os.remove(path)
+        print(f"已删除过期输出: {len(stale)} 个")
+    for rel in stale:
+        done_files.pop(rel, None)
+
+    tasks = [(os.path.join(INPUT_ROOT, rel), os.path.join(label_dir, output_stem(rel) + ".txt")) for rel in changed]
+    rel_of = {task[0]: rel for task, rel in zip(tasks, changed)}
+    box_count = 0
+    unknown_counter: Counter = Counter()
+    failed = []
+    converted = []
+    start = time.perf_counter()
+    if tasks:
+        chunksize = max(1, min(256, len(tasks) // (WORKERS * 4)))
+        with ProcessPoolExecutor(max_workers=WORKERS, initializer=init_worker, initargs=(class_ids,)) as pool:
+            for json_path, boxes, unknown, error in pool.map(convert_one, tasks, chunksize=chunksize):
+                if error:
+                    failed.append((json_path, error))
+                    continue
+                box_count += boxes
+                unknown_counter.update(unknown)
+                converted.append(rel_of[json_path])
+    print(f"转换完成: {len(converted)} 个，共 {box_count} 个框，用时 {time.perf_counter() - start:.1f} 秒")
+
+    # 复制图片（只处理本次转换的 JSON 对应的图片）
+    copy_failed = set()
+    if COPY_IMAGES and converted:
+        pairs = []
+        rel_of_image = {}
+        for rel in converted:
+            image_rel = images.get(os.path.splitext(rel)[0])
+            if image_rel is None:
+                print(f"  ⚠ 找不到图片: {rel}")
+                continue
+            dst = os.path.join(image_dir, output_stem(rel) + os.path.splitext(image_rel)[1])
+            pairs.append((os.path.join(INPUT_ROOT, image_rel), dst))
+            rel_of_image[dst] = rel
+        func = (lambda pair: link_or_copy(*pair)) if LINK_IMAGES else (lambda pair: copy_file(*pair))
+        stats = FileOpExecutor().run(func, pairs)
+        for (src, dst), e in stats["errors"]:
+            print(f"  ✗ 图片{'链接' if LINK_IMAGES else '复制'}失败 {src}: {e}")
+            copy_failed.add(rel_of_image[dst])
+        print(f"图片: {stats['done'] - stats['failed']} 张")
+
+    # 图片复制失败的 JSON 不记入已完成，下次运行重新转换并复制
+    for rel in converted:
+        if rel not in copy_failed:
+            done_files[rel] = list(jsons[rel])
+    save_state(state_path, {"settings": settings, "files": done_files})
+
+    if unknown_counter:
+        print("\nlabel_name.txt 中没有的标签（已跳过）:")
+        for label, count in unknown_counter.most_common():
+            print(f"  {label}: {count}")
+    if failed:
+        print(f"\n转换失败 {len(failed)} 个:")
+        for json_path, error in failed[:50]:
+            print(f"  ✗ {json_path}: {error}")
+    print(f"\n标签目录: {label_dir}")
+    if COPY_IMAGES:
+        print(f"图片目录: {image_dir}")
+
+
+if __name__ == "__main__":
+    main()
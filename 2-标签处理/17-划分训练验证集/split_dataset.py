@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+训练 / 验证集划分（多标签分层 + 按拍摄分组）
+
+  - 标签来自 YOLO txt 的扫描缓存（common.annotations.LabelScanCache），未变化的 txt 不再重新读取
+  - 文件名按 GROUP_PATTERN 分组（默认 相机前缀 + 拍摄时间，如 G1_20250830191306412），
+    同一次拍摄的多张裁图只会进入同一个集合，避免近似重复图片跨集合泄漏
+  - 多标签迭代分层：每个分组按其包含的最稀有类别排序，依次分配给该类别缺口最大的集合，
+    使每个类别（以及无目标的负样本）在各集合中的比例接近 RATIOS
+  - 输出为文件列表（train.txt / val.txt，每行一个图片绝对路径），或硬链接出 <集合>/images|labels 目录树
+
+依赖：pip install numpy
+"""
+
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# 引入仓库根目录下的公共模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.annotations import LabelScanCache, read_label_names
+from common.fileops import FileOpExecutor
+from common.imageio import IMAGE_EXTS
+from common.sync import link_or_copy
+
+# ==================== 配置区域 ====================
+# 训练数据根目录（其下 images / labels）
+DATASET_ROOT = r"S:\train_data_yzh\747hingedata\F"
+
+# 参与划分的子文件夹（labels / images 下的文件夹名），为空则使用全部
+SOURCE_FOLDERS = ["train_20250909_F_new", "train_20250916_F", "train_20250918_F"]
+
+# 类别映射文件（可选，仅用于报告显示类别名）
+LABEL_MAPPING_FILE = r"S:\train_data_yzh\747hingedata\F\label_name.txt"
+
+# 各集合比例
+RATIOS = {"train": 0.8, "val": 0.2}
+
+# 分组规则：第一个捕获组相同的文件分到同一集合；不匹配的文件各自一组
+# 如只按相机前缀（A1_ / G1_）分组可改为 r"^([^_]+)_"
+GROUP_PATTERN = r"^([A-Za-z]+\d*_\d+)"
+
+# 随机种子（相同输入与种子得到相同划分）
+SEED = 0
+
+# 输出目录与方式: "list" -> 写出 <集合>.txt 图片列表, "link" -> 硬链接出 <集合>/images|labels 目录树
+OUTPUT_DIR = r"S:\train_data_yzh\747hingedata\F\split_20251016"
+OUTPUT_MODE = "list"
+# ==================== 配置区域结束 ====================
+
+
+def get_source_folders(label_root: str) -> List[str]:
+    all_folders = sorted(f for f in os.listdir(label_root) if os.path.isdir(os.path.join(label_root, f)))
+    if not SOURCE_FOLDERS:
+        return all_folders
+    for folder in SOURCE_FOLDERS:
+        if folder not in all_folders:
+            print(f"警告: 文件夹 \"{folder}\" 不存在")
+    return [f for f in SOURCE_FOLDERS if f in all_folders]
+
+
+def index_images(image_root: str) -> Dict[str, str]:
+    """{不含扩展名的相对路径: 图片相对路径}"""
+    images: Dict[str, str] = {}
+    for dirpath, _, filenames in os.walk(image_root):
+        rel_dir = os.path.relpath(dirpath, image_root)
+        for name in filenames:
+            stem, ext = os.path.splitext(name)
+            if ext.lower() in IMAGE_EXTS:
+                rel = name if rel_dir == "." else os.path.join(rel_dir, name)
+                images.setdefault(os.path.join(os.path.dirname(rel), stem), rel)
+    return images
+
+
+def load_label_matrix(label_root: str, folders: List[str]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    读取各文件夹的标签（使用扫描缓存）
+
+    Returns:
+        (标签文件相对路径列表, 每个 (文件序号, 类别编号) 标注的文件序号数组, 对应的类别编号数组)
+    """
+    rels: List[str] = []
+    file_idx: List[int] = []
+    class_ids: List[int] = []
+    for folder in folders:
+        cache = LabelScanCache(os.path.join(label_root, folder), "txt")
+        labels, reread = cache.scan()
+        cache.save()
+        print(f"  {folder}: {len(labels)} 个 txt（重新读取 {reread} 个）")
+        for rel in sorted(labels):
+            ids = [i for i in labels[rel] if i >= 0]
+            file_idx.extend([len(rels)] * len(ids))
+            class_ids.extend(ids)
+            rels.append(f"{folder}/{rel}")
+    return rels, np.array(file_idx, dtype=np.int64), np.array(class_ids, dtype=np.int64)
+
+
+def group_keys(rels: List[str]) -> List[str]:
+    pattern = re.compile(GROUP_PATTERN)
+    keys = []
+    for rel in rels:
+        name = os.path.basename(rel)
+        match = pattern.match(name)
+        keys.append(match.group(1) if match else rel)
+    return keys
+
+
+def stratified_split(group_of_file: np.ndarray, file_idx: np.ndarray, class_ids: np.ndarray,
+                     ratios: np.ndarray, seed: int) -> np.ndarray:
+    """
+    多标签迭代分层划分（按分组整体分配）
+
+    Args:
+        group_of_file: 每个文件所属分组编号
+        file_idx / class_ids: 每条标注的文件序号与类别编号
+        ratios: 各集合比例（和为 1）
+
+    Returns:
+        每个文件分配到的集合序号
+    """
+    num_groups = int(group_of_file.max()) + 1
+    num_classes = int(class_ids.max()) + 1 if class_ids.size else 0
+    background = num_classes  # 无目标文件计为一个额外类别
+
+    # 分组 x 类别 的含该类别的文件数（每个文件每个类别只计一次）
+    pairs = np.unique(file_idx * (num_classes + 1) + class_ids) if class_ids.size else np.empty(0, np.int64)
+    pair_files, pair_classes = np.divmod(pairs, num_classes + 1)
+    has_label = np.zeros(len(group_of_file), dtype=bool)
+    has_label[pair_files] = True
+    empty_files = np.flatnonzero(~has_label)
+    cells = np.concatenate([group_of_file[pair_files] * (num_classes + 1) + pair_classes,
+                            group_of_file[empty_files] * (num_classes + 1) + background])
+    matrix = np.bincount(cells, minlength=num_groups * (num_classes + 1)).reshape(num_groups, num_classes + 1)
+    group_sizes = np.bincount(group_of_file, minlength=num_groups)
+
+    # 每个分组按其最稀有类别排序（越稀有越先分配），同等稀有度随机打乱
+    totals = matrix.sum(axis=0)
+    rarity = np.where(matrix > 0, totals[None, :], np.iinfo(np.int64).max)
+    rarest = rarity.argmin(axis=1)
+    rng = np.random.default_rng(seed)
+    order = np.lexsort((rng.random(num_groups), totals[rarest]))
+
+    demand = ratios[:, None] * totals[None, :].astype(np.float64)
+    size_demand = ratios * len(group_of_file)
+    assignment = np.empty(num_groups, dtype=np.int64)
+    for g in order:
+        need = demand[:, rarest[g]]
+        candidates = np.flatnonzero(need == need.max())
+        split = candidates[np.argmax(size_demand[candidates])] if len(candidates) > 1 else candidates[0]
+        assignment[g] = split
+        demand[split] -= matrix[g]
+        size_demand[split] -= group_sizes[g]
+    return assignment[group_of_file]
+
+
+def print_report(split_names: List[str], file_split: np.ndarray, file_idx: np.ndarray, class_ids: np.ndarray,
+                 names: Dict[int, str]) -> None:
+    """打印各集合的文件数与各类别（含该类别的文件数）分布"""
+    num_splits = len(split_names)
+    counts = np.bincount(file_split, minlength=num_splits)
+    print("\n各集合文件数:")
+    for i, name in enumerate(split_names):
+        print(f"  {name}: {counts[i]} ({counts[i] / max(1, counts.sum()):.1%})")
+    if not class_ids.size:
+        return
+    num_classes = int(class_ids.max()) + 1
+    pairs = np.unique(file_idx * num_classes + class_ids)
+    pair_files, pair_classes = np.divmod(pairs, num_classes)
+    table = np.bincount(file_split[pair_files] * num_classes + pair_classes,
+                        minlength=num_splits * num_classes).reshape(num_splits, num_classes)
+    header = "".join(f"{name:>14}" for name in split_names)
+    print(f"\n{'类别':<16}{header}")
+    for cls in range(num_classes):
+        total = table[:, cls].sum()
+        if not total:
+            continue
+        cells = "".join(f"{table[i, cls]:>7} ({table[i, cls] / total:>4.0%})" for i in range(num_splits))
+        print(f"  {names.get(cls, str(cls)):<14}{cells}")
+
+
+def main():
+    print("训练 / 验证集划分")
+    print("=" * 50)
+    label_root = os.path.join(DATASET_ROOT, "labels")
+    image_root = os.path.join(DATASET_ROOT, "images")
+    if not os.path.isdir(label_root):
+        print(f"错误：标签目录不存在: {label_root}")
+        return
+    if OUTPUT_MODE not in ("list", "link"):
+        print(f"错误：未知输出方式: {OUTPUT_MODE}")
+        return
+    names = read_label_names(LABEL_MAPPING_FILE) if LABEL_MAPPING_FILE and os.path.isfile(LABEL_MAPPING_FILE) else {}
+
+    start = time.perf_counter()
+    folders = get_source_folders(label_root)
+    rels, file_idx, class_ids = load_label_matrix(label_root, folders)
+    images = {}
+    for folder in folders:
+        for stem, rel in index_images(os.path.join(image_root, folder)).items():
+            images[os.path.join(folder, stem).replace("\\", "/")] = f"{folder}/{rel}".replace("\\", "/")
+    print(f"标签文件: {len(rels)} 个  图片: {len(images)} 张（读取 {time.perf_counter() - start:.1f} 秒）")
+    if not rels:
+        return
+
+    # 只保留有对应图片的标签文件
+    image_rels = [images.get(os.path.splitext(rel)[0]) for rel in rels]
+    missing = sum(1 for r in image_rels if r is None)
+    if missing:
+        print(f"警告: {missing} 个标签文件找不到对应图片，已排除")
+        keep = np.array([r is not None for r in image_rels])
+        remap = np.cumsum(keep) - 1
+        annotation_keep = keep[file_idx]
+        file_idx, class_ids = remap[file_idx[annotation_keep]], class_ids[annotation_keep]
+        rels = [r for r, k in zip(rels, keep) if k]
+        image_rels = [r for r in image_rels if r is not None]
+
+    start = time.perf_counter()
+    keys = group_keys(rels)
+    group_index: Dict[str, int] = {}
+    group_of_file = np.array([group_index.setdefault(key, len(group_index)) for key in keys], dtype=np.int64)
+    split_names = list(RATIOS)
+    ratios = np.array([RATIOS[name] for name in split_names], dtype=np.float64)
+    ratios /= ratios.sum()
+    file_split = stratified_split(group_of_file, file_idx, class_ids, ratios, SEED)
+    print(f"分组: {len(group_index)} 个，划分用时 {time.perf_counter() - start:.2f} 秒")
+    print_report(split_names, file_split, file_idx, class_ids, names)
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    if OUTPUT_MODE == "list":
+        for i, name in enumerate(split_names):
+            list_path = os.path.join(OUTPUT_DIR, f"{name}.txt")
+            with open(list_path, "w", encoding="utf-8") as f:
+                for idx in np.flatnonzero(file_split == i):
+                    f.write(os.path.normpath(os.path.join(image_root, image_rels[idx])) + "\n")
+            print(f"已写出: {list_path}")
+        return
+
+    pairs = []
+    for idx, (label_rel, image_rel) in enumerate(zip(rels, image_rels)):
+        split_dir = os.path.join(OUTPUT_DIR, split_names[file_split[idx]])
+        pairs.append((os.path.join(label_root, label_rel), os.path.join(split_dir, "labels", label_rel)))
+        pairs.append((os.path.join(image_root, image_rel), os.path.join(split_dir, "images", image_rel)))
+
+    # 删除上次划分留下、本次不属于该集合的文件
+    planned = {os.path.normcase(os.path.abspath(dst)) for _, dst in pairs}
+    removed = 0
+    for name in split_names:
+        for dirpath, _, filenames in os.walk(os.path.join(OUTPUT_DIR, name)):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                if os.path.normcase(os.path.abspath(path)) not in planned:
+                    os.remove(path)
+                    removed += 1
+    if removed:
+        print(f"已删除上次划分的过期文件: {removed} 个")
+
+    stats = FileOpExecutor().run(lambda pair: link_or_copy(*pair), pairs)
+    for (src, _), e in stats["errors"]:
+        print(f"  ✗ 链接失败 {src}: {e}")
+    print(f"已链接 {stats['done'] - stats['failed']} 个文件到 {OUTPUT_DIR}（用时 {stats['elapsed']:.1f} 秒）")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,72 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+复制标注数据并给标签添加工位后缀（B747 Hinge）
+
+遍历源目录下所有 LabelMe JSON，按 imagePath 找到同目录下的图片，把 JSON 与图片按原相对路径复制到新目录；
+图片名前两位（工位，如 B1、G3）不在 NO_SUFFIX_PREFIXES 中时，给每个 shapes[*].label 加上该后缀（划伤 -> 划伤B1）。
+
+JSON 只顺序扫描一遍，定位 shapes[*].label 与 imagePath 后原位替换，其余内容（缩进、键顺序、imageData）逐字保留；
+不再对整段文本做正则替换与全局 str.replace（会误改 flags 等其他位置的 "label"，也会反复扫描内嵌的 base64）。
+文件按线程池并发处理，JSON 与图片都先写入临时文件再重命名，中断时目标目录不会留下写了一半的文件。
+"""
+
 import os
 import shutil
-import re
+import sys
+from pathlib import Path
+
+# 引入仓库根目录下的公共模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.annotations import rewrite_labelme_bytes, scan_labelme_spans
+from common.discovery import list_files
+from common.fileops import DEFAULT_WORKERS, FileOpExecutor
+from common.progress import ProgressReporter
+
+# ==================== 配置区域 ====================
+# 指定要遍历的文件夹路径
+SOURCE_FOLDER = r'Y:\2_标注数据\2025-08-04领益 东莞  B747 Hinge AOI 改造C241104\20251016_未抓取'
+# 指定新的文件夹路径
+NEW_FOLDER = r'Y:\4_训练数据\2025-08-04领益 东莞  B747 Hinge AOI 改造C241104\round2\先转数据\20251016\20251016_未抓取'
+
+# 这些工位的标签保持原样，不添加后缀
+NO_SUFFIX_PREFIXES = ['A1', 'C1', 'D1', 'H1', 'I1', 'J1', 'L1', 'L2', 'L3', 'M1', 'E1', 'E2', 'E3', 'E4', 'F1', 'F2']
+
+# 并发处理的线程数（网络盘上主要耗时在往返延迟，可远大于 CPU 核数）
+WORKERS = DEFAULT_WORKERS
+
+# 逐文件打印复制信息；默认只显示单行汇总进度
+VERBOSE = False
+# 逐文件复制结果写入 JSON Lines 日志（追加）；为空则不写
+LOG_JSONL = ""
+# ================== 配置区域结束 ==================
+
+
+def atomic_write_bytes(path, data):
+    """先写临时文件再重命名"""
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_copy(src, dst):
+    """复制到临时文件再重命名（保留元数据）；src 不存在时抛出 FileNotFoundError 且不产生目标文件"""
+    tmp_path = dst + ".tmp"
+    try:
+        shutil.copy2(src, tmp_path)
+        os.replace(tmp_path, dst)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def ensure_dirs(folders, created_dirs=None):
+    """创建目标目录；created_dirs 记录已创建的目录，同一目录只调用一次 makedirs（网络盘上每次都是一次往返）"""
+    for folder in folders:
+        if created_dirs is None or folder not in created_dirs:
+            os.makedirs(folder, exist_ok=True)
+            if created_dirs is not None:
+                created_dirs.add(folder)
+
 
-def copy_files_with_modified_tags(source_folder, new_folder):
+def copy_annotated_pair(source_folder, new_folder, rel_json, reporter=None, created_dirs=None):
+    """
+    复制一对 JSON + 图片并改写标签
+
+    目标目录在图片第一次复制成功时才创建（先直接复制，目录不存在时再创建并重试），
+    图片缺失而跳过的 JSON 不会留下空目录
+
+    Returns:
+        写入的 JSON 字节数；JSON 没有 imagePath 或图片不存在时返回 None（跳过）
+    """
+    json_file_path = os.path.join(source_folder, rel_json)
+    root, file = os.path.split(json_file_path)
+    with open(json_file_path, 'rb') as f:
+        content = f.read()
+
+    spans = scan_labelme_spans(content)
+    if spans.image_path is None or not spans.image_path[0]:
+        return None
+    image_file_name = spans.image_path[0]
+    image_file_path = os.path.join(root, image_file_name)
+
+    # 计算相对路径，保持树状结构
+    target_folder = os.path.join(new_folder, os.path.dirname(rel_json))
+
+    # 提取图片名字的前两个字符
+    prefix = os.path.splitext(os.path.basename(image_file_name))[0][:2]
+
+    # 新的 JSON / 图片文件名，这里不添加前缀
+    new_json_path = os.path.join(target_folder, file)
+    new_image_name = image_file_name
+    new_image_path = os.path.join(target_folder, new_image_name)
+
+    relabel = None
+    if prefix not in NO_SUFFIX_PREFIXES:
+        relabel = lambda label: label + prefix if label else label
+    new_content, changed = rewrite_labelme_bytes(content, spans, relabel, new_image_name)
+
+    # 先复制图片：图片不存在时直接跳过，不写 JSON；目标目录不存在时创建后重试
+    try:
+        atomic_copy(image_file_path, new_image_path)
+    except FileNotFoundError:
+        if not os.path.isfile(image_file_path):
+            if reporter is not None:
+                reporter.detail(f"跳过 {json_file_path}：图片不存在 {image_file_path}",
+                                event="missing_image", json=json_file_path, image=image_file_path)
+            return None
+        ensure_dirs({target_folder, os.path.dirname(new_image_path)}, created_dirs)
+        atomic_copy(image_file_path, new_image_path)
+    ensure_dirs({target_folder}, created_dirs)
+    atomic_write_bytes(new_json_path, new_content)
+
+    if reporter is not None:
+        reporter.detail(f"复制文件 {json_file_path} 到 {new_json_path}")
+        reporter.detail(f"复制文件 {image_file_path} 到 {new_image_path}",
+                        event="copied", json=json_file_path, image=image_file_path, labels=changed)
+    return len(new_content)
+
+
+def copy_files_with_modified_tags(source_folder, new_folder, reporter=None, max_workers=None):
+    reporter = reporter or ProgressReporter("复制标注", verbose=VERBOSE, log_path=LOG_JSONL)
     # 确保新文件夹存在
     os.makedirs(new_folder, exist_ok=True)
-    # 遍历指定文件夹中的所有文件
-    for root, dirs, files in os.walk(source_folder):
-        for file in files:
-            if file.endswith('.json'):
-                json_file_path = os.path.join(root, file)
-                try:
-                    # 读取JSON文件内容
-                    with open(json_file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-
-                    # 假设JSON文件中有一个指向图片文件的字段，这里简单查找图片文件名
-                    image_pattern = r'"imagePath": "([^"]+)"'
-                    matches = re.findall(image_pattern, content)
-                    if matches:
-                        image_file_name = matches[0]
-                        image_file_path = os.path.join(root, image_file_name)
-
-                        if os.path.exists(image_file_path):
-                            # 计算相对路径，保持树状结构
-                            relative_path = os.path.relpath(root, source_folder)
-                            target_folder = os.path.join(new_folder, relative_path)
-                            
-                            # 确保目标文件夹存在
-                            os.makedirs(target_folder, exist_ok=True)
-                            
-                            # 提取图片名字的前两个字符
-                            prefix = os.path.splitext(os.path.basename(image_file_name))[0][:2]
-
-                            # 生成新的JSON文件名，这里不添加前缀
-                            new_json_name = file
-                            new_json_path = os.path.join(target_folder, new_json_name)
-
-                            # 生成新的图片文件名，这里不添加前缀
-                            new_image_name = image_file_name
-                            new_image_path = os.path.join(target_folder, new_image_name)
-
-                            if prefix not in ['A1', 'C1', 'D1', 'H1', 'I1', 'J1', 'L1', 'L2', 'L3', 'M1', 'E1', 'E2', 'E3', 'E4', 'F1', 'F2']:
-                                # 假设标注数据的标签格式为 "label": "xxx"，这里查找并添加前缀
-                                label_pattern = r'("label": ")([^"]+)(")'
-                                new_content = re.sub(label_pattern, lambda match: match.group(1) + match.group(2) + prefix + match.group(3), content)
-                            else:
-                                new_content = content
-
-                            # 修改图片路径引用
-                            new_content = new_content.replace(file, new_json_name).replace(image_file_name, new_image_name)
-
-                            # 写入新的JSON文件
-                            with open(new_json_path, 'w', encoding='utf-8') as f:
-                                f.write(new_content)
-
-                            # 复制图片文件
-                            shutil.copy2(image_file_path, new_image_path)
-
-                            print(f"复制文件 {json_file_path} 到 {new_json_path}")
-                            print(f"复制文件 {image_file_path} 到 {new_image_path}")
-
-                except Exception as e:
-                    print(f"处理文件 {json_file_path} 时出错: {e}")
+
+    # 并发列出所有 JSON；新文件夹位于源文件夹内时跳过新文件夹
+    json_files = sorted(list_files(source_folder, lambda name: name.endswith('.json')))
+    inner = os.path.relpath(os.path.abspath(new_folder), os.path.abspath(source_folder)).replace(os.sep, "/")
+    if inner != "." and not inner.startswith(".."):
+        json_files = [rel for rel in json_files if not rel.startswith(inner + "/")]
+    reporter.add_total(len(json_files))
+    created_dirs = set()
+
+    def task(rel_json):
+        try:
+            nbytes = copy_annotated_pair(source_folder, new_folder, rel_json, reporter, created_dirs)
+        except Exception as e:
+            json_file_path = os.path.join(source_folder, rel_json)
+            reporter.warn(f"处理文件 {json_file_path} 时出错: {e}", event="error", path=json_file_path,
+                          error=str(e))
+            reporter.update(failed=True)
+            return 0
+        reporter.update(nbytes=nbytes or 0)
+        return nbytes
+
+    FileOpExecutor(max_workers or WORKERS).run(task, json_files)
+    return reporter.close()
+
 
 if __name__ == "__main__":
-    # 指定要遍历的文件夹路径
-    source_folder = r'Y:\2_标注数据\2025-08-04领益 东莞  B747 Hinge AOI 改造C241104\20251016_未抓取'
-    # 指定新的文件夹路径
-    new_folder = r'Y:\4_训练数据\2025-08-04领益 东莞  B747 Hinge AOI 改造C241104\round2\先转数据\20251016\20251016_未抓取'
-    copy_files_with_modified_tags(source_folder, new_folder)
\ No newline at end of file
+    copy_files_with_modified_tags(SOURCE_FOLDER, NEW_FOLDER)
@@ -7,19 +7,26 @@ JSON标签修改脚本 - 简化版
 """
 
 import os
+import sys
 import json
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+# 引入仓库根目录下的公共模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.progress import ProgressReporter
 
 
 class LabelChanger:
-    def __init__(self, original_labels: List[str], new_labels: List[str]):
+    def __init__(self, original_labels: List[str], new_labels: List[str],
+                 reporter: Optional[ProgressReporter] = None):
         """
         初始化标签修改器
         
         Args:
             original_labels: 原始标签列表
             new_labels: 新标签列表
+            reporter: 进度与日志输出；为空时只显示汇总进度，不打印逐文件信息
         """
         if len(original_labels) != len(new_labels):
             raise ValueError("原始标签和新标签的数量必须相同")
@@ -27,6 +34,7 @@ class LabelChanger:
         self.original_labels = original_labels
         self.new_labels = new_labels
         self.label_mapping = dict(zip(original_labels, new_labels))
+        self.reporter = reporter or ProgressReporter("修改标签")
         
         print("标签映射关系:")
         for orig, new in self.label_mapping.items():
@@ -49,7 +57,7 @@ class LabelChanger:
             
             # 检查是否有shapes字段
             if 'shapes' not in data:
-                print(f"警告: {json_file_path} 中没有找到shapes字段")
+                self.reporter.warn(f"警告: {json_file_path} 中没有找到shapes字段", event="no_shapes", path=json_file_path)
                 return (False, 0, False)  # 没有shapes字段，不算错误
             
             changed_count = 0
@@ -61,20 +69,22 @@ class LabelChanger:
                         new_label = self.label_mapping[old_label]
                         shape['label'] = new_label
                         changed_count += 1
-                        print(f"  修改标签: {old_label} -> {new_label}")
+                        self.reporter.detail(f"  修改标签: {old_label} -> {new_label}")
             
             if changed_count > 0:
                 # 写回JSON文件
                 with open(json_file_path, 'w', encoding='utf-8') as f:
                     json.dump(data, f, ensure_ascii=False, indent=2)
-                print(f"成功修改 {json_file_path}，共修改 {changed_count} 个标签")
+                self.reporter.detail(f"成功修改 {json_file_path}，共修改 {changed_count} 个标签",
+                                     event="changed", path=json_file_path, labels=changed_count)
                 return (True, changed_count, False)  # 成功修改
             else:
-                print(f"文件 {json_file_path} 中没有需要修改的标签")
+                self.reporter.detail(f"文件 {json_file_path} 中没有需要修改的标签")
                 return (False, 0, False)  # 没有标签修改，不算错误
                 
         except Exception as e:
-            print(f"处理文件 {json_file_path} 时出错: {e}")
+            self.reporter.warn(f"处理文件 {json_file_path} 时出错: {e}", event="error", path=json_file_path,
+                               error=str(e))
             return (False, 0, True)  # 处理出错
     
     def process_folder(self, folder_path: str) -> Dict[str, int]:
@@ -104,24 +114,26 @@ class LabelChanger:
             'failed_changes': 0         # 处理失败的文件数量
         }
         
-        print(f"\n开始处理文件夹: {folder_path}")
+        self.reporter.detail(f"\n开始处理文件夹: {folder_path}")
         
         # 查找所有JSON文件
         json_files = list(folder_path.glob("*.json"))
         stats['total_files'] = len(json_files)
         
         if not json_files:
-            print(f"在 {folder_path} 中没有找到JSON文件")
+            self.reporter.detail(f"在 {folder_path} 中没有找到JSON文件")
             return stats
         
-        print(f"找到 {len(json_files)} 个JSON文件")
+        self.reporter.detail(f"找到 {len(json_files)} 个JSON文件")
+        self.reporter.add_total(len(json_files))
         
         # 处理每个JSON文件
         for json_file in json_files:
             stats['processed_files'] += 1
-            print(f"\n处理文件: {json_file.name}")
+            self.reporter.detail(f"\n处理文件: {json_file.name}")
             
             success, labels_changed, has_error = self.change_labels_in_json(str(json_file))
+            self.reporter.update(failed=has_error)
             
             if has_error:
                 stats['failed_changes'] += 1
@@ -153,14 +165,14 @@ class LabelChanger:
                         # 检查当前文件夹是否是目标文件夹
                         if item.name in target_folder_names:
                             found_folders.append(item)
-                            print(f"找到目标文件夹: {item}")
+                            self.reporter.detail(f"找到目标文件夹: {item}")
                         
                         # 递归搜索子文件夹
                         search_recursive(item)
             except PermissionError:
-                print(f"警告: 无法访问文件夹 {current_path} (权限不足)")
+                self.reporter.warn(f"警告: 无法访问文件夹 {current_path} (权限不足)")
             except Exception as e:
-                print(f"警告: 搜索文件夹 {current_path} 时出错: {e}")
+                self.reporter.warn(f"警告: 搜索文件夹 {current_path} 时出错: {e}")
         
         print(f"开始深度搜索目标文件夹: {target_folder_names}")
         search_recursive(root_path)
@@ -215,14 +227,15 @@ class LabelChanger:
         # 处理每个找到的目标文件夹
         for folder_path in found_folders:
             folder_name = folder_path.name
-            print(f"\n{'='*50}")
-            print(f"处理文件夹: {folder_name} (路径: {folder_path})")
-            print(f"{'='*50}")
+            self.reporter.detail(f"\n{'='*50}")
+            self.reporter.detail(f"处理文件夹: {folder_name} (路径: {folder_path})")
+            self.reporter.detail(f"{'='*50}")
             
             stats = self.process_folder(str(folder_path))
             overall_stats['folder_stats'][folder_name] = stats
             overall_stats['processed_folders'] += 1
         
+        self.reporter.close()
         return overall_stats
 
 
@@ -403,6 +416,11 @@ def main():
     # target_folders = ["F1","F2"]  # 例如：["A1", "B1", "C1"]
     # target_folders = ["F1"]  # 例如：["A1", "B1", "C1"]
     target_folders = ["G1","G2","G3","G4","G5","G6"]  # 例如：["A1", "B1", "C1"]
+    
+    # 逐文件打印修改详情；默认只显示单行汇总进度（数量、速率、预计剩余时间）
+    VERBOSE = False
+    # 逐文件修改结果写入 JSON Lines 日志（追加）；为空则不写
+    LOG_JSONL = ""
     # ================================================
     
     print("JSON标签修改工具 - 简化版")
@@ -418,7 +436,8 @@ def main():
     
     # 创建标签修改器
     try:
-        changer = LabelChanger(original_labels, new_labels)
+        changer = LabelChanger(original_labels, new_labels,
+                               ProgressReporter("修改标签", verbose=VERBOSE, log_path=LOG_JSONL))
     except ValueError as e:
         print(f"错误: {e}")
         input("按回车键退出...")
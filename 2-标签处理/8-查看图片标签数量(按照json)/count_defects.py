@@ -3,9 +3,15 @@
 
 import json
 import os
+import sys
 from collections import Counter, defaultdict
+from pathlib import Path
 from typing import Dict, Iterable, List, Optional, Set, Tuple
 
+# 引入仓库根目录下的公共模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common import profiling
+
 # =========================
 # 配置区：在此直接修改参数
 # =========================
@@ -91,6 +97,10 @@ IMAGE_EXTS: Optional[List[str]] = None
 # 默认图片后缀
 IMAGE_EXTS_DEFAULT = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff"}
 
+# 分阶段计时：结束时打印遍历 / 解析各阶段的耗时；PROFILE_TRACE 非空时同时输出 Chrome trace JSON
+PROFILE = False
+PROFILE_TRACE = ""
+
 
 def normalize_label(label: str) -> str:
 	return (label or "").strip()
@@ -149,9 +159,11 @@ def process_single_directory(root_dir: str, image_exts: Set[str]) -> Tuple[Count
 	json_total = 0
 	pairs_with_image = 0
 
-	for image_path, json_path in iter_pairs(root_dir, image_exts):
+	for image_path, json_path in profiling.timed_iter("遍历目录", iter_pairs(root_dir, image_exts)):
 		json_total += 1
-		labels = read_labels(json_path)
+		with profiling.stage("解析JSON"):
+			labels = read_labels(json_path)
+		profiling.count("JSON")
 		if not labels:
 			continue
 		files_total += 1
@@ -165,6 +177,8 @@ def process_single_directory(root_dir: str, image_exts: Set[str]) -> Tuple[Count
 
 
 def main() -> None:
+	if PROFILE:
+		profiling.enable(trace_path=PROFILE_TRACE)
 	image_exts = (
 		{ext.lower() if ext.startswith(".") else f".{ext.lower()}" for ext in IMAGE_EXTS}
 		if IMAGE_EXTS else set(IMAGE_EXTS_DEFAULT)
@@ -3,9 +3,17 @@
 
 import os
 import re
+import sys
 import shutil
 from datetime import datetime
-from typing import List, Tuple
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# 引入仓库根目录下的公共模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.checksum import ChecksumManifest, copytree_verified
+from common.discovery import LayoutIndex, find_matching_dirs
+from common.sync import format_sync_summary, merge_summary, sync_tree
 
 # =========================
 # 配置区：在此直接修改参数
@@ -30,35 +38,53 @@ RECURSIVE = True
 # FOLDER_NAME_PATTERN = re.compile(r"^[A-Z][0-9]$")
 FOLDER_NAME_PATTERN = re.compile(r"^[A-Z]$")
 
+# 最大查找深度（1 表示只看第一层子目录；None 不限制）。RECURSIVE=False 时固定为 1
+MAX_DEPTH = None
+
+# 找到匹配的文件夹后不再进入其内部查找（默认关闭，保持嵌套的同名工位目录也各自输出到 日期/匹配名）
+# 确认匹配目录内不会再嵌套匹配目录时可开启，省去遍历大量图片目录
+STOP_AT_MATCH = False
+
+# 目录结构索引缓存：记录各目录的子目录列表，再次运行时目录未变化就不再重新列出（网络盘上明显加快）
+# 设为 None 关闭缓存
+LAYOUT_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "_layout_index.json")
+
 # 演练模式（不实际复制，只打印计划）
 DRY_RUN = False
 
+# 复制时同时计算校验和，写入日期目录下的 _checksums.json（可用 22-校验复制结果 校验）
+# 增量同步跳过的文件与硬链接的文件也会写入清单（优先沿用已有记录，没有时读取文件计算）
+VERIFY_CHECKSUM = False
+
+# 增量同步：只复制新增或有变化（大小 / 修改时间不同）的文件，未变化的跳过
+DELTA_SYNC = True
+
+# 增量同步时改用内容哈希判断是否变化（需读取两侧文件，较慢但不依赖修改时间）
+DELTA_COMPARE_HASH = False
+
+# 增量同步时参考最近一次的日期目录：未变化的文件直接硬链接过来，不再传输（同 rsync --link-dest）
+# 注意：硬链接的两个路径是同一份数据，之后若在原位修改其中一个文件（如直接编辑保存标注 JSON、覆盖写图片），
+# 另一天的目录中的文件也会一起变化。只有各日期目录都不会被原位修改时才开启
+LINK_PREVIOUS_DAY = False
+
 
 def ensure_dir(path: str) -> None:
 	if not os.path.isdir(path):
 		os.makedirs(path, exist_ok=True)
 
 
-def list_prefixed_dirs(root: str, recursive: bool) -> List[str]:
+def list_prefixed_dirs(root: str, recursive: bool, index: Optional[LayoutIndex] = None) -> List[str]:
 	"""
 	在 root 下查找名称匹配规则的目录，返回匹配目录的绝对路径列表。
+	按 MAX_DEPTH / STOP_AT_MATCH 限制查找范围，各一级子目录并发遍历。
 	"""
-	root_abs = os.path.abspath(root)
-	matches: List[str] = []
-	if recursive:
-		for dirpath, dirnames, _ in os.walk(root_abs):
-			for d in dirnames:
-				if FOLDER_NAME_PATTERN.match(d):
-					matches.append(os.path.join(dirpath, d))
-	else:
-		try:
-			for d in os.listdir(root_abs):
-				full = os.path.join(root_abs, d)
-				if os.path.isdir(full) and FOLDER_NAME_PATTERN.match(d):
-					matches.append(full)
-		except FileNotFoundError:
-			pass
-	return matches
+	return find_matching_dirs(
+		root,
+		lambda name: FOLDER_NAME_PATTERN.match(name) is not None,
+		descend_into_matches=not STOP_AT_MATCH,
+		max_depth=MAX_DEPTH if recursive else 1,
+		index=index,
+	)
 
 
 def compute_date_dst_dir(base_out_root: str, match_dir: str) -> str:
@@ -70,13 +96,43 @@ def compute_date_dst_dir(base_out_root: str, match_dir: str) -> str:
 	return dst_dir
 
 
-def copy_directory(src_dir: str, dst_dir: str, dry_run: bool) -> None:
+def find_previous_date_dir(base_out_root: str, date_str: str) -> Optional[str]:
+	"""
+	在 OUT_ROOT 下查找早于 date_str 的最近一个日期目录（YYYYMMDD），没有则返回 None
+	"""
+	try:
+		names = [d for d in os.listdir(base_out_root) if re.match(r"^\d{8}$", d) and d < date_str]
+	except FileNotFoundError:
+		return None
+	names = [d for d in names if os.path.isdir(os.path.join(base_out_root, d))]
+	return os.path.join(base_out_root, max(names)) if names else None
+
+
+def copy_directory(src_dir: str, dst_dir: str, dry_run: bool, manifest: Optional[ChecksumManifest] = None,
+				   link_dest: Optional[str] = None,
+				   link_manifest: Optional[ChecksumManifest] = None) -> Optional[Dict[str, Any]]:
+	"""
+	复制目录（合并覆盖）；DELTA_SYNC 时只传输有变化的文件，返回同步统计
+	"""
 	if dry_run:
 		print(f"[DRY-RUN] 复制目录(合并覆盖): {src_dir} -> {dst_dir}")
-		return
+		return None
 	ensure_dir(os.path.dirname(dst_dir))
+	if DELTA_SYNC:
+		summary = sync_tree(src_dir, dst_dir, compare_hash=DELTA_COMPARE_HASH,
+							link_dest=link_dest, manifest=manifest, link_manifest=link_manifest)
+		for (_, (src, _, _)), e in summary["errors"]:
+			print(f"      复制失败 {src}: {e}")
+		print(f"      {format_sync_summary(summary)}")
+		return summary
 	# 始终合并覆盖
-	shutil.copytree(src_dir, dst_dir, dirs_exist_ok=True)
+	if manifest is not None:
+		stats = copytree_verified(src_dir, dst_dir, manifest=manifest)
+		for (src, _), e in stats["errors"]:
+			print(f"      复制失败 {src}: {e}")
+	else:
+		shutil.copytree(src_dir, dst_dir, dirs_exist_ok=True)
+	return None
 
 
 def main() -> None:
@@ -86,22 +142,44 @@ def main() -> None:
 	ensure_dir(out_root)
 
 	print(f"输出日期目录: {out_root}")
-	print(f"递归查找: {RECURSIVE}  演练: {DRY_RUN}")
+	print(f"递归查找: {RECURSIVE}  演练: {DRY_RUN}  增量同步: {DELTA_SYNC}")
+
+	previous_root = find_previous_date_dir(os.path.abspath(OUT_ROOT), date_str) if DELTA_SYNC and LINK_PREVIOUS_DAY else None
+	if previous_root:
+		print(f"参考目录(未变化文件硬链接): {previous_root}")
+
+	manifest = ChecksumManifest(out_root) if VERIFY_CHECKSUM and not DRY_RUN else None
+	# 参考目录的清单：硬链接的文件沿用其中的哈希，不再重新读取
+	link_manifest = ChecksumManifest(previous_root) if manifest is not None and previous_root else None
+	index = LayoutIndex(LAYOUT_INDEX_PATH) if LAYOUT_INDEX_PATH else None
 
 	total_matches = 0
+	sync_total: Dict[str, Any] = {}
 	for src_root in ROOT_DIRS:
 		src_root_abs = os.path.abspath(src_root)
 		print(f"\n源根目录: {src_root_abs}")
-		matches = list_prefixed_dirs(src_root_abs, RECURSIVE)
+		matches = list_prefixed_dirs(src_root_abs, RECURSIVE, index)
 		print(f"  匹配数量: {len(matches)}")
 		for m in sorted(matches):
 			dst = compute_date_dst_dir(out_root, m)
 			print(f"    {m} -> {dst}")
-			copy_directory(m, dst, DRY_RUN)
+			link_dest = os.path.join(previous_root, os.path.basename(dst)) if previous_root else None
+			summary = copy_directory(m, dst, DRY_RUN, manifest, link_dest, link_manifest)
+			if summary is not None:
+				merge_summary(sync_total, summary)
 			total_matches += 1
 
+	if index is not None:
+		index.save()
+
+	if manifest is not None:
+		manifest.save()
+		print(f"校验清单: {manifest.path}")
+
 	print("\n—— 完成 ——")
 	print(f"共复制目录数: {total_matches}")
+	if sync_total:
+		print(f"增量同步: {format_sync_summary(sync_total)}")
 
 
 if __name__ == "__main__":
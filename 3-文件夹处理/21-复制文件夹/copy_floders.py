@@ -2,9 +2,16 @@
 # -*- coding: utf-8 -*- 
 
 import os
+import sys
 import shutil
 from pathlib import Path
 
+# 引入仓库根目录下的公共模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.checksum import MANIFEST_NAME, ChecksumManifest, copytree_verified
+from common.discovery import find_matching_dirs
+from common.sync import format_sync_summary, sync_tree
+
 # ==================== 配置区域 ====================
 # 在这里修改你的路径配置
 
@@ -27,6 +34,14 @@ TARGET_PATH = r"Y:\2_标注数据\2025-04-03领益 东莞  B25 SIM tool 卡针
 # FOLDER_PREFIXES = ["F1", "F2"]  # 可以修改为多个你需要的前缀
 FOLDER_PREFIXES = ["G1", "G2", "G3", "G4"]  # 可以修改为多个你需要的前缀
 
+# 是否在复制时计算校验和（边复制边计算哈希，每个目标文件夹下生成 _checksums.json，
+# 之后可用 3-文件夹处理/22-校验复制结果 快速校验）
+VERIFY_CHECKSUM = False
+
+# 合并同步模式：目标文件夹已存在时不删除重拷，只复制新增或有变化（大小 / 修改时间不同）的文件
+# False 则沿用旧行为：删除已存在的目标后整体复制
+MERGE_SYNC = True
+
 # ==================== 配置区域结束 ====================
 
 def find_and_copy_folders(process_path: str, target_path: str, prefixes: list) -> int:
@@ -45,33 +60,33 @@ def find_and_copy_folders(process_path: str, target_path: str, prefixes: list) -
     print(f"查找前缀: {prefixes}")
     print("=" * 60)
 
-    # 遍历所有子文件夹
-    for root, dirs, files in os.walk(process_path):
-        # 跳过目标文件夹，避免无限递归
-        dirs[:] = [d for d in dirs if not d.startswith('.')]
-
-        for dir_name in dirs:
-            if any(dir_name.startswith(prefix) for prefix in prefixes):
-                # 找到匹配前缀的文件夹
-                source_folder_path = os.path.join(root, dir_name)
-
-                # 计算相对路径，用于在目标路径中保持结构
-                relative_path = os.path.relpath(root, process_path)
-
-                # 构建目标路径
-                if relative_path == ".":
-                    # 如果是在根目录下，直接放在目标路径下
-                    target_folder_path = os.path.join(target_path, dir_name)
-                else:
-                    # 否则保持相对路径结构
-                    target_folder_path = os.path.join(target_path, relative_path, dir_name)
-
-                # 复制文件夹
-                success = copy_single_folder(source_folder_path, target_folder_path)
-                if success:
-                    copied_count += 1
-                    print(f"✓ 已复制第 {copied_count} 个文件夹: {dir_name}")
-                print()
+    # 各一级子目录并发查找匹配前缀的文件夹（跳过隐藏目录）
+    matches = find_matching_dirs(
+        process_path,
+        lambda name: any(name.startswith(prefix) for prefix in prefixes),
+        prune=lambda name: name.startswith('.'),
+    )
+
+    for source_folder_path in matches:
+        dir_name = os.path.basename(source_folder_path)
+
+        # 计算相对路径，用于在目标路径中保持结构
+        relative_path = os.path.relpath(os.path.dirname(source_folder_path), process_path)
+
+        # 构建目标路径
+        if relative_path == ".":
+            # 如果是在根目录下，直接放在目标路径下
+            target_folder_path = os.path.join(target_path, dir_name)
+        else:
+            # 否则保持相对路径结构
+            target_folder_path = os.path.join(target_path, relative_path, dir_name)
+
+        # 复制文件夹
+        success = copy_single_folder(source_folder_path, target_folder_path)
+        if success:
+            copied_count += 1
+            print(f"✓ 已复制第 {copied_count} 个文件夹: {dir_name}")
+        print()
 
     return copied_count
 
@@ -90,13 +105,24 @@ def copy_single_folder(source_path: str, target_path: str) -> bool:
         # 确保目标路径的父目录存在
         os.makedirs(os.path.dirname(target_path), exist_ok=True)
 
+        if MERGE_SYNC:
+            return merge_single_folder(source_path, target_path)
+
         # 如果目标路径已存在，先删除
         if os.path.exists(target_path):
             shutil.rmtree(target_path)
             print(f"警告：目标路径已存在，已删除: {target_path}")
         
         # 复制文件夹
-        shutil.copytree(source_path, target_path)
+        if VERIFY_CHECKSUM:
+            stats = copytree_verified(source_path, target_path)
+            if stats['failed']:
+                for (src, _), e in stats['errors']:
+                    print(f"  ✗ 复制失败 {src}: {e}")
+                return False
+            print(f"  校验清单: {os.path.join(target_path, MANIFEST_NAME)}")
+        else:
+            shutil.copytree(source_path, target_path)
         print(f"✓ 复制文件夹: {folder_name}")
         print(f"  从: {source_path}")
         print(f"  到: {target_path}")
@@ -106,6 +132,24 @@ def copy_single_folder(source_path: str, target_path: str) -> bool:
         print(f"✗ 复制失败 {folder_name}: {e}")
         return False
 
+def merge_single_folder(source_path: str, target_path: str) -> bool:
+    """
+    合并同步单个文件夹：保留目标中已有文件，只复制新增或有变化的文件
+    Returns:
+        是否全部复制成功
+    """
+    manifest = ChecksumManifest(target_path) if VERIFY_CHECKSUM else None
+    summary = sync_tree(source_path, target_path, manifest=manifest)
+    if manifest is not None:
+        manifest.save()
+    for (_, (src, _, _)), e in summary['errors']:
+        print(f"  ✗ 复制失败 {src}: {e}")
+    print(f"✓ 同步文件夹: {os.path.basename(source_path)}")
+    print(f"  从: {source_path}")
+    print(f"  到: {target_path}")
+    print(f"  {format_sync_summary(summary)}")
+    return summary['failed'] == 0
+
 def main():
     """主函数"""
     print("文件夹前缀复制工具")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+复制结果校验工具
+
+按复制时生成的 _checksums.json 清单校验目标目录：
+  - 默认只重新读取大小或修改时间有变化的文件，未变化的文件直接跳过（几乎没有额外 I/O）
+  - FULL_CHECK = True 时重读全部文件，逐一比对哈希
+
+清单由 copy_floders.py / copy_prefixed_folders.py / copy_defect_pairs.py /
+find_steel_burr_images_v2.py 在 VERIFY_CHECKSUM = True 时生成。
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# 引入仓库根目录下的公共模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.checksum import MANIFEST_NAME, verify_manifest
+
+# ==================== 配置区域 ====================
+# 要校验的目录（递归查找其中所有 _checksums.json）
+TARGET_DIRS = [
+    r"Y:\2_标注数据\2025-04-03领益 东莞  B25 SIM tool 卡针外观检测\datas-pre\G",
+]
+
+# 是否全量重读（False = 只重读有变化的文件）
+FULL_CHECK = False
+
+# 每类问题最多打印的文件数
+MAX_PRINT = 50
+# ==================== 配置区域结束 ====================
+
+
+def find_manifest_roots(target_dir: str) -> list:
+    """递归查找包含校验清单的目录"""
+    roots = []
+    for root, dirs, files in os.walk(target_dir):
+        if MANIFEST_NAME in files:
+            roots.append(root)
+    return roots
+
+
+def print_files(title: str, files: list) -> None:
+    if not files:
+        return
+    print(f"  {title}: {len(files)}")
+    for rel in sorted(files)[:MAX_PRINT]:
+        print(f"    {rel}")
+    if len(files) > MAX_PRINT:
+        print(f"    ... 其余 {len(files) - MAX_PRINT} 个未显示")
+
+
+def main():
+    print("复制结果校验工具")
+    print("=" * 50)
+    print(f"校验方式: {'全量重读' if FULL_CHECK else '只重读有变化的文件'}")
+
+    total_bad = 0
+    for target_dir in TARGET_DIRS:
+        if not os.path.exists(target_dir):
+            print(f"\n目录不存在，跳过: {target_dir}")
+            continue
+        roots = find_manifest_roots(target_dir)
+        if not roots:
+            print(f"\n未找到校验清单: {target_dir}")
+            continue
+
+        for root in roots:
+            result = verify_manifest(root, full=FULL_CHECK)
+            bad = len(result["mismatch"]) + len(result["missing"])
+            total_bad += bad
+            print(f"\n{'✓' if bad == 0 else '✗'} {root}")
+            print(f"  未变化(跳过): {len(result['skipped'])}  重读一致: {len(result['ok']) + len(result['rehashed'])}")
+            print_files("修改时间变化但内容一致", result["rehashed"])
+            print_files("内容不一致", result["mismatch"])
+            print_files("文件缺失", result["missing"])
+
+    print("\n" + "=" * 60)
+    if total_bad == 0:
+        print("校验完成！全部一致")
+    else:
+        print(f"校验完成！共 {total_bad} 个文件异常")
+
+
+if __name__ == "__main__":
+    main()
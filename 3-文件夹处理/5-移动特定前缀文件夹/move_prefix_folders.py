@@ -11,9 +11,15 @@
 """
 
 import os
+import sys
 import shutil
 from pathlib import Path
 
+# 引入仓库根目录下的公共模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.discovery import find_matching_dirs
+from common.sync import format_sync_summary, merge_move_tree
+
 # ==================== 配置区域 ====================
 # 在这里修改你的路径配置
 
@@ -29,6 +35,10 @@ FOLDER_PREFIX = "F"  # 修改为你需要的前缀
 # 是否启用试运行模式（True=只预览不移动，False=实际移动）
 DRY_RUN = False
 
+# 合并模式：目标文件夹已存在时不删除，只移动有差异的文件（目标中已相同的文件直接删除源文件）；
+# 目标不存在且同盘时整个文件夹直接重命名。False 则沿用旧行为：删除已存在的目标后整体移动
+MERGE_SYNC = True
+
 # ==================== 配置区域结束 ====================
 
 
@@ -61,36 +71,35 @@ def find_and_move_prefix_folders(process_path: str, target_path: str, prefix: st
     print("开始查找并移动文件夹...")
     print("=" * 60)
     
-    # 遍历所有子文件夹
-    for root, dirs, files in os.walk(process_path):
-        # 跳过目标文件夹，避免无限递归
-        dirs[:] = [d for d in dirs if not d.startswith('.') and d != os.path.basename(target_path)]
+    # 各一级子目录并发查找（跳过隐藏目录与目标文件夹，匹配的文件夹整体移动，不再深入）
+    target_name = os.path.basename(target_path)
+    matches = find_matching_dirs(
+        process_path,
+        lambda name: name.startswith(prefix),
+        descend_into_matches=False,
+        prune=lambda name: name.startswith('.') or name == target_name,
+    )
+    
+    for source_folder_path in matches:
+        dir_name = os.path.basename(source_folder_path)
+        
+        # 计算相对路径，用于在目标路径中保持结构
+        relative_path = os.path.relpath(os.path.dirname(source_folder_path), process_path)
         
-        for dir_name in dirs[:]:  # 使用切片创建副本，避免在遍历时修改列表
-            if dir_name.startswith(prefix):
-                # 找到匹配前缀的文件夹
-                source_folder_path = os.path.join(root, dir_name)
-                
-                # 计算相对路径，用于在目标路径中保持结构
-                relative_path = os.path.relpath(root, process_path)
-                
-                # 构建目标路径
-                if relative_path == ".":
-                    # 如果是在根目录下，直接放在目标路径下
-                    target_folder_path = os.path.join(target_path, dir_name)
-                else:
-                    # 否则保持相对路径结构
-                    target_folder_path = os.path.join(target_path, relative_path, dir_name)
-                
-                # 移动文件夹
-                success = move_single_folder(source_folder_path, target_folder_path, dry_run)
-                if success:
-                    moved_count += 1
-                    print(f"✓ 已移动第 {moved_count} 个文件夹")
-                print()
-                
-                # 从dirs列表中移除已处理的文件夹，避免重复处理
-                dirs.remove(dir_name)
+        # 构建目标路径
+        if relative_path == ".":
+            # 如果是在根目录下，直接放在目标路径下
+            target_folder_path = os.path.join(target_path, dir_name)
+        else:
+            # 否则保持相对路径结构
+            target_folder_path = os.path.join(target_path, relative_path, dir_name)
+        
+        # 移动文件夹
+        success = move_single_folder(source_folder_path, target_folder_path, dry_run)
+        if success:
+            moved_count += 1
+            print(f"✓ 已移动第 {moved_count} 个文件夹")
+        print()
     
     return moved_count
 
@@ -119,6 +128,17 @@ def move_single_folder(source_path: str, target_path: str, dry_run: bool = False
         # 确保目标路径的父目录存在
         os.makedirs(os.path.dirname(target_path), exist_ok=True)
         
+        if MERGE_SYNC:
+            summary = merge_move_tree(source_path, target_path)
+            for (src, _), e in summary['errors']:
+                print(f"  ✗ 移动失败 {src}: {e}")
+            print(f"✓ {'重命名' if summary['renamed'] else '合并移动'}文件夹: {folder_name}")
+            print(f"  从: {source_path}")
+            print(f"  到: {target_path}")
+            if not summary['renamed']:
+                print(f"  {format_sync_summary(summary)}")
+            return summary['failed'] == 0
+        
         # 如果目标路径已存在，先删除
         if os.path.exists(target_path):
             shutil.rmtree(target_path)
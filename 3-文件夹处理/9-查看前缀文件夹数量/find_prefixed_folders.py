@@ -3,7 +3,14 @@
 
 import os
 import re
-from typing import Dict, List, Tuple
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# 引入仓库根目录下的公共模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.discovery import LayoutIndex, find_matching_dirs
 
 # =========================
 # 配置区：在此直接修改参数
@@ -21,42 +28,52 @@ RECURSIVE = True
 # 命名规则：单个大写英文字母 + 单个数字，例如 A1、B2
 FOLDER_NAME_PATTERN = re.compile(r"^[A-Z][0-9]$")
 
+# 最大查找深度（1 表示只看第一层子目录；None 不限制）。RECURSIVE=False 时固定为 1
+MAX_DEPTH = None
+
+# 找到匹配的文件夹后不再进入其内部查找（工位目录下通常是大量图片目录，无需遍历）
+STOP_AT_MATCH = True
+
+# 目录结构索引缓存：记录各目录的子目录列表，再次运行时目录未变化就不再重新列出（网络盘上明显加快）
+# 设为 None 关闭缓存
+LAYOUT_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "_layout_index.json")
 
-def find_folders(root: str, recursive: bool) -> List[Tuple[str, str]]:
+
+def find_folders(root: str, recursive: bool, index: Optional[LayoutIndex] = None) -> List[Tuple[str, str]]:
 	"""
 	返回匹配的目录列表，每项为 (name, abs_path)
+	按 MAX_DEPTH / STOP_AT_MATCH 限制查找范围，各一级子目录并发遍历
 	"""
-	matches: List[Tuple[str, str]] = []
-	root_abs = os.path.abspath(root)
-	if recursive:
-		for dirpath, dirnames, _ in os.walk(root_abs):
-			for d in dirnames:
-				if FOLDER_NAME_PATTERN.match(d):
-					matches.append((d, os.path.join(dirpath, d)))
-	else:
-		try:
-			for d in os.listdir(root_abs):
-				full = os.path.join(root_abs, d)
-				if os.path.isdir(full) and FOLDER_NAME_PATTERN.match(d):
-					matches.append((d, full))
-		except FileNotFoundError:
-			pass
-	return matches
+	paths = find_matching_dirs(
+		root,
+		lambda name: FOLDER_NAME_PATTERN.match(name) is not None,
+		descend_into_matches=not STOP_AT_MATCH,
+		max_depth=MAX_DEPTH if recursive else 1,
+		index=index,
+	)
+	return [(os.path.basename(p), p) for p in paths]
 
 
 def main() -> None:
 	all_matches: List[Tuple[str, str]] = []
 	print("匹配规则: 单个大写字母 + 单个数字 (如 A1, B2)")
-	print(f"递归查找: {RECURSIVE}")
+	print(f"递归查找: {RECURSIVE}  最大深度: {MAX_DEPTH}  匹配后停止深入: {STOP_AT_MATCH}")
+	index = LayoutIndex(LAYOUT_INDEX_PATH) if LAYOUT_INDEX_PATH else None
+	start = time.perf_counter()
 	for root in ROOT_DIRS:
 		root_abs = os.path.abspath(root)
 		print(f"\n查找目录: {root_abs}")
-		matches = find_folders(root_abs, RECURSIVE)
+		matches = find_folders(root_abs, RECURSIVE, index)
 		print(f"  本目录匹配数量: {len(matches)}")
 		for name, path in sorted(matches, key=lambda x: (x[0], x[1])):
 			print(f"    {name}: {path}")
 		all_matches.extend(matches)
 
+	print(f"\n查找耗时 {time.perf_counter() - start:.2f} 秒")
+	if index is not None:
+		index.save()
+		print(f"目录索引: 命中 {index.hits} 个目录，重新列出 {index.misses} 个")
+
 	print("\n—— 汇总 ——")
 	print(f"总匹配文件夹数量: {len(all_matches)}")
 
@@ -1,13 +1,15 @@
 
-import onnx
 import ast
+import sys
+from pathlib import Path
 
-def get_class_names_from_onnx(onnx_path):
-    # 加载 ONNX 模型
-    model = onnx.load(onnx_path)
+# 引入仓库根目录下的公共模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.onnx_meta import read_onnx_metadata
 
-    # 读取 metadata
-    meta = {prop.key: prop.value for prop in model.metadata_props}
+def get_class_names_from_onnx(onnx_path):
+    # 只读取 metadata（直接解析文件，跳过权重，不需要 onnx.load）
+    meta = read_onnx_metadata(onnx_path)
 
     # YOLOv5 导出时，类别信息通常存在 key="names"
     if "names" in meta:
@@ -1,5 +1,10 @@
-import onnx
 import ast
+import sys
+from pathlib import Path
+
+# 引入仓库根目录下的公共模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.onnx_meta import patch_onnx_metadata, read_onnx_metadata
 
 def modify_class_names_in_onnx(onnx_path, output_path, new_names_dict):
     """
@@ -9,34 +14,16 @@ def modify_class_names_in_onnx(onnx_path, output_path, new_names_dict):
     onnx_path: 输入ONNX模型路径
     output_path: 输出ONNX模型路径
     new_names_dict: 新的类别名称字典，格式如 {0: "新类别1", 1: "新类别2"}
+
+    只改写 metadata 中的 names 条目（没有则添加），权重等其余内容按原字节拷贝，不重新序列化
     """
-    # 加载 ONNX 模型
-    model = onnx.load(onnx_path)
-    
-    # 将新的类别字典转换为字符串
-    new_names_str = str(new_names_dict)
-    
-    # 更新metadata
-    found_names = False
-    for prop in model.metadata_props:
-        if prop.key == "names":
-            prop.value = new_names_str
-            found_names = True
-            break
-    
-    # 如果没有找到names字段，则添加新的metadata属性
-    if not found_names:
-        model.metadata_props.append(onnx.StringStringEntryProto(key="names", value=new_names_str))
-    
-    # 保存修改后的模型
-    onnx.save(model, output_path)
+    patch_onnx_metadata(onnx_path, output_path, {"names": str(new_names_dict)})
     print(f"模型已保存到: {output_path}")
     print(f"新的类别信息: {new_names_dict}")
 
 def get_class_names_from_onnx(onnx_path):
-    """读取并显示ONNX模型中的类别信息"""
-    model = onnx.load(onnx_path)
-    meta = {prop.key: prop.value for prop in model.metadata_props}
+    """读取并显示ONNX模型中的类别信息（只解析 metadata，不加载权重）"""
+    meta = read_onnx_metadata(onnx_path)
     
     if "names" in meta:
         try:
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ONNX 模型目录索引
+
+批量扫描模型目录下的所有 .onnx 文件，提取类别名称（metadata.names）、输入形状、opset 与文件哈希，
+写入目录下的索引文件（_onnx_index.json）：
+  - 只解析 protobuf 中需要的字段，不加载权重，多个模型并发读取
+  - 索引按 大小 + 修改时间 判断模型是否变化，未变化的模型不再重新读取
+  - 查询（如"哪些模型包含类别 X"）直接使用索引，不再打开任何模型
+"""
+
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# 引入仓库根目录下的公共模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.model_catalog import find_duplicates, find_models_with_class, load_index, refresh_index, save_index
+
+# ==================== 配置区域 ====================
+# 模型目录（递归查找 .onnx）
+MODEL_DIRS = [
+    r"C:\Users\Administrator\Desktop\Hinge\models",
+]
+
+# 是否先刷新索引（False 时直接使用已有索引查询，不访问模型文件）
+REFRESH_INDEX = True
+
+# 是否计算模型文件哈希（用于识别重复 / 被替换的模型；大模型需完整读取一遍）
+HASH_MODELS = True
+
+# 要查询的类别名称：列出包含这些类别的模型；为空则列出全部模型信息
+QUERY_CLASSES = [
+    # "挂具印",
+]
+
+# 类别查询是否按包含匹配（True: "划伤" 可匹配 "轻微划伤"；False: 完全一致）
+QUERY_SUBSTRING = False
+# ==================== 配置区域结束 ====================
+
+
+def format_shape(shape: Optional[list]) -> str:
+    if shape is None:
+        return "?"
+    return "x".join(str(d) for d in shape)
+
+
+def print_model(rel: str, entry: Dict[str, Any]) -> None:
+    inputs = ", ".join(f"{i['name']}[{format_shape(i['shape'])}]" for i in entry["inputs"])
+    opset = entry["opset"].get("ai.onnx", "?")
+    print(f"  {rel}")
+    print(f"    大小: {entry['size'] / 1024 / 1024:.1f} MB  opset: {opset}  输入: {inputs}")
+    if entry.get("hash"):
+        print(f"    哈希: {entry['hash']}")
+    if entry.get("names"):
+        names = ", ".join(f"{k}:{v}" for k, v in entry["names"].items())
+        print(f"    类别({len(entry['names'])}): {names}")
+    elif entry.get("names_error"):
+        print(f"    类别解析失败: {entry['names_error']}")
+    else:
+        print("    未写入类别信息(names)")
+
+
+def main():
+    print("ONNX 模型目录索引")
+    print("=" * 50)
+
+    for model_dir in MODEL_DIRS:
+        if not os.path.isdir(model_dir):
+            print(f"\n目录不存在，跳过: {model_dir}")
+            continue
+        print(f"\n模型目录: {model_dir}")
+        index = load_index(model_dir)
+        if REFRESH_INDEX:
+            counts = refresh_index(model_dir, index, HASH_MODELS)
+            save_index(model_dir, index)
+            print(f"  索引已更新: 未变化 {counts['reused']}，重新读取 {counts['updated']}，"
+                  f"移除 {counts['removed']}，失败 {counts['failed']}")
+
+        models = index.get("models", {})
+        if not QUERY_CLASSES:
+            print(f"  共 {len(models)} 个模型")
+            for rel in sorted(models):
+                print_model(rel, models[rel])
+            for rels in find_duplicates(index):
+                print(f"  内容相同的模型: {', '.join(rels)}")
+            continue
+
+        for class_name in QUERY_CLASSES:
+            hits = find_models_with_class(index, class_name, QUERY_SUBSTRING)
+            print(f"\n  包含类别 '{class_name}' 的模型: {len(hits)}")
+            for rel, idx, name in hits:
+                print(f"    {rel}  (编号 {idx}: {name})")
+
+    print("\n" + "=" * 60)
+    print("完成")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+数据集与模型类别核对工具
+
+一次核对多个数据集与多个模型：
+  - 模型类别来自模型目录索引（_onnx_index.json，见 19-模型目录索引），不加载模型权重
+  - 数据集类别来自 label_name.txt，实际使用的标签来自 YOLO txt / LabelMe JSON 的扫描缓存
+    （未变化的标注文件不再重新读取）
+  - 报告：模型缺少的类别、模型多出的类别、编号顺序不同的类别、数据中出现但模型没有的标签、
+    超出模型类别范围的 txt 编号、模型中没有样本的类别
+"""
+
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# 引入仓库根目录下的公共模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.annotations import read_label_names, scan_label_counts
+from common.model_catalog import load_index, model_class_list, refresh_index, save_index
+
+# ==================== 配置区域 ====================
+# 模型目录（递归查找 .onnx，索引与 19-模型目录索引 共用）
+MODEL_DIRS = [
+    r"C:\Users\Administrator\Desktop\Hinge\models",
+]
+
+# 是否先刷新模型索引（False 时直接使用已有索引）
+REFRESH_MODEL_INDEX = True
+
+# 数据集列表：每项可配置
+#   name:       数据集名称（仅用于显示）
+#   label_name: label_name.txt 路径（可选）
+#   txt_dirs:   YOLO txt 标签目录列表（可选，递归）
+#   json_dirs:  LabelMe JSON 目录列表（可选，递归）
+#   models:     只核对文件名（相对路径）包含这些字符串的模型（可选，不填则核对全部模型）
+DATASETS = [
+    {
+        "name": "F",
+        "label_name": r"S:\train_data_yzh\747hingedata\F\label_name.txt",
+        "txt_dirs": [r"S:\train_data_yzh\747hingedata\F\labels"],
+        "json_dirs": [],
+        "models": ["F"],
+    },
+]
+
+# 是否使用标签扫描缓存（False 时每次重新读取全部标注文件）
+USE_LABEL_CACHE = True
+
+# 每类问题最多显示的条目数
+MAX_PRINT = 20
+# ==================== 配置区域结束 ====================
+
+
+def load_dataset(dataset: Dict[str, Any]) -> Dict[str, Any]:
+    """读取数据集的类别表与标签统计"""
+    result: Dict[str, Any] = {"classes": None, "txt_ids": None, "json_labels": None}
+    label_name = dataset.get("label_name")
+    if label_name:
+        if os.path.isfile(label_name):
+            result["classes"] = read_label_names(label_name)
+        else:
+            print(f"  警告: label_name.txt 不存在: {label_name}")
+
+    for kind, key, out_key in (("txt", "txt_dirs", "txt_ids"), ("json", "json_dirs", "json_labels")):
+        dirs = dataset.get(key) or []
+        if not dirs:
+            continue
+        total = None
+        for label_dir in dirs:
+            if not os.path.isdir(label_dir):
+                print(f"  警告: 目录不存在: {label_dir}")
+                continue
+            stats = scan_label_counts(label_dir, kind, USE_LABEL_CACHE)
+            print(f"  扫描 {label_dir}: {stats['files']} 个 {kind} 文件（重新读取 {stats['reread']} 个）")
+            total = stats["labels"] if total is None else total + stats["labels"]
+        result[out_key] = total
+    return result
+
+
+def compare_classes(model_classes: List[str], data: Dict[str, Any]) -> List[str]:
+    """对比模型类别与数据集，返回问题描述列表（空列表表示一致）"""
+    issues: List[str] = []
+    model_index = {name: idx for idx, name in enumerate(model_classes)}
+
+    classes = data["classes"]
+    if classes is not None:
+        dataset_index = {name: idx for idx, name in classes.items()}
+        missing = [name for name in dataset_index if name not in model_index]
+        extra = [name for name in model_index if name not in dataset_index]
+        reordered = [(name, idx, model_index[name]) for name, idx in dataset_index.items()
+                     if name in model_index and model_index[name] != idx]
+        if missing:
+            issues.append(f"模型缺少的类别: {', '.join(missing[:MAX_PRINT])}")
+        if extra:
+            issues.append(f"模型多出的类别: {', '.join(extra[:MAX_PRINT])}")
+        if reordered:
+            detail = ", ".join(f"{name}(数据 {d} / 模型 {m})" for name, d, m in reordered[:MAX_PRINT])
+            issues.append(f"编号不同的类别: {detail}")
+
+    txt_ids = data["txt_ids"]
+    if txt_ids is not None:
+        out_of_range = sorted(i for i in txt_ids if i < 0 or i >= len(model_classes))
+        if out_of_range:
+            detail = ", ".join(f"{i}({txt_ids[i]} 个标注)" for i in out_of_range[:MAX_PRINT])
+            issues.append(f"txt 中超出模型类别范围的编号: {detail}")
+
+    json_labels = data["json_labels"]
+    if json_labels is not None:
+        unknown = sorted(l for l in json_labels if l not in model_index)
+        if unknown:
+            detail = ", ".join(f"{l}({json_labels[l]})" for l in unknown[:MAX_PRINT])
+            issues.append(f"JSON 中出现但模型没有的标签: {detail}")
+
+    # 模型中没有任何样本的类别
+    if txt_ids is not None or json_labels is not None:
+        used = set()
+        if txt_ids is not None:
+            used.update(model_classes[i] for i in txt_ids if 0 <= i < len(model_classes))
+        if json_labels is not None:
+            used.update(json_labels)
+        unused = [name for name in model_classes if name not in used]
+        if unused:
+            issues.append(f"数据中没有样本的模型类别: {', '.join(unused[:MAX_PRINT])}")
+    return issues
+
+
+def select_models(models: Dict[str, Tuple[str, Dict[str, Any]]], patterns: Optional[List[str]]) -> List[str]:
+    # 只匹配模型目录内的相对路径，避免模型目录本身的路径误命中
+    if not patterns:
+        return sorted(models)
+    return sorted(key for key, (rel, _) in models.items() if any(p in rel for p in patterns))
+
+
+def main():
+    print("数据集与模型类别核对工具")
+    print("=" * 50)
+
+    # 读取模型索引：{显示名: (相对路径, 索引条目)}
+    models: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+    for model_dir in MODEL_DIRS:
+        if not os.path.isdir(model_dir):
+            print(f"模型目录不存在，跳过: {model_dir}")
+            continue
+        index = load_index(model_dir)
+        if REFRESH_MODEL_INDEX:
+            refresh_index(model_dir, index, hash_models=False)
+            save_index(model_dir, index)
+        for rel, entry in index.get("models", {}).items():
+            models[os.path.join(model_dir, rel)] = (rel, entry)
+    print(f"共 {len(models)} 个模型")
+
+    summary = []
+    for dataset in DATASETS:
+        name = dataset.get("name", "?")
+        print(f"\n【数据集 {name}】")
+        data = load_dataset(dataset)
+
+        for model_key in select_models(models, dataset.get("models")):
+            model_classes = model_class_list(models[model_key][1])
+            if model_classes is None:
+                print(f"  - {model_key}: 模型未写入类别信息(names)，跳过")
+                summary.append((name, model_key, None))
+                continue
+            issues = compare_classes(model_classes, data)
+            summary.append((name, model_key, len(issues)))
+            if not issues:
+                print(f"  ✓ {model_key}: 一致（{len(model_classes)} 类）")
+                continue
+            print(f"  ✗ {model_key}:")
+            for issue in issues:
+                print(f"      {issue}")
+
+    print("\n" + "=" * 60)
+    print("【汇总】")
+    for name, model_key, issue_count in summary:
+        status = "无类别信息" if issue_count is None else ("一致" if issue_count == 0 else f"{issue_count} 类问题")
+        print(f"  {name}  <->  {os.path.basename(model_key)}: {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ONNX 模型 CPU 推理速度测试（onnxruntime）
+
+  - 类别名称、输入形状、opset 通过 common.onnx_meta 读取，不需要 onnx 包
+  - 遍历 批大小 × 算子内线程数(intra-op) × 算子间线程数(inter-op) 的组合，预热后多次计时
+  - 输出 p50 / p95 / p99 延迟与每秒图片数，结果写入 JSON 报告
+  - 可指定旧报告对比，便于比较不同版本模型
+
+依赖：pip install onnxruntime numpy
+"""
+
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+import onnxruntime as ort
+
+# 引入仓库根目录下的公共模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.onnx_meta import parse_names, read_onnx_info
+
+# ==================== 配置区域 ====================
+# 要测试的模型
+MODEL_PATH = r"C:\Users\Administrator\Desktop\Hinge\models\0829\A.onnx"
+
+# 批大小（模型输入批维度固定时只测试固定值）
+BATCH_SIZES = [1, 4, 8]
+
+# 算子内线程数（0 表示由 onnxruntime 自动决定）
+INTRA_OP_THREADS = [1, 4, 0]
+
+# 算子间线程数（大于 1 时使用并行执行模式）
+INTER_OP_THREADS = [1]
+
+# 预热次数与计时次数
+WARMUP_RUNS = 5
+TIMED_RUNS = 50
+
+# 输入尺寸为动态（如 height/width）时使用的默认值
+DEFAULT_IMAGE_SIZE = 640
+
+# 报告输出路径（为空则保存在模型旁边：<模型名>_benchmark_<时间>.json）
+OUTPUT_JSON = ""
+
+# 对比用的旧报告（为空则不对比）
+COMPARE_WITH = ""
+# ==================== 配置区域结束 ====================
+
+# TensorProto.DataType -> numpy
+ELEM_TYPES = {
+    1: np.float32,
+    10: np.float16,
+    11: np.float64,
+    2: np.uint8,
+    3: np.int8,
+    6: np.int32,
+    7: np.int64,
+}
+
+
+def build_input(shape: List[Any], elem_type: int, batch_size: int) -> np.ndarray:
+    """按模型输入形状生成随机输入；动态维度中第 0 维为批大小，其余用 DEFAULT_IMAGE_SIZE"""
+    dims = []
+    for axis, dim in enumerate(shape):
+        if isinstance(dim, int) and dim > 0:
+            dims.append(dim)
+        elif axis == 0:
+            dims.append(batch_size)
+        else:
+            dims.append(DEFAULT_IMAGE_SIZE)
+    dtype = ELEM_TYPES.get(elem_type, np.float32)
+    rng = np.random.default_rng(0)
+    if np.issubdtype(dtype, np.floating):
+        return rng.random(dims, dtype=np.float32).astype(dtype)
+    return rng.integers(0, 255, size=dims).astype(dtype)
+
+
+def create_session(model_path: str, intra: int, inter: int) -> ort.InferenceSession:
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.intra_op_num_threads = intra
+    options.inter_op_num_threads = inter
+    options.execution_mode = (ort.ExecutionMode.ORT_PARALLEL if inter > 1
+                              else ort.ExecutionMode.ORT_SEQUENTIAL)
+    return ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+
+def run_case(model_path: str, input_info: Dict[str, Any], batch_size: int, intra: int, inter: int) -> Dict[str, Any]:
+    """测试单个参数组合，返回延迟统计（毫秒）"""
+    session = create_session(model_path, intra, inter)
+    input_name = session.get_inputs()[0].name
+    feed = {input_name: build_input(input_info["shape"] or [], input_info["elem_type"], batch_size)}
+    actual_batch = feed[input_name].shape[0] if feed[input_name].ndim else 1
+
+    for _ in range(WARMUP_RUNS):
+        session.run(None, feed)
+
+    latencies = np.empty(TIMED_RUNS, dtype=np.float64)
+    for i in range(TIMED_RUNS):
+        start = time.perf_counter()
+        session.run(None, feed)
+        latencies[i] = (time.perf_counter() - start) * 1000
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    mean = float(latencies.mean())
+    return {
+        "batch_size": int(actual_batch),
+        "intra_op_threads": intra,
+        "inter_op_threads": inter,
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "mean_ms": round(mean, 3),
+        "images_per_sec": round(actual_batch * 1000 / mean, 2),
+    }
+
+
+def case_key(case: Dict[str, Any]) -> tuple:
+    return case["batch_size"], case["intra_op_threads"], case["inter_op_threads"]
+
+
+def compare_reports(old_path: str, results: List[Dict[str, Any]]) -> None:
+    """与旧报告中相同参数组合的结果对比"""
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = json.load(f)
+    old_cases = {case_key(c): c for c in old.get("results", [])}
+    print(f"\n与旧报告对比: {old_path}（{old.get('model', {}).get('path', '?')}）")
+    for case in results:
+        prev = old_cases.get(case_key(case))
+        if prev is None:
+            continue
+        delta = (case["p50_ms"] - prev["p50_ms"]) / prev["p50_ms"] * 100 if prev["p50_ms"] else 0.0
+        print(f"  batch={case['batch_size']} intra={case['intra_op_threads']} inter={case['inter_op_threads']}: "
+              f"p50 {prev['p50_ms']:.2f} -> {case['p50_ms']:.2f} ms ({delta:+.1f}%), "
+              f"{prev['images_per_sec']:.1f} -> {case['images_per_sec']:.1f} 张/秒")
+
+
+def main():
+    print("ONNX 推理速度测试")
+    print("=" * 50)
+    if not os.path.isfile(MODEL_PATH):
+        print(f"错误：模型不存在: {MODEL_PATH}")
+        return
+
+    info = read_onnx_info(MODEL_PATH, include_io=True)
+    if not info["inputs"]:
+        print("错误：未读取到模型输入")
+        return
+    input_info = info["inputs"][0]
+    try:
+        names = parse_names(info["metadata"])
+    except Exception:
+        names = None
+    print(f"模型: {MODEL_PATH}")
+    print(f"输入: {input_info['name']} {input_info['shape']}  opset: {info['opset'].get('ai.onnx', '?')}")
+    print(f"类别: {names if names is not None else '未写入'}")
+    print(f"onnxruntime {ort.__version__}，CPU 核数 {os.cpu_count()}")
+
+    # 批维度固定时只能测试该批大小
+    batch_dim = (input_info["shape"] or [None])[0]
+    batch_sizes = [batch_dim] if isinstance(batch_dim, int) and batch_dim > 0 else BATCH_SIZES
+    if batch_sizes != BATCH_SIZES:
+        print(f"模型批维度固定为 {batch_dim}，只测试该批大小")
+
+    results = []
+    print(f"\n{'batch':>5} {'intra':>5} {'inter':>5} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9} {'张/秒':>9}")
+    for batch_size in batch_sizes:
+        for intra in INTRA_OP_THREADS:
+            for inter in INTER_OP_THREADS:
+                try:
+                    case = run_case(MODEL_PATH, input_info, batch_size, intra, inter)
+                except Exception as e:
+                    print(f"{batch_size:>5} {intra:>5} {inter:>5}  失败: {e}")
+                    continue
+                results.append(case)
+                print(f"{case['batch_size']:>5} {intra:>5} {inter:>5} {case['p50_ms']:>9.2f} "
+                      f"{case['p95_ms']:>9.2f} {case['p99_ms']:>9.2f} {case['images_per_sec']:>9.1f}")
+
+    if results:
+        best = max(results, key=lambda c: c["images_per_sec"])
+        print(f"\n吞吐最高: batch={best['batch_size']} intra={best['intra_op_threads']} "
+              f"inter={best['inter_op_threads']}，{best['images_per_sec']:.1f} 张/秒")
+
+    report = {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "system": {
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+            "onnxruntime": ort.__version__,
+        },
+        "model": {
+            "path": os.path.abspath(MODEL_PATH),
+            "size": os.path.getsize(MODEL_PATH),
+            "opset": info["opset"],
+            "input": input_info,
+            "names": {str(k): v for k, v in names.items()} if names else None,
+        },
+        "settings": {"warmup_runs": WARMUP_RUNS, "timed_runs": TIMED_RUNS, "default_image_size": DEFAULT_IMAGE_SIZE},
+        "results": results,
+    }
+    output = OUTPUT_JSON or os.path.splitext(MODEL_PATH)[0] + datetime.now().strftime("_benchmark_%Y%m%d_%H%M%S.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"报告已保存: {output}")
+
+    if COMPARE_WITH:
+        if os.path.isfile(COMPARE_WITH):
+            compare_reports(COMPARE_WITH, results)
+        else:
+            print(f"对比报告不存在: {COMPARE_WITH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ONNX 批量推理预标注 / NG-OK 分拣（CPU）
+
+对目录树中的 CutAIImage 图片批量运行 YOLO ONNX 模型：
+  - OUTPUT_MODE = "labelme"：为每张图片生成 LabelMe 兼容的 JSON（矩形框），作为人工标注的起点
+  - OUTPUT_MODE = "sort"：有检出的图片归为 NG，否则为 OK，复制（或移动）到分拣目录并输出判定表
+
+流水线：图片解码与 letterbox 在线程池中进行（OpenCV 解码时释放 GIL），主线程把每批图片直接写入一个
+预先分配的连续 NumPy 数组后交给 onnxruntime；推理当前批的同时后台已在解码后续几批，I/O 与计算重叠。
+类别名称从模型 metadata 读取（与 get_class_names_from_onnx 相同，不加载权重）。
+
+依赖：pip install onnxruntime opencv-python numpy
+"""
+
+import csv
+import json
+import os
+import sys
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import onnxruntime as ort
+
+# 引入仓库根目录下的公共模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.discovery import find_matching_dirs
+from common.fileops import FileOpExecutor, ProgressTracker, format_progress
+from common.imageio import imread_unicode, is_image, letterbox
+from common.onnx_meta import parse_names, read_onnx_info
+
+# ==================== 配置区域 ====================
+# 模型路径
+MODEL_PATH = r"C:\Users\Administrator\Desktop\Hinge\models\0829\A.onnx"
+
+# 图片根目录（递归查找其中的 CutAIImage 文件夹）
+INPUT_ROOT = r"Y:\2_标注数据\2025-08-04领益 东莞  B747 Hinge AOI 改造C241104\20251016"
+
+# 只处理该名称文件夹中的图片；设为 None 则处理 INPUT_ROOT 下所有图片
+FOLDER_NAME: Optional[str] = "CutAIImage"
+
+# 输出方式: "labelme" -> 生成预标注 JSON, "sort" -> NG / OK 分拣
+OUTPUT_MODE = "labelme"
+
+# labelme 模式：已有同名 JSON 时是否覆盖（False 跳过这些图片，避免覆盖人工标注）
+OVERWRITE_JSON = False
+
+# sort 模式：分拣输出目录（其下生成 NG / OK，保留原相对路径），以及是否移动而非复制
+SORT_OUTPUT_DIR = r"Y:\2_标注数据\2025-08-04领益 东莞  B747 Hinge AOI 改造C241104\20251016-分拣"
+SORT_MOVE = False
+
+# 检测阈值
+CONF_THRESHOLD = 0.25
+IOU_THRESHOLD = 0.45
+
+# 每批图片数（模型批维度固定时使用模型的批大小）
+BATCH_SIZE = 8
+
+# 解码线程数，以及预先解码的批数
+DECODE_WORKERS = os.cpu_count() or 4
+PREFETCH_BATCHES = 3
+
+# onnxruntime 算子内线程数（0 为自动，通常等于物理核数）
+INTRA_OP_THREADS = 0
+
+# 模型输入尺寸未写在模型中（动态维度）时使用
+DEFAULT_IMAGE_SIZE = 640
+# ==================== 配置区域结束 ====================
+
+SKIP_DIRS = {"结果"}
+
+
+def collect_images(root: str, folder_name: Optional[str]) -> List[str]:
+    """收集待处理图片路径"""
+    paths: List[str] = []
+    if folder_name:
+        folders = find_matching_dirs(root, lambda name: name == folder_name, descend_into_matches=False,
+                                     prune=lambda name: name in SKIP_DIRS)
+        for folder in folders:
+            with os.scandir(folder) as it:
+                paths.extend(entry.path for entry in it if entry.is_file() and is_image(entry.name))
+    else:
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+            paths.extend(os.path.join(dirpath, name) for name in filenames if is_image(name))
+    return sorted(paths)
+
+
+def json_path_for(image_path: str) -> str:
+    return os.path.splitext(image_path)[0] + ".json"
+
+
+def load_image(path: str, size: int) -> Tuple[str, np.ndarray, float, Tuple[int, int], Tuple[int, int]]:
+    """解码并 letterbox，返回 (路径, CHW uint8 视图, 缩放比例, 填充, 原图 (h, w))"""
+    img = imread_unicode(path)
+    if img is None:
+        raise ValueError("无法读取图片")
+    boxed, scale, pad = letterbox(img, size)
+    chw = boxed[:, :, ::-1].transpose(2, 0, 1)  # BGR -> RGB, HWC -> CHW（视图，不复制）
+    return path, chw, scale, pad, img.shape[:2]
+
+
+def iter_decoded_batches(paths: List[str], size: int, batch_size: int,
+                         pool: ThreadPoolExecutor) -> Iterator[Tuple[list, list]]:
+    """
+    按顺序产出解码好的批次；后台始终保持 PREFETCH_BATCHES 批在解码
+
+    Yields:
+        (成功的解码结果列表, [(路径, 异常), ...])
+    """
+    path_iter = iter(paths)
+    futures: deque = deque()
+
+    def fill():
+        while len(futures) < batch_size * PREFETCH_BATCHES:
+            try:
+                path = next(path_iter)
+            except StopIteration:
+                return
+            futures.append((path, pool.submit(load_image, path, size)))
+
+    fill()
+    while futures:
+        items, errors = [], []
+        while futures and len(items) + len(errors) < batch_size:
+            path, future = futures.popleft()
+            try:
+                items.append(future.result())
+            except Exception as e:
+                errors.append((path, e))
+        fill()
+        yield items, errors
+
+
+def normalize_output(output: np.ndarray, num_names: int) -> Tuple[np.ndarray, int]:
+    """
+    统一输出布局为 (N, 框数, 通道)，返回 (输出, 类别数)
+
+    先确定通道轴再推算类别数：已知类别名时取长度为 4+nc / 5+nc 的轴；否则通道轴取第 1、2 维中较小的一维
+    （框数远大于通道数）。YOLOv8 为 (N, 4+nc, 框数)，需要转置；YOLOv5 为 (N, 框数, 5+nc)。
+    """
+    if num_names:
+        channels = (4 + num_names, 5 + num_names)
+        if output.shape[2] in channels:
+            return output, num_names
+        if output.shape[1] in channels:
+            return output.transpose(0, 2, 1), num_names
+    if output.shape[1] < output.shape[2]:
+        # YOLOv8：xywh + 类别分数
+        return output.transpose(0, 2, 1), num_names or output.shape[1] - 4
+    # YOLOv5：xywh + obj + 类别分数
+    return output, num_names or output.shape[2] - 5
+
+
+def postprocess(pred: np.ndarray, num_classes: int, scale: float, pad: Tuple[int, int],
+                orig_hw: Tuple[int, int]) -> List[Tuple[int, float, np.ndarray]]:
+    """
+    单张图片的预测 (框数, 通道) -> [(类别编号, 置信度, [x1, y1, x2, y2]), ...]（原图坐标，已 NMS）
+    兼容 YOLOv5（xywh + obj + 类别分数）与 YOLOv8（xywh + 类别分数）
+    """
+    if pred.shape[1] == 5 + num_classes:
+        scores = pred[:, 5:] * pred[:, 4:5]
+    else:
+        scores = pred[:, 4:4 + num_classes]
+    cls = scores.argmax(axis=1)
+    conf = scores[np.arange(len(scores)), cls]
+    keep = conf >= CONF_THRESHOLD
+    if not keep.any():
+        return []
+    xywh, cls, conf = pred[keep, :4], cls[keep], conf[keep]
+
+    # 还原到原图坐标
+    boxes = np.empty_like(xywh)
+    boxes[:, 0] = (xywh[:, 0] - xywh[:, 2] / 2 - pad[0]) / scale
+    boxes[:, 1] = (xywh[:, 1] - xywh[:, 3] / 2 - pad[1]) / scale
+    boxes[:, 2] = (xywh[:, 0] + xywh[:, 2] / 2 - pad[0]) / scale
+    boxes[:, 3] = (xywh[:, 1] + xywh[:, 3] / 2 - pad[1]) / scale
+    h, w = orig_hw
+    boxes[:, [0, 2]] = np.clip(boxes[:, [0, 2]], 0, w)
+    boxes[:, [1, 3]] = np.clip(boxes[:, [1, 3]], 0, h)
+
+    # 按类别做 NMS：不同类别的框平移到互不重叠的位置
+    offset = cls[:, None].astype(np.float32) * (max(h, w) + 1)
+    nms_boxes = np.concatenate([boxes[:, :2] + offset, boxes[:, 2:] - boxes[:, :2]], axis=1)
+    indices = cv2.dnn.NMSBoxes(nms_boxes.tolist(), conf.tolist(), CONF_THRESHOLD, IOU_THRESHOLD)
+    indices = np.array(indices).reshape(-1)
+    return [(int(cls[i]), float(conf[i]), boxes[i]) for i in indices]
+
+
+def write_labelme(image_path: str, orig_hw: Tuple[int, int], detections: list, names: Dict[int, str]) -> None:
+    """写入 LabelMe 兼容的 JSON（先写临时文件再替换）"""
+    shapes = []
+    for cls, conf, box in detections:
+        x1, y1, x2, y2 = (round(float(v), 2) for v in box)
+        shapes.append({
+            "label": names.get(cls, str(cls)),
+            "points": [[x1, y1], [x2, y2]],
+            "group_id": None,
+            "description": f"conf={conf:.3f}",
+            "shape_type": "rectangle",
+            "flags": {},
+        })
+    data = {
+        "version": "5.2.1",
+        "flags": {},
+        "shapes": shapes,
+        "imagePath": os.path.basename(image_path),
+        "imageData": None,
+        "imageHeight": int(orig_hw[0]),
+        "imageWidth": int(orig_hw[1]),
+    }
+    json_path = json_path_for(image_path)
+    tmp_path = json_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, json_path)
+
+
+def create_session(model_path: str) -> ort.InferenceSession:
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.intra_op_num_threads = INTRA_OP_THREADS
+    return ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+
+def sort_images(decisions: List[Tuple[str, str, float, str]]) -> None:
+    """按 NG / OK 判定复制或移动图片（及同名 JSON），并写出判定表"""
+    pairs = []
+    for path, decision, _, _ in decisions:
+        rel = os.path.relpath(path, INPUT_ROOT)
+        dst = os.path.join(SORT_OUTPUT_DIR, decision, rel)
+        pairs.append((path, dst))
+        json_path = json_path_for(path)
+        if os.path.exists(json_path):
+            pairs.append((json_path, json_path_for(dst)))
+
+    executor = FileOpExecutor()
+    stats = executor.move_pairs(pairs) if SORT_MOVE else executor.copy_pairs(pairs)
+    for (src, _), e in stats["errors"]:
+        print(f"  ✗ {'移动' if SORT_MOVE else '复制'}失败 {src}: {e}")
+
+    os.makedirs(SORT_OUTPUT_DIR, exist_ok=True)
+    table_path = os.path.join(SORT_OUTPUT_DIR, "_sort_decisions.csv")
+    with open(table_path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["图片", "判定", "最高置信度", "检出类别"])
+        writer.writerows(decisions)
+    print(f"判定表: {table_path}")
+
+
+def main():
+    print("ONNX 批量推理预标注 / 分拣")
+    print("=" * 50)
+    if not os.path.isfile(MODEL_PATH):
+        print(f"错误：模型不存在: {MODEL_PATH}")
+        return
+    if OUTPUT_MODE not in ("labelme", "sort"):
+        print(f"错误：未知输出方式: {OUTPUT_MODE}")
+        return
+
+    info = read_onnx_info(MODEL_PATH, include_io=True)
+    try:
+        names = parse_names(info["metadata"]) or {}
+    except Exception as e:
+        print(f"解析类别信息失败，使用编号作为类别名: {e}")
+        names = {}
+    shape = info["inputs"][0]["shape"] if info["inputs"] else None
+    size = shape[2] if shape and isinstance(shape[2], int) and shape[2] > 0 else DEFAULT_IMAGE_SIZE
+    fixed_batch = shape[0] if shape and isinstance(shape[0], int) and shape[0] > 0 else None
+    batch_size = fixed_batch or BATCH_SIZE
+    print(f"模型: {MODEL_PATH}")
+    print(f"输入尺寸: {size}  批大小: {batch_size}  类别: {names or '未写入'}")
+
+    paths = collect_images(INPUT_ROOT, FOLDER_NAME)
+    if OUTPUT_MODE == "labelme" and not OVERWRITE_JSON:
+        total = len(paths)
+        paths = [p for p in paths if not os.path.exists(json_path_for(p))]
+        print(f"跳过已有 JSON 的图片 {total - len(paths)} 张")
+    print(f"待处理图片: {len(paths)} 张")
+    if not paths:
+        return
+
+    session = create_session(MODEL_PATH)
+    input_name = session.get_inputs()[0].name
+    batch = np.empty((batch_size, 3, size, size), dtype=np.float32)
+
+    def report(stats):
+        print(f"  进度: {format_progress(stats)}")
+
+    tracker = ProgressTracker(len(paths), report, interval=5.0)
+    class_counter: Counter = Counter()
+    decisions: List[Tuple[str, str, float, str]] = []
+    failed = 0
+
+    with ThreadPoolExecutor(max_workers=DECODE_WORKERS) as pool:
+        for items, errors in iter_decoded_batches(paths, size, batch_size, pool):
+            for path, e in errors:
+                print(f"  ✗ 读取失败 {path}: {e}")
+            failed += len(errors)
+            if errors:
+                tracker.add(len(errors), failed=True)
+            if not items:
+                continue
+
+            # 直接写入预分配的连续数组并归一化
+            for i, (_, chw, _, _, _) in enumerate(items):
+                np.multiply(chw, 1.0 / 255.0, out=batch[i], casting="unsafe")
+            n = len(items)
+            if n < batch_size:
+                batch[n:] = 0
+            feed = batch if fixed_batch else batch[:n]
+            output = session.run(None, {input_name: feed})[0]
+
+            output, num_classes = normalize_output(output, len(names))
+
+            for i, (path, _, scale, pad, orig_hw) in enumerate(items):
+                detections = postprocess(output[i], num_classes, scale, pad, orig_hw)
+                class_counter.update(names.get(cls, str(cls)) for cls, _, _ in detections)
+                if OUTPUT_MODE == "labelme":
+                    write_labelme(path, orig_hw, detections, names)
+                else:
+                    max_conf = max((conf for _, conf, _ in detections), default=0.0)
+                    labels = sorted({names.get(cls, str(cls)) for cls, _, _ in detections})
+                    decisions.append((path, "NG" if detections else "OK", round(max_conf, 4), " ".join(labels)))
+            tracker.add(n)
+
+    stats = tracker.snapshot()
+    print(f"\n推理完成: {format_progress(stats)}，耗时 {stats['elapsed']:.1f} 秒")
+    if OUTPUT_MODE == "sort":
+        ng = sum(1 for d in decisions if d[1] == "NG")
+        print(f"NG: {ng} 张  OK: {len(decisions) - ng} 张")
+        sort_images(decisions)
+    print("各类别检出数量:")
+    for label, count in class_counter.most_common():
+        print(f"  {label}: {count}")
+    if failed:
+        print(f"读取失败: {failed} 张")
+
+
+if __name__ == "__main__":
+    main()
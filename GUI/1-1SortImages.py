@@ -1,10 +1,15 @@
 import os
-import shutil
+import sys
 import re
+import threading
 import tkinter as tk
-from tkinter import filedialog
+from tkinter import filedialog, ttk
 from pathlib import Path
 
+# 引入仓库根目录下的公共模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.fileops import FileOpExecutor, format_progress
+
 def log_output(text_widget, message):
     """
     将日志信息输出到Text控件
@@ -12,14 +17,10 @@ def log_output(text_widget, message):
     text_widget.insert(tk.END, message + "\n")
     text_widget.yview(tk.END)  # 自动滚动到最后一行
 
-def organize_images_by_prefix(cutai_image_path, result_root_dir, subfolder_name, text_widget):
+def collect_prefix_files(cutai_image_path):
     """
-    按照图片文件名前缀分类整理文件，并将结果放到指定的结果根目录下
+    按图片文件名前缀收集图片与JSON，返回 {prefix: {'images': [...], 'jsons': [...]}}
     """
-    if not os.path.exists(cutai_image_path):
-        log_output(text_widget, f"错误：路径 {cutai_image_path} 不存在")
-        return 0
-    
     files = os.listdir(cutai_image_path)
     prefix_files = {}
 
@@ -51,76 +52,149 @@ def organize_images_by_prefix(cutai_image_path, result_root_dir, subfolder_name,
                         prefix_files[prefix]['jsons'].append(file)
                     if image_file not in prefix_files[prefix]['images']:
                         prefix_files[prefix]['images'].append(image_file)
+    return prefix_files
 
-    # 创建分类文件夹并复制文件
+def build_copy_pairs(cutai_image_path, result_root_dir, prefix_files):
+    """
+    创建分类文件夹，返回待复制的 (源路径, 目标路径) 列表
+    """
+    pairs = []
     for prefix, files_dict in prefix_files.items():
         target_dir = os.path.join(result_root_dir, prefix)
         os.makedirs(target_dir, exist_ok=True)
-        
-        log_output(text_widget, f"  创建分类文件夹: {prefix}")
-        
-        for image_file in files_dict['images']:
-            src_path = os.path.join(cutai_image_path, image_file)
-            dst_path = os.path.join(target_dir, image_file)
-            try:
-                shutil.copy2(src_path, dst_path)
-                log_output(text_widget, f"    复制图片: {image_file}")
-            except Exception as e:
-                log_output(text_widget, f"    复制图片失败 {image_file}: {e}")
-        
-        for json_file in files_dict['jsons']:
-            src_path = os.path.join(cutai_image_path, json_file)
-            dst_path = os.path.join(target_dir, json_file)
-            try:
-                shutil.copy2(src_path, dst_path)
-                log_output(text_widget, f"    复制JSON: {json_file}")
-            except Exception as e:
-                log_output(text_widget, f"    复制JSON失败 {json_file}: {e}")
-
-    log_output(text_widget, f"  分类完成！共处理了 {len(prefix_files)} 个前缀类别")
+        for name in files_dict['images'] + files_dict['jsons']:
+            pairs.append((os.path.join(cutai_image_path, name), os.path.join(target_dir, name)))
+    return pairs
+
+def copy_with_executor(pairs, executor, log):
+    """
+    使用并发后端复制文件，失败项写入日志
+    """
+    stats = executor.copy_pairs(pairs)
+    for (src, _), e in stats['errors']:
+        log(f"    复制失败 {os.path.basename(src)}: {e}")
+    if stats['cancelled']:
+        log("  ⚠️ 已取消，剩余文件未复制")
+    return stats
+
+def organize_images_by_prefix(cutai_image_path, result_root_dir, subfolder_name, log, executor):
+    """
+    按照图片文件名前缀分类整理文件，并将结果放到指定的结果根目录下
+    """
+    if not os.path.exists(cutai_image_path):
+        log(f"错误：路径 {cutai_image_path} 不存在")
+        return 0
+
+    prefix_files = collect_prefix_files(cutai_image_path)
+    for prefix in prefix_files:
+        log(f"  创建分类文件夹: {prefix}")
+    pairs = build_copy_pairs(cutai_image_path, result_root_dir, prefix_files)
+    stats = copy_with_executor(pairs, executor, log)
+
+    log(f"  分类完成！共处理了 {len(prefix_files)} 个前缀类别，复制 {stats['done'] - stats['failed']} 个文件")
     return len(prefix_files)
 
-def process_all_subfolders(root_path, text_widget):
+def process_all_subfolders(root_path, log, executor):
     """
     扫描根目录下的所有子文件夹，并找到 CutAIImage 文件夹进行分类整理
+    先收集全部待复制文件，再统一交给并发后端执行，以便显示总进度
     """
     if not os.path.exists(root_path):
-        log_output(text_widget, f"错误：根目录 {root_path} 不存在")
+        log(f"错误：根目录 {root_path} 不存在")
         return
-    
+
     result_dir = os.path.join(root_path, "结果")
     os.makedirs(result_dir, exist_ok=True)
-    
+
     total_processed = 0
     total_cutai_folders = 0
     total_dirs_scanned = 0
-    
+    all_pairs = []
+
     for dirpath, dirnames, filenames in os.walk(root_path):
+        if executor.cancelled:
+            break
         dirnames[:] = [d for d in dirnames if d != "结果"]
         total_dirs_scanned += 1
-        
+
         if "CutAIImage" in dirnames:
             cutai_path = os.path.join(dirpath, "CutAIImage")
             total_cutai_folders += 1
-            subfolder_name = os.path.basename(dirpath) or "root"
-            processed_count = organize_images_by_prefix(cutai_path, result_dir, subfolder_name, text_widget)
-            total_processed += processed_count
-    
-    log_output(text_widget, "\n" + "=" * 60)
-    log_output(text_widget, f"扫描完成！")
-    log_output(text_widget, f"累计扫描目录数: {total_dirs_scanned}")
-    log_output(text_widget, f"找到 {total_cutai_folders} 个CutAIImage文件夹")
-    log_output(text_widget, f"共处理了 {total_processed} 个前缀类别")
-
-def select_folder_and_process(text_widget):
+            log(f"  找到CutAIImage文件夹: {cutai_path}")
+            prefix_files = collect_prefix_files(cutai_path)
+            all_pairs.extend(build_copy_pairs(cutai_path, result_dir, prefix_files))
+            total_processed += len(prefix_files)
+
+    log(f"扫描完成，共 {len(all_pairs)} 个文件待复制")
+    stats = copy_with_executor(all_pairs, executor, log)
+
+    log("\n" + "=" * 60)
+    log(f"处理完成！耗时 {stats['elapsed']:.1f} 秒，{format_progress(stats)}")
+    log(f"累计扫描目录数: {total_dirs_scanned}")
+    log(f"找到 {total_cutai_folders} 个CutAIImage文件夹")
+    log(f"共处理了 {total_processed} 个前缀类别")
+
+class BackgroundRunner:
+    """
+    在后台线程执行整理任务，日志和进度通过 after() 回到界面线程，避免窗口卡死
+    """
+    def __init__(self, window, text_widget, progress_var, status_var, run_buttons, cancel_button):
+        self.window = window
+        self.text_widget = text_widget
+        self.progress_var = progress_var
+        self.status_var = status_var
+        self.run_buttons = run_buttons
+        self.cancel_button = cancel_button
+        self.executor = None
+
+    def log(self, message):
+        self.window.after(0, log_output, self.text_widget, message)
+
+    def on_progress(self, stats):
+        percent = stats['done'] / stats['total'] * 100 if stats['total'] else 100
+        self.window.after(0, self.progress_var.set, percent)
+        self.window.after(0, self.status_var.set, format_progress(stats))
+
+    def start(self, job, *args):
+        if self.executor is not None:
+            return
+        self.executor = FileOpExecutor(on_progress=self.on_progress)
+        for btn in self.run_buttons:
+            btn.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.progress_var.set(0)
+        self.status_var.set("处理中...")
+        threading.Thread(target=self._run, args=(job, args), daemon=True).start()
+
+    def _run(self, job, args):
+        try:
+            job(*args, self.log, self.executor)
+        except Exception as e:
+            self.log(f"错误: {e}")
+        finally:
+            self.window.after(0, self._finish)
+
+    def _finish(self):
+        self.status_var.set("已取消" if self.executor.cancelled else "完成")
+        self.executor = None
+        for btn in self.run_buttons:
+            btn.config(state=tk.NORMAL)
+        self.cancel_button.config(state=tk.DISABLED)
+
+    def cancel(self):
+        if self.executor is not None:
+            self.executor.cancel()
+            self.status_var.set("正在停止...")
+
+def select_folder_and_process(runner):
     """
     选择根目录并批量处理所有子文件夹中的CutAIImage
     """
     root_path = filedialog.askdirectory(title="选择根目录")
     if root_path:
-        process_all_subfolders(root_path, text_widget)
+        runner.start(process_all_subfolders, root_path)
 
-def select_single_folder_and_process(text_widget):
+def select_single_folder_and_process(runner):
     """
     选择单个文件夹并处理
     """
@@ -129,7 +203,7 @@ def select_single_folder_and_process(text_widget):
         result_dir = filedialog.askdirectory(title="选择结果保存目录")
         if not result_dir:
             result_dir = os.path.join(os.path.dirname(cutai_path), "结果")
-        organize_images_by_prefix(cutai_path, result_dir, "单个文件夹", text_widget)
+        runner.start(organize_images_by_prefix, cutai_path, result_dir, "单个文件夹")
 
 def create_gui():
     """
@@ -137,17 +211,26 @@ def create_gui():
     """
     window = tk.Tk()
     window.title("图片分类整理工具")
-    window.geometry("600x400")
+    window.geometry("600x480")
 
     label = tk.Label(window, text="请选择处理模式", font=("Arial", 14))
     label.pack(pady=20)
 
-    btn_single = tk.Button(window, text="处理单个CutAIImage文件夹", width=30, height=2, command=lambda: select_single_folder_and_process(log_text))
+    btn_single = tk.Button(window, text="处理单个CutAIImage文件夹", width=30, height=2, command=lambda: select_single_folder_and_process(runner))
     btn_single.pack(pady=10)
 
-    btn_batch = tk.Button(window, text="批量处理所有子文件夹中的CutAIImage", width=30, height=2, command=lambda: select_folder_and_process(log_text))
+    btn_batch = tk.Button(window, text="批量处理所有子文件夹中的CutAIImage", width=30, height=2, command=lambda: select_folder_and_process(runner))
     btn_batch.pack(pady=10)
 
+    progress_var = tk.DoubleVar()
+    ttk.Progressbar(window, variable=progress_var, maximum=100).pack(fill=tk.X, padx=10)
+
+    status_var = tk.StringVar(value="就绪")
+    tk.Label(window, textvariable=status_var, anchor="w").pack(fill=tk.X, padx=10)
+
+    btn_cancel = tk.Button(window, text="取消", width=10, state=tk.DISABLED, command=lambda: runner.cancel())
+    btn_cancel.pack(pady=5)
+
     log_text = tk.Text(window, height=10, width=70)
     log_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)  # 修改为fill和expand选项，使日志窗口自动随主窗口变化
 
@@ -155,6 +238,8 @@ def create_gui():
     log_text.config(yscrollcommand=scroll_y.set)
     scroll_y.pack(side="right", fill="y")
 
+    runner = BackgroundRunner(window, log_text, progress_var, status_var, [btn_single, btn_batch], btn_cancel)
+
     window.mainloop()
 
 if __name__ == "__main__":
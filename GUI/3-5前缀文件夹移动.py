@@ -8,14 +8,21 @@
   - 扫描指定路径下的所有子文件夹，找到带有特定前缀的文件夹，
     并将其移动到目标路径中，保留原始结构。
   - 支持试运行（Dry Run）模式，仅显示不实际移动。
+  - 移动在后台线程中并发执行，界面显示进度与速率，可随时取消。
 """
 
 import os
+import sys
 import shutil
+import threading
 import tkinter as tk
-from tkinter import filedialog, messagebox, scrolledtext
+from tkinter import filedialog, messagebox, scrolledtext, ttk
 from pathlib import Path
 
+# 引入仓库根目录下的公共模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.fileops import FileOpExecutor, format_progress
+
 
 def move_single_folder(source_path: str, target_path: str, dry_run: bool = False, log=None) -> bool:
     """移动单个文件夹"""
@@ -38,9 +45,9 @@ def move_single_folder(source_path: str, target_path: str, dry_run: bool = False
         return False
 
 
-def find_and_move_prefix_folders(process_path, target_path, prefix, dry_run, log=None):
-    """递归查找并移动"""
-    moved_count = 0
+def collect_prefix_folders(process_path, target_path, prefix):
+    """递归查找带前缀的文件夹，返回 (源路径, 目标路径) 列表；命中的文件夹不再向下遍历"""
+    pairs = []
     process_abs = os.path.abspath(process_path)
     target_abs = os.path.abspath(target_path)
 
@@ -58,14 +65,26 @@ def find_and_move_prefix_folders(process_path, target_path, prefix, dry_run, log
                     target_folder_path = os.path.join(target_path, dir_name)
                 else:
                     target_folder_path = os.path.join(target_path, relative_path, dir_name)
-
-                success = move_single_folder(source_folder_path, target_folder_path, dry_run, log)
-                if success:
-                    moved_count += 1
-                    if log: log(f"✅ 已处理第 {moved_count} 个: {source_folder_path}")
+                pairs.append((source_folder_path, target_folder_path))
                 dirs.remove(dir_name)
 
-    return moved_count
+    return pairs
+
+
+def find_and_move_prefix_folders(process_path, target_path, prefix, dry_run, log=None, executor=None):
+    """递归查找并移动，移动操作交给并发后端执行"""
+    pairs = collect_prefix_folders(process_path, target_path, prefix)
+    if log: log(f"共找到 {len(pairs)} 个待处理文件夹")
+    executor = executor or FileOpExecutor()
+
+    def move_pair(pair):
+        if not move_single_folder(pair[0], pair[1], dry_run, log):
+            raise RuntimeError(pair[0])
+
+    stats = executor.run(move_pair, pairs)
+    if stats['cancelled'] and log:
+        log("⚠️ 已取消，剩余文件夹未处理")
+    return stats['done'] - stats['failed']
 
 
 # ==================== GUI部分 ====================
@@ -99,8 +118,21 @@ class FolderMoverApp:
         self.text_log = scrolledtext.ScrolledText(root, width=100, height=25, state="disabled")
         self.text_log.grid(row=3, column=1, columnspan=2, padx=5, pady=5)
 
+        # 进度与状态
+        self.progress_var = tk.DoubleVar()
+        ttk.Progressbar(root, variable=self.progress_var, maximum=100).grid(row=4, column=1, columnspan=2, sticky="we", padx=5)
+        self.status_var = tk.StringVar(value="就绪")
+        tk.Label(root, textvariable=self.status_var, anchor="w").grid(row=5, column=1, columnspan=2, sticky="we", padx=5)
+
         # 操作按钮
-        tk.Button(root, text="开始执行", command=self.start_move, bg="#4CAF50", fg="white").grid(row=4, column=1, pady=10)
+        frm_btn = tk.Frame(root)
+        frm_btn.grid(row=6, column=1, pady=10)
+        self.btn_start = tk.Button(frm_btn, text="开始执行", command=self.start_move, bg="#4CAF50", fg="white")
+        self.btn_start.pack(side="left", padx=8)
+        self.btn_cancel = tk.Button(frm_btn, text="取消", command=self.cancel_move, state="disabled")
+        self.btn_cancel.pack(side="left", padx=8)
+
+        self.executor = None
 
     def select_process_path(self):
         path = filedialog.askdirectory(title="选择扫描路径")
@@ -114,14 +146,24 @@ class FolderMoverApp:
             self.entry_target.delete(0, tk.END)
             self.entry_target.insert(0, path)
 
-    def log(self, msg):
+    def append_log(self, msg):
         self.text_log.configure(state="normal")
         self.text_log.insert(tk.END, msg + "\n")
         self.text_log.see(tk.END)
         self.text_log.configure(state="disabled")
-        self.root.update()
+
+    def log(self, msg):
+        """可在工作线程中调用，实际写入在界面线程中完成"""
+        self.root.after(0, self.append_log, msg)
+
+    def on_progress(self, stats):
+        percent = stats['done'] / stats['total'] * 100 if stats['total'] else 100
+        self.root.after(0, self.progress_var.set, percent)
+        self.root.after(0, self.status_var.set, format_progress(stats))
 
     def start_move(self):
+        if self.executor is not None:
+            return
         process_path = self.entry_process.get().strip()
         target_path = self.entry_target.get().strip()
         prefix = self.entry_prefix.get().strip()
@@ -148,17 +190,47 @@ class FolderMoverApp:
         self.log(f"试运行模式: {'是' if dry_run else '否'}")
         self.log("=" * 70)
 
-        moved_count = find_and_move_prefix_folders(process_path, target_path, prefix, dry_run, self.log)
-
-        self.log("=" * 70)
+        self.executor = FileOpExecutor(on_progress=self.on_progress)
+        self.btn_start.configure(state="disabled")
+        self.btn_cancel.configure(state="normal")
+        self.progress_var.set(0)
+        self.status_var.set("扫描中...")
+        threading.Thread(
+            target=self.run_move,
+            args=(process_path, target_path, prefix, dry_run),
+            daemon=True
+        ).start()
+
+    def run_move(self, process_path, target_path, prefix, dry_run):
+        """后台线程：查找并移动"""
+        moved_count = 0
+        try:
+            moved_count = find_and_move_prefix_folders(process_path, target_path, prefix, dry_run, self.log, self.executor)
+        except Exception as e:
+            self.log(f"❌ 执行出错: {e}")
+        self.root.after(0, self.move_complete, moved_count, dry_run)
+
+    def move_complete(self, moved_count, dry_run):
+        cancelled = self.executor.cancelled
+        self.executor = None
+        self.btn_start.configure(state="normal")
+        self.btn_cancel.configure(state="disabled")
+        self.status_var.set("已取消" if cancelled else "完成")
+
+        self.append_log("=" * 70)
         if moved_count == 0:
-            self.log("⚠️ 未找到带有指定前缀的文件夹。")
+            self.append_log("⚠️ 未找到带有指定前缀的文件夹。")
         else:
             if dry_run:
-                self.log(f"✅ 试运行完成！将移动 {moved_count} 个文件夹。")
+                self.append_log(f"✅ 试运行完成！将移动 {moved_count} 个文件夹。")
             else:
-                self.log(f"🎉 移动完成！成功移动 {moved_count} 个文件夹。")
-        self.log("任务结束。")
+                self.append_log(f"🎉 移动完成！成功移动 {moved_count} 个文件夹。")
+        self.append_log("任务结束。")
+
+    def cancel_move(self):
+        if self.executor is not None:
+            self.executor.cancel()
+            self.status_var.set("正在停止...")
 
 
 if __name__ == "__main__":
@@ -12,17 +12,22 @@ ONNX 类别查看与修改工具 (GUI版)
 """
 
 import os
-import onnx
+import sys
 import ast
 import tkinter as tk
+from pathlib import Path
 from tkinter import filedialog, messagebox, scrolledtext
 
+# 引入仓库根目录下的公共模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.onnx_meta import patch_onnx_metadata, read_onnx_metadata
+
 
 # ==================== 核心逻辑 ====================
 def get_class_names_from_onnx(onnx_path, log=None):
     try:
-        model = onnx.load(onnx_path)
-        meta = {prop.key: prop.value for prop in model.metadata_props}
+        # 只解析 metadata，不加载权重
+        meta = read_onnx_metadata(onnx_path)
     except Exception as e:
         if log: log(f"❌ 读取模型失败: {e}")
         return None
@@ -49,22 +54,8 @@ def get_class_names_from_onnx(onnx_path, log=None):
 
 def modify_class_names_in_onnx(onnx_path, output_path, new_names_dict, log=None):
     try:
-        model = onnx.load(onnx_path)
-        new_names_str = str(new_names_dict)
-
-        found = False
-        for prop in model.metadata_props:
-            if prop.key == "names":
-                prop.value = new_names_str
-                found = True
-                break
-        if not found:
-            model.metadata_props.append(
-                onnx.StringStringEntryProto(key="names", value=new_names_str)
-            )
-
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        onnx.save(model, output_path)
+        # 只改写 metadata 中的 names 条目，权重按原字节拷贝
+        patch_onnx_metadata(onnx_path, output_path, {"names": str(new_names_dict)})
         if log:
             log(f"✅ 模型已保存到: {output_path}")
             log(f"新的类别信息: {new_names_dict}")
@@ -3,7 +3,7 @@
 
 a = Analysis(
     ['4-14&18模型标签查看修改.py'],
-    pathex=[],
+    pathex=['..'],
     binaries=[],
     datas=[],
     hiddenimports=[],
@@ -3,7 +3,7 @@
 
 a = Analysis(
     ['3-5前缀文件夹移动.py'],
-    pathex=[],
+    pathex=['..'],
     binaries=[],
     datas=[],
     hiddenimports=[],
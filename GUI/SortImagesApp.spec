@@ -3,7 +3,7 @@
 
 a = Analysis(
     ['1-1SortImages.py'],
-    pathex=[],
+    pathex=['..'],
     binaries=[],
     datas=[],
     hiddenimports=[],
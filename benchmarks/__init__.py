@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""
+性能基准
+
+在本地生成合成数据集（LabelMe / YOLO，工位目录与 CutAIImage 结构），对各分类目录下脚本的核心函数计时，
+结果保存为 JSON，便于前后版本对比。入口见 run_benchmarks.py；latency.py 模拟网络盘延迟并统计文件系统往返次数。
+"""
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+模拟网络盘延迟的文件系统垫片
+
+本地磁盘上每次 stat / 列目录 / 打开文件只需微秒级，在 SMB 网络盘（Y:\\ S:\\ U:\\）上每次却是一次几毫秒的往返，
+本地测试看不出脚本在网络盘上慢在哪里。SimulatedShare 在进程内临时替换 os / shutil 使用的文件系统函数：
+  - 只对指定目录（模拟的网络盘）下的路径生效，其他路径不受影响
+  - 每次调用按类别计数（stat / 列目录 / 打开 / 创建目录 / 删除 / 重命名 ...），并按 latency_ms 休眠，模拟一次往返
+  - 列目录按每 list_batch 个条目再计一次往返（SMB 分批返回目录项）
+  - 休眠在锁外进行，多线程并发访问时与真实网络盘一样可以重叠等待，能体现并发遍历 / 复制的效果
+
+不需要 LD_PRELOAD 或 FUSE，只影响经过 Python os / open 的调用：np.fromfile / ndarray.tofile 内部使用 Python 的
+open，会计入；C 扩展内部直接打开的文件（如 cv2.imread / cv2.imwrite）不计入。Linux 上 DirEntry.is_dir()
+使用目录项自带的类型、不产生调用，与 Windows 上列目录直接返回属性的行为一致；DirEntry.stat() 在 C 中实现，也不计入。
+
+用法：
+
+    with SimulatedShare(r"D:\\data", latency_ms=2) as share:
+        collect_pairs(r"D:\\data", exts)
+    print(share.counts, share.round_trips)
+"""
+
+import builtins
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Tuple
+
+# 被替换的函数：(模块, 属性名, 计数类别)
+_PATCHES: List[Tuple[Any, str, str]] = [
+    (os, "stat", "stat"),
+    (os, "lstat", "stat"),
+    (os, "listdir", "listdir"),
+    (os, "mkdir", "mkdir"),
+    (os, "rmdir", "remove"),
+    (os, "remove", "remove"),
+    (os, "unlink", "remove"),
+    (os, "rename", "rename"),
+    (os, "replace", "rename"),
+    (os, "link", "link"),
+    (os, "utime", "setattr"),
+    (os, "chmod", "setattr"),
+    (os, "open", "open"),
+    (builtins, "open", "open"),
+]
+
+# 单参数以外、需要检查第二个路径的操作（rename / replace / link 的目标）
+_TWO_PATHS = {"rename", "link"}
+
+
+class _ScandirProxy:
+    """包装 os.scandir 的迭代器：每取出 list_batch 个条目计一次往返"""
+
+    def __init__(self, share: "SimulatedShare", it):
+        self._share = share
+        self._it = it
+        self._count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        entry = next(self._it)
+        self._count += 1
+        if self._count % self._share.list_batch == 0:
+            self._share._hit("listdir")
+        return entry
+
+    def close(self) -> None:
+        self._it.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SimulatedShare:
+    """
+    Args:
+        root: 模拟网络盘的目录（其下路径的访问计数并加延迟）
+        latency_ms: 每次往返的延迟（毫秒），0 表示只计数不加延迟
+        list_batch: 列目录时每次往返返回的条目数
+    """
+
+    def __init__(self, root: str, latency_ms: float = 0.0, list_batch: int = 512):
+        self.root = os.path.normcase(os.path.abspath(root))
+        self.latency = latency_ms / 1000.0
+        self.list_batch = max(1, list_batch)
+        self.counts: Counter = Counter()
+        self._lock = threading.Lock()
+        self._originals: List[Tuple[Any, str, Any]] = []
+
+    # ---------- 统计 ----------
+
+    @property
+    def round_trips(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def simulated_wait(self) -> float:
+        """累计的模拟等待时间（秒，各线程相加）"""
+        return self.round_trips * self.latency
+
+    def summary(self) -> Dict[str, Any]:
+        return {"round_trips": self.round_trips, "ops": dict(sorted(self.counts.items())),
+                "latency_ms": self.latency * 1000}
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts.clear()
+
+    # ---------- 替换 ----------
+
+    def _inside(self, path) -> bool:
+        if isinstance(path, int):  # 文件描述符
+            return False
+        try:
+            path = os.fsdecode(os.fspath(path))
+        except TypeError:
+            return False
+        path = os.path.normcase(os.path.abspath(path))
+        return path == self.root or path.startswith(self.root + os.sep)
+
+    def _hit(self, kind: str) -> None:
+        with self._lock:
+            self.counts[kind] += 1
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def _wrap(self, func: Callable, kind: str) -> Callable:
+        share = self
+
+        def wrapper(*args, **kwargs):
+            inside = bool(args) and share._inside(args[0])
+            if not inside and kind in _TWO_PATHS and len(args) > 1:
+                inside = share._inside(args[1])
+            if inside:
+                share._hit(kind)
+            return func(*args, **kwargs)
+
+        wrapper.__wrapped__ = func
+        return wrapper
+
+    def _wrap_scandir(self, func: Callable) -> Callable:
+        share = self
+
+        def scandir(path="."):
+            it = func(path)
+            if not share._inside(path):
+                return it
+            share._hit("listdir")
+            return _ScandirProxy(share, it)
+
+        scandir.__wrapped__ = func
+        return scandir
+
+    def _wrap_listdir(self, func: Callable) -> Callable:
+        share = self
+
+        def listdir(path="."):
+            names = func(path)
+            if share._inside(path):
+                share._hit("listdir")
+                for _ in range(len(names) // share.list_batch):
+                    share._hit("listdir")
+            return names
+
+        listdir.__wrapped__ = func
+        return listdir
+
+    def _set(self, module: Any, name: str, value: Any) -> None:
+        self._originals.append((module, name, getattr(module, name)))
+        setattr(module, name, value)
+
+    def __enter__(self) -> "SimulatedShare":
+        if self._originals:
+            raise RuntimeError("SimulatedShare 不能嵌套进入")
+        for module, name, kind in _PATCHES:
+            original = getattr(module, name)
+            wrapped = self._wrap_listdir(original) if name == "listdir" else self._wrap(original, kind)
+            self._set(module, name, wrapped)
+        self._set(os, "scandir", self._wrap_scandir(os.scandir))
+        return self
+
+    def __exit__(self, *exc) -> None:
+        for module, name, original in reversed(self._originals):
+            setattr(module, name, original)
+        self._originals.clear()
+
+
+def measure(func: Callable[[], Any], root: str, latency_ms: float = 0.0,
+            list_batch: int = 512) -> Tuple[Any, float, Dict[str, Any]]:
+    """
+    在模拟网络盘上执行 func()
+
+    Returns:
+        (func 的返回值, 耗时（秒）, SimulatedShare.summary())
+    """
+    with SimulatedShare(root, latency_ms, list_batch) as share:
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+    return result, elapsed, share.summary()
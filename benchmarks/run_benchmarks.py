@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+文件处理脚本性能基准
+
+在本地生成合成数据集，对各脚本的核心函数计时，结果保存为 JSON；指定上一次的结果文件时逐项对比，
+标出变慢 / 变快的函数：
+  - collect_pairs（copy_defect_pairs.py）：遍历并配对图片与 JSON
+  - process_single_directory（count_defects.py）：统计 LabelMe 标签
+  - LabelChanger.process_all_folders（change_labels_simple.py）：查找工位目录并改写标签（在数据副本上运行）
+  - process_folder（wh_cut_image.py）：纵横裁图
+  - copy_files_with_modified_tags（copy_annotated_files_b747hinge.py）：复制标注并给标签加工位后缀
+  - organize_images_by_prefix（organize_images_CutAllmage.py）：CutAIImage 按前缀分类复制
+  - count_labels_in_folder（yolo_label_counter.py）：统计 YOLO 标签
+
+脚本目录名含中文与连字符，不能直接 import，这里按文件路径加载模块（只执行模块顶层，不运行 main）。
+计时期间脚本的控制台输出重定向到空设备，避免终端刷新速度影响结果。
+数据集参数不变时复用上次生成的数据；文件在系统缓存中，测到的是热缓存下的耗时。
+"""
+
+import contextlib
+import hashlib
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 引入仓库根目录下的公共模块
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+from benchmarks.latency import SimulatedShare
+from benchmarks.synthetic import make_cutai_tree, make_labelme_tree, make_yolo_tree
+
+# ==================== 配置区域 ====================
+# 合成数据目录（建议本地磁盘）
+WORK_DIR = os.path.join(tempfile.gettempdir(), "tools_benchmark")
+
+# LabelMe 数据集：批次数、工位目录嵌套深度、工位名、每个工位目录的图片数、图片尺寸
+LABELME_BATCHES = 4
+LABELME_DEPTH = 2
+STATIONS = ["A1", "B1", "C1"]
+FILES_PER_DIR = 200
+IMAGE_SIZE = (256, 192)
+
+# 标签分布（权重）、每张图片最多标注数、无标注图片比例
+LABEL_WEIGHTS = {"划伤": 50, "压伤": 30, "碰伤": 15, "脏污": 5}
+MAX_SHAPES = 3
+EMPTY_RATIO = 0.1
+
+# JSON 中内嵌 imageData（base64 图片，文件大小与读取耗时明显增加）
+EMBED_IMAGE_DATA = True
+
+# CutAIImage 数据集：批次数、前缀、每个前缀的图片数、带 JSON 的比例
+CUTAI_BATCHES = 4
+CUTAI_PREFIXES = ["A1", "B1", "C1", "D1"]
+FILES_PER_PREFIX = 200
+CUTAI_JSON_RATIO = 0.5
+
+# YOLO 数据集：子集、每个子集的 txt 数、类别数
+YOLO_SUBSETS = ["train", "val"]
+FILES_PER_SUBSET = 2000
+NUM_CLASSES = 4
+
+# 要运行的基准（为空则全部运行）
+BENCHMARKS = []
+
+# 每项重复次数（取中位数对比）
+REPEAT = 3
+
+# 结果文件（为空则保存到 benchmarks/results/bench_<时间>.json）
+OUTPUT_JSON = ""
+
+# 对比基准：上一次的结果文件；为空则不对比
+BASELINE_JSON = ""
+
+# 中位数耗时变化超过该比例时标记为变慢 / 变快
+REGRESSION_THRESHOLD = 0.10
+
+# 统计文件系统往返次数：计时结束后在模拟网络盘（benchmarks/latency.py）上再运行一次，
+# 记录 stat / 列目录 / 打开 等调用次数，以及每次往返加 FS_LATENCY_MS 毫秒延迟时的耗时
+COUNT_FS_OPS = True
+FS_LATENCY_MS = 0.0
+# 列目录时每次往返返回的条目数
+FS_LIST_BATCH = 512
+
+# 随机种子（相同参数生成相同数据）
+SEED = 0
+# ==================== 配置区域结束 ====================
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff"}
+
+_modules: Dict[str, Any] = {}
+
+
+def load_script(rel_path: str):
+    """按路径加载仓库中的脚本模块（同一路径只加载一次）"""
+    if rel_path not in _modules:
+        path = REPO_ROOT / rel_path
+        name = "bench_" + hashlib.md5(rel_path.encode("utf-8")).hexdigest()[:8]
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _modules[rel_path] = module
+    return _modules[rel_path]
+
+
+@contextlib.contextmanager
+def quiet():
+    """计时期间丢弃脚本的控制台输出"""
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+# ==================== 数据集 ====================
+
+def dataset_params() -> Dict[str, Any]:
+    return {
+        "labelme": dict(batches=LABELME_BATCHES, depth=LABELME_DEPTH, stations=list(STATIONS),
+                        files_per_dir=FILES_PER_DIR, image_size=list(IMAGE_SIZE), label_weights=LABEL_WEIGHTS,
+                        max_shapes=MAX_SHAPES, empty_ratio=EMPTY_RATIO, embed_image_data=EMBED_IMAGE_DATA,
+                        seed=SEED),
+        "cutai": dict(batches=CUTAI_BATCHES, prefixes=list(CUTAI_PREFIXES), files_per_prefix=FILES_PER_PREFIX,
+                      json_ratio=CUTAI_JSON_RATIO, seed=SEED),
+        "yolo": dict(subsets=list(YOLO_SUBSETS), files_per_subset=FILES_PER_SUBSET, num_classes=NUM_CLASSES,
+                     seed=SEED),
+    }
+
+
+def prepare_datasets(work_dir: str) -> Dict[str, Any]:
+    """生成（或复用）合成数据集，返回各数据集的目录与统计"""
+    params = dataset_params()
+    marker = os.path.join(work_dir, "_dataset.json")
+    try:
+        with open(marker, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved.get("params") == params:
+            print(f"复用已生成的数据集: {work_dir}")
+            return saved
+    except (OSError, ValueError):
+        pass
+
+    if os.path.isdir(work_dir):
+        shutil.rmtree(work_dir)
+    print(f"生成数据集: {work_dir}")
+    start = time.perf_counter()
+    labelme_kwargs = dict(params["labelme"], image_size=tuple(params["labelme"]["image_size"]))
+    makers = {
+        "labelme": lambda: make_labelme_tree(os.path.join(work_dir, "labelme"), **labelme_kwargs),
+        "cutai": lambda: make_cutai_tree(os.path.join(work_dir, "cutai"), **params["cutai"]),
+        "yolo": lambda: make_yolo_tree(os.path.join(work_dir, "yolo"), **params["yolo"]),
+    }
+    info: Dict[str, Any] = {"params": params}
+    for key, make in makers.items():
+        try:
+            info[key] = make()
+        except ImportError as e:  # 生成图片需要 opencv-python / numpy，未安装时只跳过用到该数据集的基准项
+            info[key] = {"skipped": str(e)}
+    print(f"  完成，用时 {time.perf_counter() - start:.1f} 秒")
+    # 有数据集未生成时不记录参数，下次重新生成
+    if not any("skipped" in info[key] for key in makers):
+        with open(marker, "w", encoding="utf-8") as f:
+            json.dump(info, f, ensure_ascii=False, indent=2)
+    return info
+
+
+def find_dirs(root: str, name: str) -> List[str]:
+    return sorted(os.path.join(dirpath, name) for dirpath, dirnames, _ in os.walk(root) if name in dirnames)
+
+
+# ==================== 基准项 ====================
+# 每项返回 (run, setup, cleanup)：run() 执行一次并返回处理的项目数；setup() 在每次计时前执行，
+# cleanup() 在全部计时结束后执行，删除输出，使数据集保持原样供其他基准项复用（均不计时）
+
+Case = Tuple[Callable[[], int], Optional[Callable[[], None]], Optional[Callable[[], None]]]
+
+
+def case_collect_pairs(work_dir: str) -> Case:
+    module = load_script("1-图片处理/7-复制对应缺陷图片文件/copy_defect_pairs.py")
+    root = os.path.join(work_dir, "labelme")
+    return (lambda: sum(1 for _ in module.collect_pairs(root, IMAGE_EXTS))), None, None
+
+
+def case_process_single_directory(work_dir: str) -> Case:
+    module = load_script("2-标签处理/8-查看图片标签数量(按照json)/count_defects.py")
+    root = os.path.join(work_dir, "labelme")
+    return (lambda: module.process_single_directory(root, IMAGE_EXTS)[3]), None, None
+
+
+def case_label_changer(work_dir: str) -> Case:
+    module = load_script("2-标签处理/6-修改标签信息/change_labels_simple.py")
+    source = os.path.join(work_dir, "labelme")
+    copy = os.path.join(work_dir, "labelme_change")
+    with quiet():
+        changer = module.LabelChanger([next(iter(LABEL_WEIGHTS))], ["已修改"])
+    # 处理的 JSON 数从数据上统计（folder_stats 按文件夹名记录，同名工位目录会互相覆盖）
+    total = sum(sum(1 for name in os.listdir(folder) if name.endswith(".json"))
+                for station in STATIONS for folder in find_dirs(source, station))
+
+    def setup():
+        # 改写标签会修改文件，每次在新的副本上运行
+        if os.path.isdir(copy):
+            shutil.rmtree(copy)
+        shutil.copytree(source, copy)
+
+    def run():
+        changer.process_all_folders(copy, list(STATIONS))
+        return total
+
+    return run, setup, lambda: shutil.rmtree(copy, ignore_errors=True)
+
+
+def case_wh_cut_process_folder(work_dir: str) -> Case:
+    module = load_script("1-图片处理/16-纵横裁图/wh_cut_image.py")
+    folders = find_dirs(os.path.join(work_dir, "labelme"), STATIONS[0])
+
+    def setup():
+        for folder in folders:
+            shutil.rmtree(folder + "_whalf_cut", ignore_errors=True)
+
+    def run():
+        for folder in folders:
+            module.process_folder(folder, "width")
+        return sum(len(os.listdir(folder + "_whalf_cut")) for folder in folders)
+
+    return run, setup, setup
+
+
+def case_copy_files_with_modified_tags(work_dir: str) -> Case:
+    module = load_script("2-标签处理/4-添加标签后缀/copy_annotated_files_b747hinge.py")
+    source = os.path.join(work_dir, "labelme")
+    target = os.path.join(work_dir, "labelme_suffix")
+
+    def setup():
+        shutil.rmtree(target, ignore_errors=True)
+
+    def run():
+        module.copy_files_with_modified_tags(source, target)
+        return sum(len(files) for _, _, files in os.walk(target))
+
+    return run, setup, setup
+
+
+def case_organize_images_by_prefix(work_dir: str) -> Case:
+    module = load_script("1-图片处理/1-从Cut中排列图片/organize_images_CutAllmage.py")
+    folders = find_dirs(os.path.join(work_dir, "cutai"), "CutAIImage")
+    result_root = os.path.join(work_dir, "cutai_result")
+
+    def setup():
+        shutil.rmtree(result_root, ignore_errors=True)
+
+    def run():
+        for i, folder in enumerate(folders):
+            module.organize_images_by_prefix(folder, os.path.join(result_root, f"{i:02d}"), f"{i:02d}")
+        return sum(len(files) for _, _, files in os.walk(result_root))
+
+    return run, setup, setup
+
+
+def case_yolo_count_labels(work_dir: str) -> Case:
+    module = load_script("2-标签处理/15-查看标签数量(按照txt)/yolo_label_counter.py")
+    folders = [os.path.join(work_dir, "yolo", subset) for subset in YOLO_SUBSETS]
+
+    def run():
+        return sum(sum(module.count_labels_in_folder(folder)[1].values()) for folder in folders)
+
+    return run, None, None
+
+
+# 各基准项使用的数据集
+CASE_DATASETS = {
+    "collect_pairs": "labelme",
+    "process_single_directory": "labelme",
+    "LabelChanger.process_all_folders": "labelme",
+    "wh_cut_image.process_folder": "labelme",
+    "copy_files_with_modified_tags": "labelme",
+    "organize_images_by_prefix": "cutai",
+    "yolo_label_counter.count_labels_in_folder": "yolo",
+}
+
+CASES: Dict[str, Callable[[str], Case]] = {
+    "collect_pairs": case_collect_pairs,
+    "process_single_directory": case_process_single_directory,
+    "LabelChanger.process_all_folders": case_label_changer,
+    "wh_cut_image.process_folder": case_wh_cut_process_folder,
+    "copy_files_with_modified_tags": case_copy_files_with_modified_tags,
+    "organize_images_by_prefix": case_organize_images_by_prefix,
+    "yolo_label_counter.count_labels_in_folder": case_yolo_count_labels,
+}
+
+
+# ==================== 计时与对比 ====================
+
+def time_case(name: str, work_dir: str) -> Dict[str, Any]:
+    with quiet():
+        run, setup, cleanup = CASES[name](work_dir)
+    times = []
+    items = 0
+    for _ in range(max(1, REPEAT)):
+        if setup is not None:
+            setup()
+        with quiet():
+            start = time.perf_counter()
+            items = run()
+            times.append(time.perf_counter() - start)
+    fs = None
+    if COUNT_FS_OPS:
+        if setup is not None:
+            setup()
+        with quiet(), SimulatedShare(work_dir, FS_LATENCY_MS, FS_LIST_BATCH) as share:
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+        fs = dict(share.summary(), elapsed=round(elapsed, 6))
+    if cleanup is not None:
+        cleanup()
+    median = statistics.median(times)
+    result = {
+        "times": [round(t, 6) for t in times],
+        "min": round(min(times), 6),
+        "median": round(median, 6),
+        "items": items,
+        "items_per_sec": round(items / median, 1) if median > 0 else None,
+    }
+    if fs is not None:
+        result["fs"] = fs
+    return result
+
+
+def git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=str(REPO_ROOT),
+                             capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def compare(results: Dict[str, Any], baseline_path: str) -> None:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f).get("results", {})
+    print(f"\n与基准对比: {baseline_path}")
+    for name, result in results.items():
+        old = baseline.get(name)
+        if "skipped" in result:
+            continue
+        if not old or not old.get("median"):
+            print(f"  {name:<45} 基准中没有该项")
+            continue
+        ratio = result["median"] / old["median"]
+        mark = ""
+        if ratio > 1 + REGRESSION_THRESHOLD:
+            mark = "  <-- 变慢"
+        elif ratio < 1 - REGRESSION_THRESHOLD:
+            mark = "  变快"
+        if result["items"] != old.get("items"):
+            mark += f"  (处理项目数不同: {old.get('items')} -> {result['items']})"
+        print(f"  {name:<45} {old['median']:>9.3f}s -> {result['median']:>9.3f}s  x{ratio:.2f}{mark}")
+        # 往返次数与机器快慢无关，变化即说明文件系统调用的方式变了
+        if "fs" in result and "fs" in old and result["fs"]["round_trips"] != old["fs"]["round_trips"]:
+            print(f"  {'':<45} 往返次数 {old['fs']['round_trips']} -> {result['fs']['round_trips']}")
+
+
+def main():
+    print("文件处理脚本性能基准")
+    print("=" * 60)
+    work_dir = os.path.abspath(WORK_DIR)
+    datasets = prepare_datasets(work_dir)
+    for key in ("labelme", "cutai", "yolo"):
+        print(f"  {key}: {datasets[key]}")
+
+    names = BENCHMARKS or list(CASES)
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        raise ValueError(f"未知的基准项: {unknown}，可选: {list(CASES)}")
+
+    results: Dict[str, Any] = {}
+    print(f"\n计时（每项 {REPEAT} 次）:")
+    for name in names:
+        dataset = datasets[CASE_DATASETS[name]]
+        if "skipped" in dataset:
+            results[name] = {"skipped": dataset["skipped"]}
+            print(f"  {name:<45} 跳过: {dataset['skipped']}")
+            continue
+        try:
+            result = time_case(name, work_dir)
+        except ImportError as e:  # 脚本的依赖未安装
+            results[name] = {"skipped": str(e)}
+            print(f"  {name:<45} 跳过: {e}")
+            continue
+        results[name] = result
+        print(f"  {name:<45} 中位数 {result['median']:>9.3f}s  最快 {result['min']:>9.3f}s  "
+              f"{result['items']:>7} 项  {result['items_per_sec'] or 0:>10.1f} 项/秒")
+        if "fs" in result:
+            fs = result["fs"]
+            ops = "，".join(f"{op} {count}" for op, count in fs["ops"].items())
+            latency = f"，延迟 {FS_LATENCY_MS:g}ms 时 {fs['elapsed']:.3f}s" if FS_LATENCY_MS > 0 else ""
+            print(f"  {'':<45} 往返 {fs['round_trips']} 次（{ops}）{latency}")
+
+    # 先对比再保存，结果文件与基准文件相同时也能对比
+    if BASELINE_JSON:
+        compare(results, BASELINE_JSON)
+
+    output = OUTPUT_JSON or str(REPO_ROOT / "benchmarks" / "results" /
+                                f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    report = {
+        "meta": {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "git": git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": REPEAT,
+            "work_dir": work_dir,
+        },
+        "datasets": {key: datasets[key] for key in ("params", "labelme", "cutai", "yolo")},
+        "results": results,
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果文件: {output}")
+
+
+if __name__ == "__main__":
+    main()
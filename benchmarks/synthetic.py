@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+合成数据集生成
+
+按与产线数据相同的目录结构生成图片与标注，供基准测试使用：
+  - make_labelme_tree：<根>/<批次>/.../<工位 A1、B1 ...>/<名称>.jpg + <名称>.json（LabelMe，可内嵌 imageData）
+  - make_cutai_tree：<根>/<批次>/CutAIImage/<前缀>_<序号>.png + .json（organize_images_CutAllmage.py 的输入）
+  - make_yolo_tree：<根>/<子集>/<名称>.txt（YOLO，每行 类别编号 + 归一化框）
+
+同一尺寸的图片只编码一次，之后直接写入相同字节，生成数万个文件也只需几秒。
+标签按权重随机抽取（固定随机种子，结果可复现）。
+
+依赖：opencv-python、numpy（只有生成图片时需要；未安装时仍可生成 YOLO 标注）
+"""
+
+import base64
+import json
+import os
+import random
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:  # 只有 encode_image 需要
+    cv2 = None
+    np = None
+
+DEFAULT_LABEL_WEIGHTS = {"划伤": 50, "压伤": 30, "碰伤": 15, "脏污": 5}
+
+
+def encode_image(size: Tuple[int, int], ext: str = ".jpg", seed: int = 0) -> bytes:
+    """生成 (宽, 高) 的噪声图片并编码（噪声图的压缩率与实拍图接近，文件大小更真实）"""
+    if cv2 is None:
+        raise ImportError("生成合成图片需要 opencv-python 与 numpy（pip install opencv-python numpy）")
+    rng = np.random.default_rng(seed)
+    img = rng.integers(0, 256, (size[1], size[0], 3), dtype=np.uint8)
+    ok, buf = cv2.imencode(ext, img)
+    if not ok:
+        raise ValueError(f"无法编码 {ext}")
+    return buf.tobytes()
+
+
+def random_labels(rng: random.Random, weights: Dict[str, float], max_shapes: int, empty_ratio: float) -> List[str]:
+    """按权重抽取一张图片的标签（empty_ratio 的图片没有标注）"""
+    if max_shapes <= 0 or rng.random() < empty_ratio:
+        return []
+    names, values = list(weights), list(weights.values())
+    return rng.choices(names, values, k=rng.randint(1, max_shapes))
+
+
+def labelme_json(image_name: str, labels: Sequence[str], size: Tuple[int, int], rng: random.Random,
+                 image_bytes: Optional[bytes] = None) -> Dict:
+    """构造 LabelMe 标注（矩形与多边形交替）"""
+    width, height = size
+    shapes = []
+    for i, label in enumerate(labels):
+        x, y = rng.uniform(0, width * 0.8), rng.uniform(0, height * 0.8)
+        w, h = rng.uniform(4, width * 0.2), rng.uniform(4, height * 0.2)
+        if i % 2 == 0:
+            points, shape_type = [[x, y], [x + w, y + h]], "rectangle"
+        else:
+            points, shape_type = [[x, y], [x + w, y], [x + w, y + h], [x, y + h]], "polygon"
+        shapes.append({"label": label, "points": points, "group_id": None, "description": "",
+                       "shape_type": shape_type, "flags": {}})
+    return {
+        "version": "5.2.1",
+        "flags": {},
+        "shapes": shapes,
+        "imagePath": image_name,
+        "imageData": base64.b64encode(image_bytes).decode("ascii") if image_bytes is not None else None,
+        "imageHeight": height,
+        "imageWidth": width,
+    }
+
+
+def make_labelme_tree(root: str, batches: int = 2, depth: int = 1, stations: Sequence[str] = ("A1", "B1"),
+                      files_per_dir: int = 100, image_size: Tuple[int, int] = (256, 192),
+                      label_weights: Optional[Dict[str, float]] = None, max_shapes: int = 3,
+                      empty_ratio: float = 0.1, embed_image_data: bool = False, seed: int = 0) -> Dict[str, int]:
+    """
+    生成 LabelMe 数据集：<root>/batch_XX/(sub_X/ * depth-1)/<工位>/<工位>_<序号>.jpg + .json
+
+    Returns:
+        {'dirs': 工位目录数, 'images': 图片数, 'jsons': JSON 数, 'shapes': 标注数, 'bytes': 总字节数}
+    """
+    rng = random.Random(seed)
+    weights = label_weights or DEFAULT_LABEL_WEIGHTS
+    image_bytes = encode_image(image_size, ".jpg", seed)
+    stats = {"dirs": 0, "images": 0, "jsons": 0, "shapes": 0, "bytes": 0}
+    for b in range(batches):
+        parent = os.path.join(root, f"batch_{b:02d}", *[f"sub_{d}" for d in range(depth - 1)])
+        for station in stations:
+            folder = os.path.join(parent, station)
+            os.makedirs(folder, exist_ok=True)
+            stats["dirs"] += 1
+            for i in range(files_per_dir):
+                name = f"{station}_{b:02d}{i:05d}"
+                with open(os.path.join(folder, name + ".jpg"), "wb") as f:
+                    f.write(image_bytes)
+                labels = random_labels(rng, weights, max_shapes, empty_ratio)
+                data = labelme_json(name + ".jpg", labels, image_size, rng,
+                                    image_bytes if embed_image_data else None)
+                text = json.dumps(data, ensure_ascii=False, indent=2)
+                with open(os.path.join(folder, name + ".json"), "w", encoding="utf-8") as f:
+                    f.write(text)
+                stats["images"] += 1
+                stats["jsons"] += 1
+                stats["shapes"] += len(labels)
+                stats["bytes"] += len(image_bytes) + len(text.encode("utf-8"))
+    return stats
+
+
+def make_cutai_tree(root: str, batches: int = 2, prefixes: Sequence[str] = ("A1", "B1", "C1"),
+                    files_per_prefix: int = 100, image_size: Tuple[int, int] = (128, 128),
+                    label_weights: Optional[Dict[str, float]] = None, json_ratio: float = 0.5,
+                    seed: int = 0) -> Dict[str, int]:
+    """
+    生成 CutAIImage 数据集：<root>/batch_XX/CutAIImage/<前缀>_<序号>.png，其中 json_ratio 的图片带同名 JSON
+
+    Returns:
+        {'dirs': CutAIImage 目录数, 'images': 图片数, 'jsons': JSON 数, 'bytes': 总字节数}
+    """
+    rng = random.Random(seed)
+    weights = label_weights or DEFAULT_LABEL_WEIGHTS
+    image_bytes = encode_image(image_size, ".png", seed)
+    stats = {"dirs": 0, "images": 0, "jsons": 0, "bytes": 0}
+    for b in range(batches):
+        folder = os.path.join(root, f"batch_{b:02d}", "CutAIImage")
+        os.makedirs(folder, exist_ok=True)
+        stats["dirs"] += 1
+        for prefix in prefixes:
+            for i in range(files_per_prefix):
+                name = f"{prefix}_{b:02d}{i:05d}"
+                with open(os.path.join(folder, name + ".png"), "wb") as f:
+                    f.write(image_bytes)
+                stats["images"] += 1
+                stats["bytes"] += len(image_bytes)
+                if rng.random() < json_ratio:
+                    labels = random_labels(rng, weights, 3, 0.0)
+                    text = json.dumps(labelme_json(name + ".png", labels, image_size, rng), ensure_ascii=False)
+                    with open(os.path.join(folder, name + ".json"), "w", encoding="utf-8") as f:
+                        f.write(text)
+                    stats["jsons"] += 1
+                    stats["bytes"] += len(text.encode("utf-8"))
+    return stats
+
+
+def make_yolo_tree(root: str, subsets: Sequence[str] = ("train", "val"), files_per_subset: int = 500,
+                   num_classes: int = 4, class_weights: Optional[Sequence[float]] = None, max_boxes: int = 3,
+                   empty_ratio: float = 0.1, seed: int = 0) -> Dict[str, int]:
+    """
+    生成 YOLO 标注：<root>/<子集>/<子集>_<序号>.txt，另写 <root>/label_name.txt
+
+    Returns:
+        {'dirs': 子集数, 'txts': txt 数, 'boxes': 框数}
+    """
+    rng = random.Random(seed)
+    weights = list(class_weights) if class_weights else [1.0] * num_classes
+    stats = {"dirs": 0, "txts": 0, "boxes": 0}
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, "label_name.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(f"class_{i}" for i in range(num_classes)) + "\n")
+    for subset in subsets:
+        folder = os.path.join(root, subset)
+        os.makedirs(folder, exist_ok=True)
+        stats["dirs"] += 1
+        for i in range(files_per_subset):
+            lines = []
+            if rng.random() >= empty_ratio:
+                for class_id in rng.choices(range(num_classes), weights, k=rng.randint(1, max_boxes)):
+                    cx, cy, w, h = (rng.uniform(0.1, 0.9), rng.uniform(0.1, 0.9),
+                                    rng.uniform(0.01, 0.2), rng.uniform(0.01, 0.2))
+                    lines.append(f"{class_id} {cx:.6f} {cy:.6f} {w:.6f} {h:.6f}")
+            with open(os.path.join(folder, f"{subset}_{i:05d}.txt"), "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + ("\n" if lines else ""))
+            stats["txts"] += 1
+            stats["boxes"] += len(lines)
+    return stats
@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""
+公共模块
+
+各分类目录下的脚本与 GUI 共用的基础功能。脚本通过把仓库根目录加入 sys.path 引入：
+
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+    from common.fileops import FileOpExecutor
+"""
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+标注读取与标签扫描缓存
+
+  - read_json_labels：读取 LabelMe JSON 中 shapes[*].label（与 count_defects.py 的 read_labels 规则一致）
+  - read_json_shapes：只取出转换需要的字段（图片尺寸、每个 shape 的标签 / 类型 / 点）
+  - read_yolo_ids：读取 YOLO txt 每行的类别编号
+  - read_label_names：读取 label_name.txt（行号即类别编号，与 yolo_label_counter.py 的 load_label_mapping 一致）
+  - scan_labelme_spans / rewrite_labelme_bytes：一次顺序扫描定位 shapes[*].label 与 imagePath 的字符串位置，
+    只替换这些位置，文件其余内容（缩进、键顺序、imageData）逐字节保留
+  - LabelScanCache：递归扫描标注文件并缓存每个文件的标签，按 大小 + 修改时间 判断变化，再次扫描时只重新读取
+    新增或修改过的文件。缓存保存在用户缓存目录（不写入标注目录，避免被其他脚本当作标注 JSON 读取）
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import Counter
+from json.decoder import scanstring
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from common.fileops import FileOpExecutor
+
+try:
+    import chardet
+except ImportError:  # 可选依赖，未安装时依次尝试 utf-8 / gbk
+    chardet = None
+
+try:
+    import orjson
+except ImportError:  # 可选依赖，未安装时使用标准库 json
+    orjson = None
+
+# 缓存目录：环境变量 TOOLS_CACHE_DIR 优先，否则 Windows 为 %LOCALAPPDATA%\tools_cache，其他系统为 ~/.cache/tools_cache
+CACHE_DIR_ENV = "TOOLS_CACHE_DIR"
+LABEL_CACHE_SUBDIR = "label_scan"
+
+# kind -> (文件后缀, 跳过的文件名)
+LABEL_KINDS = {
+    "json": (".json", set()),
+    "txt": (".txt", {"classes.txt"}),
+}
+
+
+def normalize_label(label: str) -> str:
+    return (label or "").strip()
+
+
+def user_cache_dir(*parts: str) -> str:
+    """各脚本共用的本地缓存目录"""
+    base = os.environ.get(CACHE_DIR_ENV)
+    if not base:
+        if os.name == "nt":
+            base = os.path.join(os.environ.get("LOCALAPPDATA") or os.path.expanduser("~"), "tools_cache")
+        else:
+            base = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "tools_cache")
+    return os.path.join(base, *parts)
+
+
+def read_json_labels(json_path: str) -> List[str]:
+    """读取 LabelMe JSON 中的标签列表，读取或解析失败返回空列表"""
+    try:
+        return load_json_labels(json_path)
+    except Exception:
+        return []
+
+
+def load_json_labels(json_path: str) -> List[str]:
+    """同 read_json_labels，但读取或解析失败时抛出异常（供缓存区分失败与无标签）"""
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    shapes = data.get("shapes", []) if isinstance(data, dict) else []
+    labels: List[str] = []
+    if isinstance(shapes, list):
+        for item in shapes:
+            if not isinstance(item, dict):
+                continue
+            label = item.get("label")
+            if isinstance(label, str):
+                labels.append(normalize_label(label))
+            elif isinstance(label, list):
+                labels.extend([normalize_label(str(x)) for x in label])
+    return [l for l in labels if l]
+
+
+def load_json(path: str) -> Any:
+    """读取 JSON 文件（安装了 orjson 时使用 orjson，解析速度快数倍）"""
+    if orjson is not None:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def read_json_shapes(json_path: str) -> Tuple[Optional[int], Optional[int], List[Tuple[str, str, list]]]:
+    """
+    读取 LabelMe JSON 中转换所需的字段
+
+    Returns:
+        (imageWidth, imageHeight, [(标签, shape_type, points), ...])，缺失的尺寸为 None
+    """
+    data = load_json(json_path)
+    if not isinstance(data, dict):
+        raise ValueError("JSON 顶层不是对象")
+    shapes: List[Tuple[str, str, list]] = []
+    for item in data.get("shapes") or []:
+        if not isinstance(item, dict):
+            continue
+        label = item.get("label")
+        points = item.get("points")
+        if not isinstance(label, str) or not points:
+            continue
+        shapes.append((normalize_label(label), item.get("shape_type") or "polygon", points))
+    return data.get("imageWidth"), data.get("imageHeight"), shapes
+
+
+# ---------- LabelMe 字段定位与改写 ----------
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_UTF8_BOM = b"\xef\xbb\xbf"
+
+# 字符串值及其在文件字节中的位置：(值, 起始引号位置, 结束引号之后的位置)
+StringSpan = Tuple[str, int, int]
+
+
+class LabelmeSpans(NamedTuple):
+    image_path: Optional[StringSpan]
+    labels: List[StringSpan]
+
+
+def _skip_ws(text: str, i: int) -> int:
+    while text[i] in _WHITESPACE:
+        i += 1
+    return i
+
+
+def _scan_container(text: str, i: int, close: str, on_item: Callable[[int], int]) -> int:
+    """i 指向 '{' 或 '['，对每一项调用 on_item(项起始位置) -> 项结束位置，返回容器结束之后的位置"""
+    i = _skip_ws(text, i + 1)
+    if text[i] == close:
+        return i + 1
+    while True:
+        i = _skip_ws(text, on_item(i))
+        if text[i] == ",":
+            i = _skip_ws(text, i + 1)
+        elif text[i] == close:
+            return i + 1
+        else:
+            raise ValueError(f"位置 {i} 处应为 ',' 或 {close!r}")
+
+
+def _scan_object(text: str, i: int, on_value: Callable[[str, int], int]) -> int:
+    """i 指向 '{'，对每个键调用 on_value(键, 值起始位置) -> 值结束位置"""
+
+    def member(i: int) -> int:
+        if text[i] != '"':
+            raise ValueError(f"位置 {i} 处应为键名")
+        key, i = scanstring(text, i + 1)
+        i = _skip_ws(text, i)
+        if text[i] != ":":
+            raise ValueError(f"位置 {i} 处应为 ':'")
+        return on_value(key, _skip_ws(text, i + 1))
+
+    return _scan_container(text, i, "}", member)
+
+
+def _skip_value(text: str, i: int) -> int:
+    """跳过一个值；不含转义的字符串（如 imageData 的 base64）直接查找结束引号，其余交给 json 的 C 扫描器"""
+    if text[i] == '"':
+        end = text.find('"', i + 1)
+        if end > 0 and text.find("\\", i + 1, end) < 0:
+            return end + 1
+    return _DECODER.raw_decode(text, i)[1]
+
+
+def scan_labelme_spans(data: bytes) -> LabelmeSpans:
+    """
+    顺序扫描一遍 LabelMe JSON 文件内容，定位 imagePath 与每个 shapes[*].label 字符串在字节中的位置
+
+    只识别这两处：imageData、flags 或其他位置出现的 "label" 不会被误改；非字符串的标签跳过。
+    扫描时按 latin-1 把字节一一映射为字符（UTF-8 多字节序列不含 ASCII 字节，引号与括号的判断不受影响），
+    位置即字节偏移，整个文件不需要按 UTF-8 解码再编码，只解码定位到的标签与路径。
+    内容不是合法 JSON 时抛出 ValueError（json.JSONDecodeError、UnicodeDecodeError 都是其子类）。
+    """
+    text = data.decode("latin-1")
+    image_path: List[StringSpan] = []
+    labels: List[StringSpan] = []
+
+    def string_span(i: int) -> StringSpan:
+        end = scanstring(text, i + 1)[1]
+        raw = data[i:end]
+        value = raw[1:-1].decode("utf-8") if b"\\" not in raw else json.loads(raw.decode("utf-8"))
+        return value, i, end
+
+    def shape_value(key: str, i: int) -> int:
+        if key == "label" and text[i] == '"':
+            span = string_span(i)
+            labels.append(span)
+            return span[2]
+        return _skip_value(text, i)
+
+    def shape(i: int) -> int:
+        if text[i] != "{":
+            return _skip_value(text, i)
+        return _scan_object(text, i, shape_value)
+
+    def top_value(key: str, i: int) -> int:
+        if key == "shapes" and text[i] == "[":
+            return _scan_container(text, i, "]", shape)
+        if key == "imagePath" and text[i] == '"':
+            span = string_span(i)
+            image_path[:] = [span]
+            return span[2]
+        return _skip_value(text, i)
+
+    try:
+        start = _skip_ws(text, len(_UTF8_BOM) if data.startswith(_UTF8_BOM) else 0)
+        if text[start] != "{":
+            raise ValueError("JSON 顶层不是对象")
+        end = _scan_object(text, start, top_value)
+    except IndexError:
+        raise ValueError("JSON 内容不完整") from None
+    while end < len(text) and text[end] in _WHITESPACE:
+        end += 1
+    if end < len(text):
+        raise ValueError(f"位置 {end} 之后有多余内容")
+    return LabelmeSpans(image_path[0] if image_path else None, labels)
+
+
+def _encode_string(value: str, original: bytes) -> bytes:
+    """编码替换后的字符串；原值使用 \\u 转义时保持转义风格"""
+    return json.dumps(value, ensure_ascii=b"\\u" in original).encode("utf-8")
+
+
+def rewrite_labelme_bytes(data: bytes, spans: LabelmeSpans, relabel: Optional[Callable[[str], str]] = None,
+                          image_path: Optional[str] = None) -> Tuple[bytes, int]:
+    """
+    按 scan_labelme_spans 的结果替换标签与 imagePath，其余字节原样保留
+
+    Args:
+        relabel: 标签 -> 新标签；为空则不改标签
+        image_path: 新的 imagePath；为空或与原值相同则不改
+
+    Returns:
+        (新内容, 修改的标签数)
+    """
+    edits: List[Tuple[int, int, bytes]] = []
+    if relabel is not None:
+        for value, start, end in spans.labels:
+            new_value = relabel(value)
+            if new_value != value:
+                edits.append((start, end, _encode_string(new_value, data[start:end])))
+    changed = len(edits)
+    if image_path is not None and spans.image_path is not None and image_path != spans.image_path[0]:
+        _, start, end = spans.image_path
+        edits.append((start, end, _encode_string(image_path, data[start:end])))
+    if not edits:
+        return data, 0
+    edits.sort()
+    pieces: List[bytes] = []
+    pos = 0
+    for start, end, replacement in edits:
+        pieces.append(data[pos:start])
+        pieces.append(replacement)
+        pos = end
+    pieces.append(data[pos:])
+    return b"".join(pieces), changed
+
+
+def read_yolo_ids(txt_path: str) -> List[int]:
+    """读取 YOLO txt 中每行的类别编号，无法解析的行跳过"""
+    ids: List[int] = []
+    with open(txt_path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            parts = line.split()
+            if parts:
+                try:
+                    ids.append(int(parts[0]))
+                except ValueError:
+                    continue
+    return ids
+
+
+def detect_encoding(path: str) -> str:
+    with open(path, "rb") as f:
+        raw = f.read(20000)
+    if chardet is not None:
+        return chardet.detect(raw)["encoding"] or "utf-8"
+    for encoding in ("utf-8", "gbk"):
+        try:
+            raw.decode(encoding)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return "utf-8"
+
+
+def read_label_names(mapping_file: str) -> Dict[int, str]:
+    """读取 label_name.txt，返回 {行号: 类别名}（空行跳过但占用行号）"""
+    encoding = detect_encoding(mapping_file)
+    mapping: Dict[int, str] = {}
+    with open(mapping_file, "r", encoding=encoding, errors="ignore") as f:
+        for line_num, line in enumerate(f):
+            line = line.strip()
+            if line:
+                mapping[line_num] = line
+    return mapping
+
+
+class LabelScanCache:
+    """
+    标注文件标签扫描缓存
+
+    缓存文件按扫描根目录的路径命名，保存在 cache_dir（默认 user_cache_dir("label_scan")），不写入标注目录。
+    读取失败的文件本次按无标签处理（列在 failed 中），不写入缓存，下次扫描重新读取。
+
+    Args:
+        root: 扫描根目录
+        kind: "json"（LabelMe）或 "txt"（YOLO）
+        cache_dir: 缓存文件目录
+    """
+
+    def __init__(self, root: str, kind: str = "json", cache_dir: Optional[str] = None):
+        if kind not in LABEL_KINDS:
+            raise ValueError(f"不支持的标注类型: {kind}")
+        self.root = os.path.abspath(root)
+        self.kind = kind
+        key = hashlib.sha1(os.path.normcase(self.root).encode("utf-8")).hexdigest()[:16]
+        self.path = os.path.join(cache_dir or user_cache_dir(LABEL_CACHE_SUBDIR), f"{key}_{kind}.json")
+        self.reader: Callable[[str], List[Any]] = load_json_labels if kind == "json" else read_yolo_ids
+        self.files: Dict[str, List[Any]] = {}
+        self.failed: List[Tuple[str, Exception]] = []
+        self._lock = threading.Lock()
+        if os.path.isfile(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("root") == self.root and data.get("kind") == kind:
+                    self.files = data.get("files", {})
+            except (OSError, ValueError, AttributeError):
+                self.files = {}
+
+    def list_files(self) -> Dict[str, Tuple[int, int]]:
+        """递归列出标注文件，返回 {相对路径: (大小, mtime_ns)}"""
+        suffix, skip_names = LABEL_KINDS[self.kind]
+        result: Dict[str, Tuple[int, int]] = {}
+        stack = [("", self.root)]
+        while stack:
+            rel_dir, abs_dir = stack.pop()
+            try:
+                it = os.scandir(abs_dir)
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append((rel, entry.path))
+                    elif entry.name.lower().endswith(suffix) and entry.name not in skip_names:
+                        st = entry.stat()
+                        result[rel] = (st.st_size, st.st_mtime_ns)
+        return result
+
+    def scan(self, executor: Optional[FileOpExecutor] = None) -> Tuple[Dict[str, List[Any]], int]:
+        """
+        扫描并更新缓存
+
+        Returns:
+            ({相对路径: 标签列表}, 重新读取的文件数)
+        """
+        current = self.list_files()
+        stale = [rel for rel, (size, mtime_ns) in current.items()
+                 if rel not in self.files or self.files[rel][0] != size or self.files[rel][1] != mtime_ns]
+
+        def read(rel):
+            size, mtime_ns = current[rel]
+            labels = self.reader(os.path.join(self.root, rel))
+            with self._lock:
+                self.files[rel] = [size, mtime_ns, labels]
+            return size
+
+        executor = executor or FileOpExecutor()
+        stats = executor.run(read, stale)
+        self.failed = stats["errors"]
+        with self._lock:
+            # 读取失败的文件不保留旧缓存，下次扫描重新读取；本次按无标签返回
+            for rel, _ in self.failed:
+                self.files.pop(rel, None)
+            self.files = {rel: entry for rel, entry in self.files.items() if rel in current}
+            labels = {rel: entry[2] for rel, entry in self.files.items()}
+        for rel, _ in self.failed:
+            labels[rel] = []
+        return labels, len(stale)
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"root": self.root, "kind": self.kind, "files": self.files}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+def scan_label_counts(root: str, kind: str = "json", use_cache: bool = True) -> Dict[str, Any]:
+    """
+    统计目录下的标签数量（使用扫描缓存）
+
+    Returns:
+        {'labels': Counter 标注次数, 'images': Counter 含该标签的文件数, 'files': 标注文件数, 'reread': 重新读取数}
+    """
+    cache = LabelScanCache(root, kind)
+    if not use_cache:
+        cache.files = {}
+    files, reread = cache.scan()
+    if use_cache:
+        cache.save()
+    label_counter: Counter = Counter()
+    image_counter: Counter = Counter()
+    for labels in files.values():
+        label_counter.update(labels)
+        image_counter.update(set(labels))
+    return {"labels": label_counter, "images": image_counter, "files": len(files), "reread": reread}
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+带校验的复制与校验清单
+
+  - 复制时边读边算哈希（装了 xxhash 用 xxh3_128，否则用 hashlib.blake2b），不额外读取文件
+  - 哈希写入目标根目录下的清单文件（_checksums.json），记录 相对路径 -> [哈希, 大小, mtime_ns]
+  - 事后校验：大小与 mtime 未变的文件直接视为一致，只重新读取有变化的文件；full=True 时全部重读
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from common.fileops import FileOpExecutor, ensure_parent
+
+try:
+    import xxhash
+except ImportError:  # 可选依赖
+    xxhash = None
+
+MANIFEST_NAME = "_checksums.json"
+CHUNK_SIZE = 1024 * 1024
+
+
+def default_algorithm() -> str:
+    return "xxh3_128" if xxhash is not None else "blake2b"
+
+
+def new_hasher(algorithm: str):
+    if algorithm == "xxh3_128":
+        if xxhash is None:
+            raise RuntimeError("清单使用 xxh3_128，但未安装 xxhash（pip install xxhash）")
+        return xxhash.xxh3_128()
+    if algorithm == "blake2b":
+        return hashlib.blake2b(digest_size=16)
+    raise ValueError(f"不支持的哈希算法: {algorithm}")
+
+
+def hash_file(path: str, algorithm: str) -> str:
+    hasher = new_hasher(algorithm)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def copy_file_hashed(src: str, dst: str, algorithm: str) -> Tuple[int, str]:
+    """
+    流式复制单个文件并同时计算哈希（保留元数据，同 shutil.copy2）
+    写入字节数与源文件大小不符时抛出 OSError
+
+    Returns:
+        (字节数, 十六进制哈希)
+    """
+    ensure_parent(dst)
+    hasher = new_hasher(algorithm)
+    size = 0
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        for chunk in iter(lambda: fsrc.read(CHUNK_SIZE), b""):
+            hasher.update(chunk)
+            fdst.write(chunk)
+            size += len(chunk)
+    shutil.copystat(src, dst)
+    if os.path.getsize(dst) != size:
+        raise OSError(f"写入大小不一致: {dst}")
+    return size, hasher.hexdigest()
+
+
+class ChecksumManifest:
+    """
+    目标根目录下的校验清单，可在多线程中共用
+
+    Args:
+        root: 目标根目录，清单中的路径均相对于该目录
+        algorithm: 哈希算法；为空时沿用已有清单的算法，否则取默认
+    """
+
+    def __init__(self, root: str, algorithm: Optional[str] = None):
+        self.root = os.path.abspath(root)
+        self.path = os.path.join(self.root, MANIFEST_NAME)
+        self.files: Dict[str, List[Any]] = {}
+        self._lock = threading.Lock()
+        stored_algorithm = None
+        if os.path.isfile(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            stored_algorithm = data.get("algorithm")
+            self.files = data.get("files", {})
+        self.algorithm = algorithm or stored_algorithm or default_algorithm()
+        if stored_algorithm and stored_algorithm != self.algorithm:
+            # 算法不同的旧记录无法比较，丢弃
+            self.files = {}
+
+    def relpath(self, path: str) -> str:
+        return os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, "/")
+
+    def add(self, dst: str, digest: str, size: int) -> None:
+        st = os.stat(dst)
+        with self._lock:
+            self.files[self.relpath(dst)] = [digest, size, st.st_mtime_ns]
+
+    def copy(self, src: str, dst: str) -> int:
+        """带哈希复制并记录，返回字节数"""
+        size, digest = copy_file_hashed(src, dst, self.algorithm)
+        self.add(dst, digest, size)
+        return size
+
+    def lookup(self, path: str) -> Optional[str]:
+        """清单中已有记录且大小与 mtime 未变时返回记录的哈希，否则返回 None"""
+        entry = self.files.get(self.relpath(path))
+        if entry is None:
+            return None
+        st = os.stat(path)
+        return entry[0] if entry[1] == st.st_size and entry[2] == st.st_mtime_ns else None
+
+    def add_existing(self, dst: str, reference: Optional["ChecksumManifest"] = None,
+                     ref_path: Optional[str] = None) -> int:
+        """
+        记录未经复制的已有文件（增量同步跳过或硬链接的文件）。返回读取的字节数
+
+        依次使用 reference 清单中 ref_path 的记录、本清单中 dst 的已有记录，都没有时重新计算哈希
+        """
+        digest = None
+        if reference is not None and ref_path and reference.algorithm == self.algorithm:
+            digest = reference.lookup(ref_path)
+        digest = digest or self.lookup(dst)
+        nbytes = 0
+        if digest is None:
+            digest = hash_file(dst, self.algorithm)
+            nbytes = os.path.getsize(dst)
+        self.add(dst, digest, os.path.getsize(dst))
+        return nbytes
+
+    def save(self) -> None:
+        ensure_parent(self.path)
+        tmp_path = self.path + ".tmp"
+        with self._lock:
+            data = {"algorithm": self.algorithm, "files": self.files}
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+def list_tree_pairs(src_dir: str, dst_dir: str) -> List[Tuple[str, str]]:
+    """列出 src_dir 下所有文件及其在 dst_dir 中对应的路径（保持相对结构）"""
+    pairs = []
+    for root, dirs, files in os.walk(src_dir):
+        rel = os.path.relpath(root, src_dir)
+        out_dir = dst_dir if rel == "." else os.path.join(dst_dir, rel)
+        os.makedirs(out_dir, exist_ok=True)
+        for name in files:
+            pairs.append((os.path.join(root, name), os.path.join(out_dir, name)))
+    return pairs
+
+
+def copytree_verified(src_dir: str, dst_dir: str, executor: Optional[FileOpExecutor] = None,
+                      manifest: Optional[ChecksumManifest] = None) -> Dict[str, Any]:
+    """
+    复制整个目录（合并到已有目标），同时计算哈希并写入清单
+
+    Args:
+        manifest: 共用的清单（例如多个目录复制到同一输出根时）；为空时在 dst_dir 下新建并保存
+    """
+    own_manifest = manifest is None
+    manifest = manifest or ChecksumManifest(dst_dir)
+    executor = executor or FileOpExecutor()
+    stats = executor.run(lambda pair: manifest.copy(*pair), list_tree_pairs(src_dir, dst_dir))
+    if own_manifest:
+        manifest.save()
+    return stats
+
+
+def verify_manifest(root: str, full: bool = False, executor: Optional[FileOpExecutor] = None) -> Dict[str, List[str]]:
+    """
+    按清单校验目标目录
+
+    Args:
+        root: 含清单的目标根目录
+        full: True 时重读所有文件；False 时只重读大小或 mtime 有变化的文件
+
+    Returns:
+        {'ok': [...], 'skipped': [...], 'mismatch': [...], 'missing': [...], 'rehashed': [...]}
+        skipped 为大小与 mtime 未变、未重新读取的文件；rehashed 为重读后哈希一致的变化文件
+    """
+    manifest = ChecksumManifest(root)
+    result: Dict[str, List[str]] = {"ok": [], "skipped": [], "mismatch": [], "missing": [], "rehashed": []}
+    to_hash = []
+    for rel, (digest, size, mtime_ns) in manifest.files.items():
+        path = os.path.join(manifest.root, rel)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            result["missing"].append(rel)
+            continue
+        if not full and st.st_size == size and st.st_mtime_ns == mtime_ns:
+            result["skipped"].append(rel)
+        else:
+            to_hash.append((rel, path, digest, st.st_size == size and st.st_mtime_ns == mtime_ns))
+
+    lock = threading.Lock()
+
+    def check(item):
+        rel, path, digest, unchanged = item
+        same = hash_file(path, manifest.algorithm) == digest
+        with lock:
+            if not same:
+                result["mismatch"].append(rel)
+            elif unchanged:
+                result["ok"].append(rel)
+            else:
+                result["rehashed"].append(rel)
+        return os.path.getsize(path)
+
+    executor = executor or FileOpExecutor()
+    stats = executor.run(check, to_hash)
+    # 读取失败的文件按不一致处理
+    for item, _ in stats["errors"]:
+        result["mismatch"].append(item[0])
+    return result
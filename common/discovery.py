@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+并发目录查找
+
+网络盘上逐级 os.walk 主要耗时在每次列目录的往返延迟。这里先列出根目录的第一层，
+再把每个一级子目录交给线程池分别遍历，各子树的列目录请求并发进行。
+
+  - max_depth 限制查找深度，descend_into_matches=False 时不进入匹配目录（工位目录下成千上万的图片目录不再遍历）
+  - list_files：同样按一级子目录并发遍历，列出满足条件的文件及其 (大小, mtime_ns)，供增量缓存判断变化
+  - LayoutIndex：目录结构索引缓存，记录 目录 -> (mtime_ns, 子目录名)。再次运行时目录 mtime 未变
+    （没有直接增删子项）就直接使用缓存的子目录列表，只需一次 stat，不再列出其中的大量文件
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from common.fileops import DEFAULT_WORKERS, ensure_parent
+
+
+def list_subdirs(path: str) -> List[str]:
+    """列出 path 下的子目录名（不跟随符号链接）"""
+    with os.scandir(path) as it:
+        return [entry.name for entry in it if entry.is_dir(follow_symlinks=False)]
+
+
+class LayoutIndex:
+    """
+    目录结构索引缓存，可在多线程中共用
+
+    Args:
+        path: 索引文件路径（JSON）；文件损坏或不存在时从空索引开始
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Tuple[int, List[str]]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if os.path.isfile(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = {k: (v[0], v[1]) for k, v in json.load(f).items()}
+            except (OSError, ValueError, KeyError, IndexError, TypeError):
+                self.entries = {}
+
+    def subdirs(self, path: str) -> List[str]:
+        """返回子目录名：目录 mtime 与缓存一致时直接用缓存，否则重新列出并更新"""
+        mtime_ns = os.stat(path).st_mtime_ns
+        with self._lock:
+            cached = self.entries.get(path)
+            if cached is not None and cached[0] == mtime_ns:
+                self.hits += 1
+                return cached[1]
+        names = list_subdirs(path)
+        with self._lock:
+            self.misses += 1
+            self.entries[path] = (mtime_ns, names)
+        return names
+
+    def save(self) -> None:
+        ensure_parent(self.path)
+        tmp_path = self.path + ".tmp"
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({k: [v[0], v[1]] for k, v in self.entries.items()}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+def _walk_subtree(top: str, depth: int, match: Callable[[str], bool], descend_into_matches: bool,
+                  prune: Optional[Callable[[str], bool]], max_depth: Optional[int],
+                  index: Optional[LayoutIndex]) -> List[str]:
+    """遍历单个子树（top 位于第 depth 层，不含 top 本身），返回匹配目录路径"""
+    found: List[str] = []
+    stack = [(top, depth)]
+    while stack:
+        current, current_depth = stack.pop()
+        if max_depth is not None and current_depth >= max_depth:
+            continue
+        try:
+            names = index.subdirs(current) if index is not None else list_subdirs(current)
+        except OSError:
+            continue
+        for name in names:
+            if prune and prune(name):
+                continue
+            path = os.path.join(current, name)
+            if match(name):
+                found.append(path)
+                if not descend_into_matches:
+                    continue
+            stack.append((path, current_depth + 1))
+    return found
+
+
+def find_matching_dirs(root: str, match: Callable[[str], bool], descend_into_matches: bool = True,
+                       prune: Optional[Callable[[str], bool]] = None,
+                       max_depth: Optional[int] = None, index: Optional[LayoutIndex] = None,
+                       max_workers: int = DEFAULT_WORKERS) -> List[str]:
+    """
+    递归查找 root 下名称满足 match(name) 的目录（不含 root 本身）
+
+    Args:
+        match: 目录名匹配函数
+        descend_into_matches: 是否继续在匹配目录内部查找
+        prune: 目录名满足 prune(name) 时整棵子树跳过（如隐藏目录、输出目录）
+        max_depth: 最大查找深度，1 表示只看 root 的直接子目录；None 不限制
+        index: 目录结构索引缓存；为空时每次都实际列目录
+        max_workers: 并发遍历的一级子目录数
+
+    Returns:
+        匹配目录的路径列表（已排序）
+    """
+    root = os.path.abspath(root)
+    found: List[str] = []
+    subtrees: List[str] = []
+    if max_depth is not None and max_depth < 1:
+        return found
+    try:
+        names = index.subdirs(root) if index is not None else list_subdirs(root)
+    except FileNotFoundError:
+        return found
+    for name in names:
+        if prune and prune(name):
+            continue
+        path = os.path.join(root, name)
+        if match(name):
+            found.append(path)
+            if not descend_into_matches:
+                continue
+        subtrees.append(path)
+
+    if subtrees and (max_depth is None or max_depth > 1):
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(subtrees)))) as pool:
+            results = pool.map(
+                lambda top: _walk_subtree(top, 1, match, descend_into_matches, prune, max_depth, index),
+                subtrees,
+            )
+            for result in results:
+                found.extend(result)
+    return sorted(found)
+
+
+def _list_subtree_files(top: str, rel_top: str, match: Callable[[str], bool],
+                        prune: Optional[Callable[[str], bool]]) -> Dict[str, Tuple[int, int]]:
+    """列出单个子树中的文件，返回 {相对路径（/ 分隔）: (大小, mtime_ns)}"""
+    result: Dict[str, Tuple[int, int]] = {}
+    stack = [(rel_top, top)]
+    while stack:
+        rel_dir, abs_dir = stack.pop()
+        try:
+            it = os.scandir(abs_dir)
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not (prune and prune(entry.name)):
+                            stack.append((rel, entry.path))
+                    elif match(entry.name):
+                        st = entry.stat()
+                        result[rel] = (st.st_size, st.st_mtime_ns)
+                except OSError:
+                    continue
+    return result
+
+
+def list_files(root: str, match: Callable[[str], bool], prune: Optional[Callable[[str], bool]] = None,
+               max_workers: int = DEFAULT_WORKERS) -> Dict[str, Tuple[int, int]]:
+    """
+    递归列出 root 下文件名满足 match(name) 的文件，各一级子目录并发遍历
+
+    Args:
+        match: 文件名匹配函数
+        prune: 目录名满足 prune(name) 时整棵子树跳过
+
+    Returns:
+        {相对路径（/ 分隔）: (大小, mtime_ns)}
+    """
+    root = os.path.abspath(root)
+    result: Dict[str, Tuple[int, int]] = {}
+    subtrees: List[str] = []
+    try:
+        it = os.scandir(root)
+    except FileNotFoundError:
+        return result
+    with it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if not (prune and prune(entry.name)):
+                        subtrees.append(entry.name)
+                elif match(entry.name):
+                    st = entry.stat()
+                    result[entry.name] = (st.st_size, st.st_mtime_ns)
+            except OSError:
+                continue
+
+    if subtrees:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(subtrees)))) as pool:
+            for files in pool.map(lambda name: _list_subtree_files(os.path.join(root, name), name, match, prune),
+                                  subtrees):
+                result.update(files)
+    return result
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+并发文件操作后端
+
+命令行脚本与 GUI 共用：
+  - 线程池并发执行复制 / 移动等文件操作（网络盘上主要耗时在往返延迟，线程数可远大于 CPU 核数）
+  - 线程安全的进度统计（数量、字节数、速率），按时间间隔节流回调
+  - 通过 threading.Event 取消，已提交的任务执行完后停止
+  - 移动日志（MoveJournal）：逐条记录已完成的移动，可据此撤销
+"""
+
+import errno
+import filecmp
+import json
+import os
+import shutil
+import threading
+import time
+import unicodedata
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# 默认并发数：文件操作以 I/O 等待为主
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 4) * 4)
+
+
+def human_bytes(num: float) -> str:
+    """字节数转为易读字符串"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(num) < 1024:
+            return f"{num:.1f} {unit}"
+        num /= 1024
+    return f"{num:.1f} TB"
+
+
+def ensure_parent(path: str) -> None:
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+
+
+def same_volume(src: str, dst_dir: str) -> bool:
+    """判断 src 与 dst_dir（或其最近的已存在上级）是否位于同一卷"""
+    probe = os.path.abspath(dst_dir)
+    while not os.path.exists(probe):
+        parent = os.path.dirname(probe)
+        if parent == probe:
+            return False
+        probe = parent
+    try:
+        return os.stat(src).st_dev == os.stat(probe).st_dev
+    except OSError:
+        return False
+
+
+def copy_file(src: str, dst: str) -> int:
+    """复制单个文件（保留元数据），返回字节数"""
+    ensure_parent(dst)
+    shutil.copy2(src, dst)
+    return os.path.getsize(dst)
+
+
+def move_file(src: str, dst: str) -> int:
+    """移动单个文件：同卷直接重命名，跨卷由 shutil.move 复制后删除。返回字节数"""
+    size = os.path.getsize(src)
+    ensure_parent(dst)
+    try:
+        os.replace(src, dst)
+    except OSError:
+        shutil.move(src, dst)
+    return size
+
+
+def _rename_no_replace(src: str, dst: str) -> None:
+    """同卷重命名，dst 已存在时抛出 FileExistsError（不覆盖）"""
+    if os.name == "nt":
+        os.rename(src, dst)  # Windows 上目标已存在时 rename 直接失败
+        return
+    try:
+        os.link(src, dst)  # 目标已存在时原子地失败
+    except FileExistsError:
+        raise
+    except OSError:
+        # 文件系统不支持硬链接：先检查再重命名
+        if os.path.lexists(dst):
+            raise FileExistsError(errno.EEXIST, "目标文件已存在", dst) from None
+        os.rename(src, dst)
+        return
+    os.remove(src)
+
+
+def _copy_exclusive(src: str, dst: str) -> None:
+    """
+    复制到新文件（以独占方式创建，dst 已存在时抛出 FileExistsError），保留元数据
+
+    复制中途失败（磁盘已满、共享断开）时删除写了一半的 dst 再抛出，否则之后每次移动都会因目标已存在而失败
+    """
+    with open(src, "rb") as fsrc:
+        fdst = open(dst, "xb")  # 目标已存在时在这里失败，不会删除已有文件
+        try:
+            with fdst:
+                shutil.copyfileobj(fsrc, fdst, 1024 * 1024)
+            shutil.copystat(src, dst)
+        except BaseException:
+            try:
+                os.remove(dst)
+            except OSError:
+                pass
+            raise
+
+
+def relocate_file(src: str, dst: str, overwrite: bool = False) -> int:
+    """
+    移动单个文件：同卷只改元数据；跨卷先复制、逐字节校验一致后再删除源文件。
+    校验失败时删除目标并抛出 OSError，源文件保持不变。返回字节数
+
+    overwrite 为 False 时目标已存在则抛出 FileExistsError，源文件与目标都不变
+    （移动日志只记录 src -> dst，被覆盖的文件无法撤销恢复）
+    """
+    size = os.path.getsize(src)
+    ensure_parent(dst)
+    if same_volume(src, os.path.dirname(dst)):
+        if overwrite:
+            os.replace(src, dst)
+        else:
+            _rename_no_replace(src, dst)
+        return size
+    if overwrite:
+        shutil.copy2(src, dst)
+    else:
+        _copy_exclusive(src, dst)
+    if os.path.getsize(dst) != size or not filecmp.cmp(src, dst, shallow=False):
+        os.remove(dst)
+        raise OSError(f"复制校验失败: {src} -> {dst}")
+    os.remove(src)
+    return size
+
+
+class MoveJournal:
+    """
+    移动日志：每完成一次移动追加一行 JSON {"src": ..., "dst": ...} 并立即落盘（flush + fsync），
+    中途中断也能按已记录的部分撤销。可在多线程中共用
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        ensure_parent(path)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def record(self, src: str, dst: str) -> None:
+        line = json.dumps({"src": os.path.abspath(src), "dst": os.path.abspath(dst)}, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def move(self, src: str, dst: str) -> int:
+        """执行 relocate_file 并记录；目标已存在时抛出 FileExistsError，不移动也不记录"""
+        size = relocate_file(src, dst)
+        self.record(src, dst)
+        return size
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_journal(path: str) -> List[Tuple[str, str]]:
+    """读取移动日志，返回 [(src, dst), ...]，忽略末尾写了一半的行"""
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                item = json.loads(line)
+            except ValueError:
+                continue
+            entries.append((item["src"], item["dst"]))
+    return entries
+
+
+def undo_journal(path: str) -> Dict[str, Any]:
+    """
+    按移动日志把文件移回原位置（dst -> src），返回执行统计
+
+    按日志倒序逐条执行（不并发），同一文件被多次移动（a -> X，X -> b）时按相反顺序还原；
+    原位置已有文件的条目不覆盖，记入 errors（FileExistsError）
+    """
+    entries = list(reversed(read_journal(path)))
+    tracker = ProgressTracker(len(entries))
+    errors: List[Tuple[Any, Exception]] = []
+    for src, dst in entries:
+        try:
+            tracker.add(nbytes=relocate_file(dst, src))
+        except Exception as e:
+            errors.append(((dst, src), e))
+            tracker.add(failed=True)
+    stats = tracker.snapshot()
+    stats["cancelled"] = False
+    stats["errors"] = errors
+    return stats
+
+
+def format_progress(stats: Dict[str, Any]) -> str:
+    """格式化进度字典，用于状态栏 / 控制台单行显示"""
+    text = f"{stats['done']}/{stats['total']} 项" if stats["total"] else f"{stats['done']} 项"
+    if stats["failed"]:
+        text += f"，失败 {stats['failed']}"
+    text += f"，{stats['rate']:.1f} 项/秒"
+    if stats["bytes"]:
+        text += f"，{human_bytes(stats['bytes'])} ({human_bytes(stats['bytes_rate'])}/s)"
+    return text
+
+
+def display_width(text: str) -> int:
+    """控制台显示宽度（中文等全角字符占两列）"""
+    return sum(2 if unicodedata.east_asian_width(ch) in "WF" else 1 for ch in text)
+
+
+class ProgressTracker:
+    """线程安全的进度统计，按 interval 秒节流调用 callback(stats)"""
+
+    def __init__(self, total: int = 0, callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 interval: float = 0.2):
+        self.total = total
+        self.callback = callback
+        self.interval = interval
+        self.done = 0
+        self.failed = 0
+        self.bytes = 0
+        self.start_time = time.perf_counter()
+        self._last_report = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, count: int = 1, nbytes: int = 0, failed: bool = False) -> None:
+        with self._lock:
+            self.done += count
+            self.bytes += nbytes
+            if failed:
+                self.failed += count
+            now = time.perf_counter()
+            due = now - self._last_report >= self.interval or 0 < self.total <= self.done
+            if due:
+                self._last_report = now
+        if due and self.callback:
+            self.callback(self.snapshot())
+
+    def add_total(self, count: int) -> None:
+        """边发现边处理时追加总数"""
+        with self._lock:
+            self.total += count
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            elapsed = max(time.perf_counter() - self.start_time, 1e-6)
+            return {
+                "done": self.done,
+                "total": self.total,
+                "failed": self.failed,
+                "bytes": self.bytes,
+                "elapsed": elapsed,
+                "rate": self.done / elapsed,
+                "bytes_rate": self.bytes / elapsed,
+            }
+
+
+class FileOpExecutor:
+    """
+    并发执行文件操作
+
+    Args:
+        max_workers: 线程数
+        on_progress: 进度回调，参数为 ProgressTracker.snapshot() 字典（在工作线程中调用）
+        on_error: 单项失败回调 on_error(item, exc)
+        cancel_event: 外部传入的取消事件；为空时内部创建，可调用 cancel()
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS,
+                 on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 on_error: Optional[Callable[[Any, Exception], None]] = None,
+                 cancel_event: Optional[threading.Event] = None):
+        self.max_workers = max(1, int(max_workers))
+        self.on_progress = on_progress
+        self.on_error = on_error
+        self.cancel_event = cancel_event or threading.Event()
+
+    def cancel(self) -> None:
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def run(self, func: Callable[[Any], Optional[int]], items: Iterable[Any]) -> Dict[str, Any]:
+        """
+        对每个 item 执行 func(item)，func 返回处理的字节数（可为 None）
+
+        任务按批提交（同时在途不超过 max_workers * 2 个），取消后不再提交新任务。
+
+        Returns:
+            统计字典：done / failed / bytes / elapsed / cancelled / errors[(item, exc)]
+        """
+        items = list(items)
+        tracker = ProgressTracker(len(items), self.on_progress)
+        errors: List[Tuple[Any, Exception]] = []
+
+        def task(item):
+            nbytes = func(item)
+            return nbytes or 0
+
+        pending: Dict[Any, Any] = {}
+        item_iter = iter(items)
+        limit = self.max_workers * 2
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < limit and not self.cancelled:
+                    try:
+                        item = next(item_iter)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending[pool.submit(task, item)] = item
+                if not pending:
+                    break
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    item = pending.pop(future)
+                    try:
+                        tracker.add(nbytes=future.result())
+                    except Exception as e:
+                        errors.append((item, e))
+                        tracker.add(failed=True)
+                        if self.on_error:
+                            self.on_error(item, e)
+
+        stats = tracker.snapshot()
+        stats["cancelled"] = self.cancelled and stats["done"] < len(items)
+        stats["errors"] = errors
+        return stats
+
+    def copy_pairs(self, pairs: Iterable[Tuple[str, str]]) -> Dict[str, Any]:
+        """并发复制 (src, dst) 文件对"""
+        return self.run(lambda pair: copy_file(*pair), pairs)
+
+    def move_pairs(self, pairs: Iterable[Tuple[str, str]]) -> Dict[str, Any]:
+        """并发移动 (src, dst) 文件对"""
+        return self.run(lambda pair: move_file(*pair), pairs)
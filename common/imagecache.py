@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+解码后图片的本地缓存
+
+反复处理网络盘上的同一批图片时，每次都要重新读取并解码 JPEG / PNG。这里把解码后的像素数组
+以 .npy 文件（头部记录 shape / dtype）保存在本地缓存目录，再次读取时用内存映射直接打开，
+跳过网络 I/O 与解码：
+
+  - 缓存键：源文件绝对路径 + 大小 + mtime_ns + 解码参数，源文件修改后自动失效
+  - 按最近使用时间（LRU）淘汰，缓存总字节数不超过 max_bytes；被淘汰但仍被内存映射的文件（Windows 上无法删除）
+    记入待删除列表并计入总字节数，之后每次写入与 save() 时重试删除
+  - 索引保存在缓存目录下的 _index.json；写入先写临时文件再替换，可多线程同时使用
+
+返回的数组为只读内存映射，需要原地修改时先 .copy()。
+
+依赖：opencv-python、numpy
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+
+from common.imageio import imread_unicode
+
+INDEX_NAME = "_index.json"
+
+
+class DecodedImageCache:
+    """
+    Args:
+        cache_dir: 缓存目录（建议放在本地 SSD）
+        max_bytes: 缓存总大小上限（字节）
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 20 * 1024 ** 3):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(self.cache_dir, INDEX_NAME)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # key -> 字节数，按最近使用排序（最旧在前）
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total = 0
+        # 已淘汰、删除失败待重试的文件：key -> 字节数
+        self._pending: Dict[str, int] = {}
+        self._pending_bytes = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self) -> None:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            entries = data.get("entries", [])
+            pending = data.get("pending", [])
+        except (OSError, ValueError, AttributeError):
+            entries, pending = [], []
+        for key, nbytes in entries:
+            if os.path.exists(self._entry_path(key)):
+                self._entries[key] = nbytes
+                self._total += nbytes
+        for key, nbytes in pending:
+            if key not in self._entries and os.path.exists(self._entry_path(key)):
+                self._pending[key] = nbytes
+                self._pending_bytes += nbytes
+        self._purge()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + ".npy")
+
+    @staticmethod
+    def make_key(path: str, flags: int) -> Optional[str]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        raw = f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}|{flags}"
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, path: str, flags: int = cv2.IMREAD_COLOR) -> Optional[np.ndarray]:
+        """读取图片：命中缓存时返回内存映射数组，否则解码并写入缓存。读取失败返回 None"""
+        key = self.make_key(path, flags)
+        if key is None:
+            return None
+        entry_path = self._entry_path(key)
+        with self._lock:
+            cached = key in self._entries
+            if cached:
+                self._entries.move_to_end(key)
+        if cached:
+            try:
+                img = np.load(entry_path, mmap_mode="r")
+                with self._lock:
+                    self.hits += 1
+                return img
+            except (OSError, ValueError):
+                self._discard(key)
+
+        img = imread_unicode(path, flags)
+        with self._lock:
+            self.misses += 1
+        if img is not None:
+            self._store(key, img)
+        return img
+
+    def _store(self, key: str, img: np.ndarray) -> None:
+        entry_path = self._entry_path(key)
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+        tmp_path = f"{entry_path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.save(f, np.ascontiguousarray(img))
+            os.replace(tmp_path, entry_path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        nbytes = os.path.getsize(entry_path)
+        with self._lock:
+            if key in self._entries:
+                self._total -= self._entries[key]
+            if key in self._pending:
+                self._pending_bytes -= self._pending.pop(key)
+            self._entries[key] = nbytes
+            self._total += nbytes
+            over = self._total + self._pending_bytes > self.max_bytes
+        if not over:
+            return
+        self._purge()
+        with self._lock:
+            while self._total + self._pending_bytes > self.max_bytes and len(self._entries) > 1:
+                old_key, old_bytes = self._entries.popitem(last=False)
+                self._total -= old_bytes
+                self._pending[old_key] = old_bytes
+                self._pending_bytes += old_bytes
+        self._purge()
+
+    def _purge(self) -> None:
+        """删除待删除列表中的文件；仍被内存映射（Windows 上删除失败）的保留，下次重试"""
+        with self._lock:
+            for key in list(self._pending):
+                try:
+                    os.remove(self._entry_path(key))
+                except FileNotFoundError:
+                    pass
+                except OSError:
+                    continue
+                self._pending_bytes -= self._pending.pop(key)
+
+    def _discard(self, key: str) -> None:
+        with self._lock:
+            nbytes = self._entries.pop(key, None)
+            if nbytes is not None:
+                self._total -= nbytes
+
+    @property
+    def total_bytes(self) -> int:
+        """缓存文件占用的字节数（含删除失败待重试的文件）"""
+        return self._total + self._pending_bytes
+
+    def save(self) -> None:
+        """重试删除已淘汰的文件，保存索引（LRU 顺序与待删除列表）"""
+        self._purge()
+        with self._lock:
+            entries = list(self._entries.items())
+            pending = list(self._pending.items())
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"entries": entries, "pending": pending}, f)
+        os.replace(tmp_path, self.index_path)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+图片读写（支持中文路径）
+
+OpenCV 的 imread / imwrite 不支持中文路径，这里先用 numpy 读写字节，再由 imdecode / imencode 编解码
+（与 wh_cut_image.py 中的 imread_unicode / imwrite_unicode 相同）。
+
+只需要尺寸或预览时：
+  - read_image_header：只解析文件头（JPEG SOF / PNG IHDR / BMP 信息头），不解码像素，通常只读几 KB
+  - read_image_info：同样只读文件头，另外给出格式、位深与是否渐进 / 隔行编码
+  - read_image_size：尺寸与 imdecode(IMREAD_COLOR) 的结果一致（JPEG 的 EXIF 方向为旋转 90° 时宽高互换）
+  - REDUCED_COLOR_FLAGS / reduce_factor_for：JPEG 按 1/2、1/4、1/8 比例直接缩小解码（IMREAD_REDUCED_*），解码量大幅减少
+
+依赖：opencv-python、numpy
+"""
+
+import os
+import struct
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff"}
+
+
+def is_image(name: str) -> bool:
+    return os.path.splitext(name)[1].lower() in IMAGE_EXTS
+
+
+def imread_unicode(path: str, flags: int = cv2.IMREAD_COLOR) -> Optional[np.ndarray]:
+    """读取图片，失败返回 None"""
+    try:
+        stream = np.fromfile(path, dtype=np.uint8)
+    except OSError:
+        return None
+    if stream.size == 0:
+        return None
+    return cv2.imdecode(stream, flags)
+
+
+def imwrite_unicode(path: str, img: np.ndarray, params: Optional[list] = None) -> bool:
+    """写入图片（按扩展名编码），成功返回 True"""
+    ext = os.path.splitext(path)[1] or ".png"
+    ok, buf = cv2.imencode(ext, img, params or [])
+    if not ok:
+        return False
+    buf.tofile(path)
+    return True
+
+
+def letterbox(img: np.ndarray, size: int, color: int = 114):
+    """
+    等比缩放并填充为 size x size（YOLO 预处理）
+
+    Returns:
+        (填充后的图片, 缩放比例, (左填充, 上填充))
+    """
+    h, w = img.shape[:2]
+    scale = min(size / h, size / w)
+    new_w, new_h = int(round(w * scale)), int(round(h * scale))
+    if (new_w, new_h) != (w, h):
+        img = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+    out = cv2.copyMakeBorder(img, pad_y, size - new_h - pad_y, pad_x, size - new_w - pad_x,
+                             cv2.BORDER_CONSTANT, value=(color, color, color))
+    return out, scale, (pad_x, pad_y)
+
+
+# 缩小解码倍数 -> imdecode 参数
+REDUCED_COLOR_FLAGS = {1: cv2.IMREAD_COLOR, 2: cv2.IMREAD_REDUCED_COLOR_2,
+                       4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+
+# JPEG 中带尺寸信息的 SOF 标记（排除 DHT 0xC4、JPG 0xC8、DAC 0xCC）
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# PNG 颜色类型 -> 通道数
+_PNG_CHANNELS = {0: 1, 2: 3, 3: 3, 4: 2, 6: 4}
+_HEAD_SIZE = 8 * 1024
+
+
+# JPEG 渐进式编码的 SOF 标记
+_JPEG_PROGRESSIVE = {0xC2, 0xC6, 0xCA, 0xCE}
+# 格式名（read_image_info 返回值第一项）
+IMAGE_FORMATS = ("jpeg", "png", "bmp")
+
+ImageInfo = Tuple[str, int, int, int, int, bool]
+
+
+def _jpeg_header(f, head: bytes) -> Optional[ImageInfo]:
+    def read_at(pos: int, size: int) -> bytes:
+        # 需要的字节不在已读部分时（如很大的 EXIF 段之后）直接定位读取
+        if pos + size <= len(head):
+            return head[pos:pos + size]
+        f.seek(pos)
+        return f.read(size)
+
+    pos = 2
+    while True:
+        block = read_at(pos, 10)
+        if len(block) < 4 or block[0] != 0xFF:
+            return None
+        marker = block[1]
+        if marker == 0xFF:  # 填充字节
+            pos += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:  # 无长度字段的标记
+            pos += 2
+            continue
+        if marker in (0xD9, 0xDA):  # 到达图像结束 / 扫描数据仍未找到 SOF
+            return None
+        if marker in _JPEG_SOF:
+            if len(block) < 10:
+                return None
+            height, width = struct.unpack(">HH", block[5:9])
+            return "jpeg", width, height, block[9], block[4], marker in _JPEG_PROGRESSIVE
+        pos += 2 + struct.unpack(">H", block[2:4])[0]
+
+
+def read_image_info(path: str) -> Optional[ImageInfo]:
+    """
+    只解析文件头读取图片信息（JPEG / PNG / BMP），不解码像素
+
+    Returns:
+        (格式, 宽, 高, 通道数, 每通道位深, 是否渐进 / 隔行)；格式不支持或文件损坏时返回 None
+    """
+    try:
+        with open(path, "rb") as f:
+            head = f.read(_HEAD_SIZE)
+            if head[:2] == b"\xff\xd8":
+                return _jpeg_header(f, head)
+    except (OSError, struct.error, IndexError):
+        return None
+    if head[:8] == b"\x89PNG\r\n\x1a\n" and head[12:16] == b"IHDR" and len(head) >= 29:
+        width, height = struct.unpack(">II", head[16:24])
+        # 调色板图的位深是索引位数，解码后每通道 8 位
+        bits = 8 if head[25] == 3 else head[24]
+        return "png", width, height, _PNG_CHANNELS.get(head[25], 3), bits, head[28] == 1
+    if head[:2] == b"BM" and len(head) >= 30:
+        width, height = struct.unpack("<ii", head[18:26])
+        bits = struct.unpack("<H", head[28:30])[0]
+        return "bmp", width, abs(height), 1 if bits <= 8 else bits // 8, 8, False
+    return None
+
+
+def read_jpeg_orientation(path: str) -> int:
+    """JPEG 的 EXIF 方向标记（1-8）；不是 JPEG、没有 EXIF 或解析失败时返回 1"""
+    try:
+        with open(path, "rb") as f:
+            if f.read(2) != b"\xff\xd8":
+                return 1
+            while True:
+                block = f.read(4)
+                if len(block) < 4 or block[0] != 0xFF or block[1] in _JPEG_SOF or block[1] in (0xD9, 0xDA):
+                    return 1
+                length = struct.unpack(">H", block[2:4])[0]
+                if block[1] != 0xE1:
+                    f.seek(length - 2, os.SEEK_CUR)
+                    continue
+                data = f.read(length - 2)
+                if data[:6] != b"Exif\x00\x00":
+                    continue
+                tiff = data[6:]
+                endian = "<" if tiff[:2] == b"II" else ">"
+                ifd = struct.unpack(endian + "I", tiff[4:8])[0]
+                count = struct.unpack(endian + "H", tiff[ifd:ifd + 2])[0]
+                for i in range(count):
+                    entry = tiff[ifd + 2 + 12 * i:ifd + 14 + 12 * i]
+                    if struct.unpack(endian + "H", entry[:2])[0] == 0x0112:
+                        value = struct.unpack(endian + "H", entry[8:10])[0]
+                        return value if 1 <= value <= 8 else 1
+                return 1
+    except (OSError, struct.error):
+        return 1
+
+
+def read_image_header(path: str) -> Optional[Tuple[int, int, int]]:
+    """
+    只解析文件头读取图片尺寸与通道数（JPEG / PNG / BMP），不解码像素
+
+    Returns:
+        (宽, 高, 通道数)；格式不支持或文件损坏时返回 None
+    """
+    info = read_image_info(path)
+    return None if info is None else (info[1], info[2], info[3])
+
+
+def read_image_size(path: str) -> Optional[Tuple[int, int]]:
+    """
+    图片尺寸 (宽, 高)，与 imread_unicode 解码结果一致：优先只读文件头，不支持的格式退回完整解码。
+    imdecode 会按 EXIF 方向旋转 JPEG，方向为 5-8（旋转 90°）时宽高互换
+    """
+    info = read_image_info(path)
+    if info is not None:
+        width, height = info[1], info[2]
+        if info[0] == "jpeg" and read_jpeg_orientation(path) >= 5:
+            width, height = height, width
+        return width, height
+    img = imread_unicode(path, cv2.IMREAD_UNCHANGED)
+    if img is None:
+        return None
+    return img.shape[1], img.shape[0]
+
+
+def reduce_factor_for(size: Tuple[int, int], min_side: int) -> int:
+    """在缩小后长边仍不小于 min_side 的前提下，选取最大的缩小解码倍数（1 / 2 / 4 / 8）"""
+    longest = max(size)
+    factor = 1
+    for candidate in (2, 4, 8):
+        if longest / candidate >= min_side:
+            factor = candidate
+    return factor
+
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ONNX 模型目录索引（onnx_catalog.py 与数据集类别核对等脚本共用）
+
+  - 批量读取 .onnx 的类别名称（metadata.names）、输入形状、opset 与文件哈希，不加载权重，多个模型并发读取
+  - 结果保存在模型目录下的 _onnx_index.json，按 大小 + 修改时间 判断模型是否变化
+  - 查询直接使用索引，不再打开任何模型
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from common.checksum import default_algorithm, hash_file
+from common.fileops import FileOpExecutor
+from common.onnx_meta import parse_names, read_onnx_info
+
+INDEX_NAME = "_onnx_index.json"
+
+
+def find_onnx_files(model_dir: str) -> List[str]:
+    """递归查找 .onnx 文件"""
+    paths = []
+    for root, dirs, files in os.walk(model_dir):
+        for name in files:
+            if name.lower().endswith(".onnx"):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+def load_index(model_dir: str) -> Dict[str, Any]:
+    """读取索引，不存在或损坏时返回空索引"""
+    path = os.path.join(model_dir, INDEX_NAME)
+    if os.path.isfile(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            print(f"索引文件损坏，将重新生成: {path}")
+    return {"algorithm": default_algorithm(), "models": {}}
+
+
+def save_index(model_dir: str, index: Dict[str, Any]) -> None:
+    path = os.path.join(model_dir, INDEX_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def describe_model(path: str, algorithm: Optional[str]) -> Dict[str, Any]:
+    """读取单个模型的索引信息（不加载权重）"""
+    st = os.stat(path)
+    info = read_onnx_info(path, include_io=True)
+    entry: Dict[str, Any] = {
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "hash": hash_file(path, algorithm) if algorithm else None,
+        "names": None,
+        "names_error": None,
+        "opset": info["opset"],
+        "ir_version": info["ir_version"],
+        "producer": f"{info['producer_name']} {info['producer_version']}".strip(),
+        "inputs": [{"name": i["name"], "shape": i["shape"]} for i in info["inputs"]],
+        "metadata_keys": sorted(info["metadata"]),
+    }
+    try:
+        names = parse_names(info["metadata"])
+        if names is not None:
+            # JSON 的键只能是字符串
+            entry["names"] = {str(k): v for k, v in names.items()}
+    except Exception as e:
+        entry["names_error"] = str(e)
+    return entry
+
+
+def refresh_index(model_dir: str, index: Dict[str, Any], hash_models: bool) -> Dict[str, int]:
+    """
+    按 大小 + 修改时间 更新索引：新增 / 变化的模型并发重新读取，已删除的模型从索引移除
+
+    Returns:
+        {'reused': 未变化数, 'updated': 重新读取数, 'removed': 移除数, 'failed': 读取失败数}
+    """
+    algorithm = index.get("algorithm") or default_algorithm()
+    if hash_models and algorithm != default_algorithm():
+        # 旧索引的哈希算法与当前环境不同（如新装了 xxhash），整体重算
+        index["models"] = {}
+        algorithm = default_algorithm()
+    index["algorithm"] = algorithm
+
+    models: Dict[str, Any] = index.setdefault("models", {})
+    current = {os.path.relpath(p, model_dir).replace(os.sep, "/"): p for p in find_onnx_files(model_dir)}
+    removed = [rel for rel in models if rel not in current]
+    for rel in removed:
+        del models[rel]
+
+    to_read = []
+    for rel, path in current.items():
+        st = os.stat(path)
+        old = models.get(rel)
+        if (old and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns
+                and (old.get("hash") or not hash_models)):
+            continue
+        to_read.append((rel, path))
+
+    def read(item):
+        rel, path = item
+        entry = describe_model(path, algorithm if hash_models else None)
+        models[rel] = entry
+        return entry["size"] if hash_models else 0
+
+    stats = FileOpExecutor().run(read, to_read)
+    for (rel, _), e in stats["errors"]:
+        print(f"  ✗ 读取失败 {rel}: {e}")
+    return {
+        "reused": len(current) - len(to_read),
+        "updated": len(to_read) - stats["failed"],
+        "removed": len(removed),
+        "failed": stats["failed"],
+    }
+
+
+def find_models_with_class(index: Dict[str, Any], class_name: str, substring: bool = False) -> List[tuple]:
+    """
+    在索引中查找包含某类别的模型
+
+    Returns:
+        [(模型相对路径, 类别编号, 类别名称), ...]
+    """
+    hits = []
+    for rel, entry in sorted(index.get("models", {}).items()):
+        for idx, name in (entry.get("names") or {}).items():
+            if name == class_name or (substring and class_name in name):
+                hits.append((rel, idx, name))
+    return hits
+
+
+def find_duplicates(index: Dict[str, Any]) -> List[List[str]]:
+    """按文件哈希找出内容相同的模型，返回 [[相对路径, ...], ...]"""
+    by_hash: Dict[str, List[str]] = {}
+    for rel, entry in index.get("models", {}).items():
+        if entry.get("hash"):
+            by_hash.setdefault(entry["hash"], []).append(rel)
+    return [sorted(rels) for rels in by_hash.values() if len(rels) > 1]
+
+
+def model_class_list(entry: Dict[str, Any]) -> Optional[List[str]]:
+    """索引条目中的类别名称，按编号排序为列表；没有 names 时返回 None"""
+    names = entry.get("names")
+    if not names:
+        return None
+    return [names[k] for k in sorted(names, key=int)]
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+图片拼接（任意 行 x 列）
+
+  - 画布一次性分配，每张图片解码后直接缩放写入画布中对应的格子，不生成中间的行图片
+  - 解码在线程池中并行进行（OpenCV 解码与缩放时释放 GIL）
+  - 格子尺寸默认取第一张图片的尺寸；fit="stretch" 拉伸填满格子，fit="contain" 保持比例居中
+  - 大量图片（数千张裁图）用 save_mosaic_pages 分页输出，同一时间只保留一页画布，内存占用有上限；
+    已在内存中的缩略图可逐张交给 PagedMosaicWriter，写满一页即保存
+
+依赖：opencv-python、numpy
+"""
+
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from common.fileops import DEFAULT_WORKERS
+from common.imageio import imread_unicode, imwrite_unicode, read_image_size
+
+Loader = Callable[[str], Optional[np.ndarray]]
+
+
+def grid_shape(count: int, cols: int = 0, rows: int = 0) -> Tuple[int, int]:
+    """由图片数与给定的列数 / 行数推算 (行数, 列数)；都未给定时取接近正方形的网格"""
+    if cols <= 0 and rows <= 0:
+        cols = max(1, math.ceil(math.sqrt(count)))
+    if cols <= 0:
+        cols = max(1, math.ceil(count / rows))
+    if rows <= 0:
+        rows = max(1, math.ceil(count / cols))
+    return rows, cols
+
+
+def to_bgr(img: np.ndarray) -> np.ndarray:
+    if img.ndim == 2:
+        return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    if img.shape[2] == 4:
+        return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+    return img
+
+
+def place_tile(cell: np.ndarray, img: np.ndarray, fit: str = "stretch") -> None:
+    """把图片缩放后写入画布格子（cell 为画布的视图）"""
+    img = to_bgr(img)
+    cell_h, cell_w = cell.shape[:2]
+    if fit == "contain":
+        h, w = img.shape[:2]
+        scale = min(cell_w / w, cell_h / h)
+        new_w, new_h = max(1, int(round(w * scale))), max(1, int(round(h * scale)))
+        x0, y0 = (cell_w - new_w) // 2, (cell_h - new_h) // 2
+        cell = cell[y0:y0 + new_h, x0:x0 + new_w]
+    target_h, target_w = cell.shape[:2]
+    if img.shape[:2] == (target_h, target_w):
+        cell[...] = img
+        return
+    interpolation = cv2.INTER_AREA if img.shape[0] > target_h else cv2.INTER_LINEAR
+    resized = cv2.resize(img, (target_w, target_h), dst=cell, interpolation=interpolation)
+    if not np.shares_memory(resized, cell):  # 视图不连续时 OpenCV 会另行分配
+        cell[...] = resized
+
+
+def draw_caption(cell: np.ndarray, text: str) -> None:
+    """在格子左上角绘制文字（黑底白字，仅支持 ASCII）"""
+    scale = max(0.4, cell.shape[0] / 400)
+    thickness = max(1, int(scale * 1.5))
+    (tw, th), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, scale, thickness)
+    cv2.rectangle(cell, (0, 0), (min(cell.shape[1] - 1, tw + 4), th + baseline + 4), (0, 0, 0), -1)
+    cv2.putText(cell, text, (2, th + 2), cv2.FONT_HERSHEY_SIMPLEX, scale, (255, 255, 255), thickness, cv2.LINE_AA)
+
+
+def build_mosaic(items: Sequence[Optional[str]], cols: int = 0, rows: int = 0,
+                 tile_size: Optional[Tuple[int, int]] = None, gap: int = 0, background: int = 0,
+                 fit: str = "stretch", loader: Optional[Loader] = None,
+                 captions: Optional[Sequence[Optional[str]]] = None,
+                 max_workers: int = DEFAULT_WORKERS, canvas: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    按行优先顺序拼接图片
+
+    Args:
+        items: 图片路径（None 表示空格子）
+        cols / rows: 列数 / 行数（见 grid_shape）
+        tile_size: 格子尺寸 (宽, 高)，为空时取第一张可读图片的尺寸：默认读取函数只读文件头（含 JPEG EXIF 方向），
+            传入 loader 时先用 loader 读取第一张图片（返回的尺寸可能与文件头不同，如缩小解码）
+        gap: 格子间距（像素）
+        background: 背景灰度值
+        fit: "stretch" 拉伸填满格子，"contain" 保持比例居中
+        loader: 读取函数 path -> ndarray（默认 imread_unicode，可传入 DecodedImageCache.get）
+        captions: 每个格子的说明文字（可选）
+        canvas: 预先分配的画布（如 np.memmap，用于超大输出），形状需与网格一致
+
+    Returns:
+        画布 (H, W, 3) uint8
+
+    Raises:
+        ValueError: 有图片无法读取时（全部格子处理完后一并列出）
+    """
+    custom_loader = loader is not None
+    loader = loader or imread_unicode
+    rows, cols = grid_shape(len(items), cols, rows)
+    if len(items) > rows * cols:
+        raise ValueError(f"{len(items)} 张图片超出 {rows}x{cols} 网格")
+
+    if tile_size is None:
+        if custom_loader:
+            first = next((img for img in (loader(p) for p in items if p is not None) if img is not None), None)
+            tile_size = None if first is None else (first.shape[1], first.shape[0])
+        else:
+            tile_size = next((size for size in (read_image_size(p) for p in items if p is not None) if size), None)
+        if tile_size is None:
+            raise ValueError("没有可读取的图片")
+    tile_w, tile_h = tile_size
+
+    height = rows * tile_h + (rows - 1) * gap
+    width = cols * tile_w + (cols - 1) * gap
+    if canvas is None:
+        canvas = np.full((height, width, 3), background, dtype=np.uint8)
+    elif canvas.shape != (height, width, 3):
+        raise ValueError(f"画布尺寸应为 {(height, width, 3)}，实际为 {canvas.shape}")
+    else:
+        canvas[...] = background
+
+    def cell_of(index: int) -> np.ndarray:
+        r, c = divmod(index, cols)
+        y, x = r * (tile_h + gap), c * (tile_w + gap)
+        return canvas[y:y + tile_h, x:x + tile_w]
+
+    def fill(index: int) -> bool:
+        img = loader(items[index])
+        if img is None:
+            return False
+        cell = cell_of(index)
+        place_tile(cell, img, fit)
+        if captions and captions[index]:
+            draw_caption(cell, captions[index])
+        return True
+
+    todo = [i for i, path in enumerate(items) if path is not None]
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        failed = [i for i, ok in zip(todo, pool.map(fill, todo)) if not ok]
+    if failed:
+        raise ValueError("无法读取图像: " + "，".join(f"{items[i]}（第 {i + 1} 张）" for i in failed))
+    return canvas
+
+
+def save_mosaic_pages(items: Sequence[Optional[str]], output_path: str, cols: int, rows: int,
+                      **kwargs) -> List[str]:
+    """
+    分页拼接并保存：每页 rows x cols 张，输出 <名称>_001<扩展名>、<名称>_002<扩展名> ...
+    （只有一页时直接保存为 output_path）。同一时间只保留一页画布
+
+    Returns:
+        保存的文件路径列表
+    """
+    per_page = rows * cols
+    pages = max(1, math.ceil(len(items) / per_page))
+    stem, ext = os.path.splitext(output_path)
+    captions = kwargs.pop("captions", None)
+    saved = []
+    for page in range(pages):
+        chunk = list(items[page * per_page:(page + 1) * per_page])
+        page_captions = list(captions[page * per_page:(page + 1) * per_page]) if captions else None
+        canvas = build_mosaic(chunk, cols=cols, rows=rows, captions=page_captions, **kwargs)
+        path = output_path if pages == 1 else f"{stem}_{page + 1:03d}{ext}"
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if not imwrite_unicode(path, canvas):
+            raise OSError(f"保存失败: {path}")
+        saved.append(path)
+        del canvas
+    return saved
+
+
+class PagedMosaicWriter:
+    """
+    逐张写入的分页拼接：格子写满一页即保存为 <prefix>_001<ext>、<prefix>_002<ext> ...，随后复用同一画布
+
+    Args:
+        prefix: 输出路径前缀（不含页码与扩展名）
+        cols / rows: 每页列数 / 行数
+        tile_size: 格子尺寸 (宽, 高)
+    """
+
+    def __init__(self, prefix: str, cols: int, rows: int, tile_size: Tuple[int, int], gap: int = 0,
+                 background: int = 0, fit: str = "contain", ext: str = ".jpg"):
+        self.prefix = prefix
+        self.cols, self.rows = cols, rows
+        self.tile_w, self.tile_h = tile_size
+        self.gap = gap
+        self.background = background
+        self.fit = fit
+        self.ext = ext
+        self.canvas = np.full((rows * self.tile_h + (rows - 1) * gap, cols * self.tile_w + (cols - 1) * gap, 3),
+                              background, dtype=np.uint8)
+        self.slot = 0
+        self.saved: List[str] = []
+
+    def add(self, img: np.ndarray, caption: Optional[str] = None) -> Tuple[int, int]:
+        """写入下一个格子，返回 (页码, 格子序号)，均从 1 开始"""
+        r, c = divmod(self.slot, self.cols)
+        y, x = r * (self.tile_h + self.gap), c * (self.tile_w + self.gap)
+        cell = self.canvas[y:y + self.tile_h, x:x + self.tile_w]
+        place_tile(cell, img, self.fit)
+        if caption:
+            draw_caption(cell, caption)
+        self.slot += 1
+        position = (len(self.saved) + 1, self.slot)
+        if self.slot == self.cols * self.rows:
+            self.flush()
+        return position
+
+    def flush(self) -> None:
+        """保存当前页（没有内容时不保存）并清空画布"""
+        if self.slot == 0:
+            return
+        path = f"{self.prefix}_{len(self.saved) + 1:03d}{self.ext}"
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if not imwrite_unicode(path, self.canvas):
+            raise OSError(f"保存失败: {path}")
+        self.saved.append(path)
+        self.canvas[...] = self.background
+        self.slot = 0
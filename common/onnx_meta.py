@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ONNX 元数据快速读取（直接解析 protobuf 编码，不依赖 onnx 包）
+
+onnx.load 会把所有权重反序列化到内存，只为读取 metadata_props 就要几秒和几 GB 内存。
+这里按 protobuf 编码逐个读取 ModelProto 顶层字段，遇到 graph（权重所在）直接 seek 跳过，
+只读取需要的小字段：
+
+  ModelProto:  1 ir_version | 2 producer_name | 3 producer_version | 7 graph
+               8 opset_import(1 domain, 2 version) | 14 metadata_props(1 key, 2 value)
+  GraphProto:  1 node | 5 initializer | 11 input | 12 output
+  ValueInfoProto: 1 name | 2 type -> TypeProto: 1 tensor_type -> 1 elem_type, 2 shape -> 1 dim(1 dim_value, 2 dim_param)
+
+读取 graph 输入输出时同样跳过 node / initializer 的内容。
+
+修改元数据（patch_onnx_metadata）时以内存映射方式读取原文件，除被修改的 metadata_props 条目外
+原样顺序写出，不解析、不重新序列化权重，内存占用固定，耗时取决于顺序读写速度。
+"""
+
+import ast
+import mmap
+import os
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+# protobuf wire type
+WT_VARINT = 0
+WT_FIXED64 = 1
+WT_LEN = 2
+WT_FIXED32 = 5
+
+# ModelProto 字段号
+MODEL_IR_VERSION = 1
+MODEL_PRODUCER_NAME = 2
+MODEL_PRODUCER_VERSION = 3
+MODEL_GRAPH = 7
+MODEL_OPSET_IMPORT = 8
+MODEL_METADATA_PROPS = 14
+
+# GraphProto 字段号
+GRAPH_INITIALIZER = 5
+GRAPH_SPARSE_INITIALIZER = 15
+GRAPH_INPUT = 11
+GRAPH_OUTPUT = 12
+
+READ_BUFFER = 64 * 1024
+COPY_CHUNK = 16 * 1024 * 1024
+
+
+class OnnxFormatError(ValueError):
+    """文件不是有效的 ONNX（protobuf）编码"""
+
+
+def read_varint(f: BinaryIO) -> int:
+    result = 0
+    shift = 0
+    while True:
+        b = f.read(1)
+        if not b:
+            raise OnnxFormatError("数据意外结束")
+        byte = b[0]
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result
+        shift += 7
+        if shift > 63:
+            raise OnnxFormatError("varint 过长")
+
+
+def encode_varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def iter_field_spans(f: BinaryIO, start: int, end: int) -> Iterator[Tuple[int, int, Any, int, int]]:
+    """
+    遍历 [start, end) 范围内的 protobuf 字段
+
+    Yields:
+        (字段号, wire type, 值, 字段起始偏移, 字段结束偏移)；varint / fixed 的值为整数，
+        length-delimited 为 (内容偏移, 长度)，不读取内容。调用方可以在 yield 后自由读取，下一次迭代会重新定位
+    """
+    pos = start
+    while pos < end:
+        field_start = pos
+        f.seek(pos)
+        key = read_varint(f)
+        field, wire_type = key >> 3, key & 7
+        if wire_type == WT_VARINT:
+            value: Any = read_varint(f)
+            pos = f.tell()
+        elif wire_type == WT_LEN:
+            length = read_varint(f)
+            offset = f.tell()
+            value = (offset, length)
+            pos = offset + length
+        elif wire_type == WT_FIXED64:
+            value = int.from_bytes(f.read(8), "little")
+            pos = f.tell()
+        elif wire_type == WT_FIXED32:
+            value = int.from_bytes(f.read(4), "little")
+            pos = f.tell()
+        else:
+            raise OnnxFormatError(f"不支持的 wire type {wire_type}（偏移 {pos}）")
+        if pos > end:
+            raise OnnxFormatError("字段长度超出范围")
+        yield field, wire_type, value, field_start, pos
+
+
+def iter_fields(f: BinaryIO, start: int, end: int) -> Iterator[Tuple[int, int, Any]]:
+    """同 iter_field_spans，只返回 (字段号, wire type, 值)"""
+    for field, wire_type, value, _, _ in iter_field_spans(f, start, end):
+        yield field, wire_type, value
+
+
+def _read_str(f: BinaryIO, span: Tuple[int, int]) -> str:
+    f.seek(span[0])
+    return f.read(span[1]).decode("utf-8", errors="replace")
+
+
+def _read_string_entry(f: BinaryIO, span: Tuple[int, int]) -> Tuple[str, str]:
+    """StringStringEntryProto -> (key, value)"""
+    key, value = "", ""
+    for field, wire_type, val in iter_fields(f, span[0], span[0] + span[1]):
+        if wire_type != WT_LEN:
+            continue
+        if field == 1:
+            key = _read_str(f, val)
+        elif field == 2:
+            value = _read_str(f, val)
+    return key, value
+
+
+def _read_opset(f: BinaryIO, span: Tuple[int, int]) -> Tuple[str, int]:
+    """OperatorSetIdProto -> (domain, version)"""
+    domain, version = "", 0
+    for field, wire_type, val in iter_fields(f, span[0], span[0] + span[1]):
+        if field == 1 and wire_type == WT_LEN:
+            domain = _read_str(f, val)
+        elif field == 2 and wire_type == WT_VARINT:
+            version = val
+    return domain, version
+
+
+def _read_shape(f: BinaryIO, span: Tuple[int, int]) -> List[Any]:
+    """TensorShapeProto -> [维度]，维度为整数或符号名（动态维度）"""
+    dims: List[Any] = []
+    for field, wire_type, val in iter_fields(f, span[0], span[0] + span[1]):
+        if field != 1 or wire_type != WT_LEN:
+            continue
+        dim: Any = None
+        for dfield, dwire, dval in iter_fields(f, val[0], val[0] + val[1]):
+            if dfield == 1 and dwire == WT_VARINT:
+                dim = dval
+            elif dfield == 2 and dwire == WT_LEN:
+                dim = _read_str(f, dval)
+        dims.append(dim)
+    return dims
+
+
+def _read_value_info(f: BinaryIO, span: Tuple[int, int]) -> Dict[str, Any]:
+    """ValueInfoProto -> {'name', 'elem_type', 'shape'}"""
+    info: Dict[str, Any] = {"name": "", "elem_type": 0, "shape": None}
+    for field, wire_type, val in iter_fields(f, span[0], span[0] + span[1]):
+        if wire_type != WT_LEN:
+            continue
+        if field == 1:
+            info["name"] = _read_str(f, val)
+        elif field == 2:
+            # TypeProto.tensor_type
+            for tfield, twire, tval in iter_fields(f, val[0], val[0] + val[1]):
+                if tfield != 1 or twire != WT_LEN:
+                    continue
+                for sfield, swire, sval in iter_fields(f, tval[0], tval[0] + tval[1]):
+                    if sfield == 1 and swire == WT_VARINT:
+                        info["elem_type"] = sval
+                    elif sfield == 2 and swire == WT_LEN:
+                        info["shape"] = _read_shape(f, sval)
+    return info
+
+
+def _read_graph_io(f: BinaryIO, span: Tuple[int, int]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """读取 GraphProto 的输入输出，跳过节点与权重内容"""
+    inputs: List[Dict[str, Any]] = []
+    outputs: List[Dict[str, Any]] = []
+    initializer_names = set()
+    for field, wire_type, val in iter_fields(f, span[0], span[0] + span[1]):
+        if wire_type != WT_LEN:
+            continue
+        if field == GRAPH_INPUT:
+            inputs.append(_read_value_info(f, val))
+        elif field == GRAPH_OUTPUT:
+            outputs.append(_read_value_info(f, val))
+        elif field == GRAPH_INITIALIZER:
+            # 旧版导出会把权重也列为 input，只取 TensorProto.name（字段 8）用于排除
+            for tfield, twire, tval in iter_fields(f, val[0], val[0] + val[1]):
+                if tfield == 8 and twire == WT_LEN:
+                    initializer_names.add(_read_str(f, tval))
+                    break
+    inputs = [i for i in inputs if i["name"] not in initializer_names]
+    return inputs, outputs
+
+
+def read_onnx_info(path: str, include_io: bool = False) -> Dict[str, Any]:
+    """
+    读取 ONNX 模型的基本信息，不加载权重
+
+    Args:
+        include_io: 是否读取 graph 的输入输出（需要遍历 graph 的字段头，仍跳过权重内容）
+
+    Returns:
+        {'ir_version', 'producer_name', 'producer_version', 'opset': {domain: version},
+         'metadata': {key: value}, 'inputs': [...], 'outputs': [...]}
+    """
+    info: Dict[str, Any] = {
+        "ir_version": 0, "producer_name": "", "producer_version": "",
+        "opset": {}, "metadata": {}, "inputs": [], "outputs": [],
+    }
+    size = os.path.getsize(path)
+    with open(path, "rb", buffering=READ_BUFFER) as f:
+        for field, wire_type, val in iter_fields(f, 0, size):
+            if field == MODEL_IR_VERSION and wire_type == WT_VARINT:
+                info["ir_version"] = val
+            elif wire_type != WT_LEN:
+                continue
+            elif field == MODEL_PRODUCER_NAME:
+                info["producer_name"] = _read_str(f, val)
+            elif field == MODEL_PRODUCER_VERSION:
+                info["producer_version"] = _read_str(f, val)
+            elif field == MODEL_OPSET_IMPORT:
+                domain, version = _read_opset(f, val)
+                info["opset"][domain or "ai.onnx"] = version
+            elif field == MODEL_METADATA_PROPS:
+                key, value = _read_string_entry(f, val)
+                info["metadata"][key] = value
+            elif field == MODEL_GRAPH and include_io:
+                info["inputs"], info["outputs"] = _read_graph_io(f, val)
+    return info
+
+
+def read_onnx_metadata(path: str) -> Dict[str, str]:
+    """只读取 metadata_props，返回 {key: value}；graph（权重）整体跳过"""
+    return read_onnx_info(path)["metadata"]
+
+
+def parse_names(meta: Dict[str, str]) -> Optional[Dict[int, str]]:
+    """解析 YOLO 导出时写入的 names（字符串形式的字典），不存在返回 None；格式错误抛出异常"""
+    if "names" not in meta:
+        return None
+    return ast.literal_eval(meta["names"])
+
+
+def load_model_without_weights(path: str):
+    """
+    加载模型结构但不加载权重（类似 onnx.load(..., load_external_data=False)，
+    但对内嵌在 .onnx 中的权重同样有效）：拷贝字节流时丢弃 graph 中的 initializer，
+    再交给 onnx 解析。需要安装 onnx
+    """
+    try:
+        import onnx
+    except ImportError:
+        raise RuntimeError("需要安装 onnx（pip install onnx）")
+
+    size = os.path.getsize(path)
+    out = bytearray()
+    with open(path, "rb", buffering=READ_BUFFER) as f:
+        for field, wire_type, val in iter_fields(f, 0, size):
+            if field == MODEL_GRAPH and wire_type == WT_LEN:
+                graph = bytearray()
+                for gfield, gwire, gval in iter_fields(f, val[0], val[0] + val[1]):
+                    if gfield in (GRAPH_INITIALIZER, GRAPH_SPARSE_INITIALIZER):
+                        continue
+                    graph += _encode_field(f, gfield, gwire, gval)
+                out += encode_varint((MODEL_GRAPH << 3) | WT_LEN) + encode_varint(len(graph)) + graph
+            else:
+                out += _encode_field(f, field, wire_type, val)
+    return onnx.load_from_string(bytes(out))
+
+
+def _encode_field(f: BinaryIO, field: int, wire_type: int, value: Any) -> bytes:
+    """按原样重新编码一个字段（length-delimited 字段从文件读取内容）"""
+    key = encode_varint((field << 3) | wire_type)
+    if wire_type == WT_VARINT:
+        return key + encode_varint(value)
+    if wire_type == WT_FIXED64:
+        return key + value.to_bytes(8, "little")
+    if wire_type == WT_FIXED32:
+        return key + value.to_bytes(4, "little")
+    f.seek(value[0])
+    return key + encode_varint(value[1]) + f.read(value[1])
+
+
+def encode_string_entry(key: str, value: str) -> bytes:
+    """编码一个顶层 metadata_props 字段（StringStringEntryProto）"""
+    entry = bytearray()
+    for field, text in ((1, key), (2, value)):
+        data = text.encode("utf-8")
+        entry += encode_varint((field << 3) | WT_LEN) + encode_varint(len(data)) + data
+    return encode_varint((MODEL_METADATA_PROPS << 3) | WT_LEN) + encode_varint(len(entry)) + bytes(entry)
+
+
+def patch_onnx_metadata(src_path: str, dst_path: str, updates: Dict[str, str]) -> None:
+    """
+    修改 ONNX 模型的 metadata_props 并写出到 dst_path（可与 src_path 相同）
+
+    原文件以内存映射方式按顺序拷贝，只替换 key 在 updates 中的 metadata 条目，
+    其余字节（包括权重）原样写出；updates 中原本不存在的 key 追加在文件末尾。
+    先写临时文件再替换，中途失败不会破坏原文件。
+    """
+    size = os.path.getsize(src_path)
+    if size == 0:
+        raise OnnxFormatError(f"文件为空: {src_path}")
+    dst_dir = os.path.dirname(os.path.abspath(dst_path))
+    os.makedirs(dst_dir, exist_ok=True)
+    tmp_path = dst_path + ".tmp"
+    pending = dict(updates)
+
+    try:
+        with open(src_path, "rb") as fsrc, mmap.mmap(fsrc.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+                open(tmp_path, "wb") as fdst:
+            view = memoryview(mm)
+            try:
+                def copy_range(start: int, end: int) -> None:
+                    for pos in range(start, end, COPY_CHUNK):
+                        fdst.write(view[pos:min(end, pos + COPY_CHUNK)])
+
+                copy_from = 0
+                for field, wire_type, value, field_start, field_end in iter_field_spans(mm, 0, size):
+                    if field != MODEL_METADATA_PROPS or wire_type != WT_LEN:
+                        continue
+                    key, _ = _read_string_entry(mm, value)
+                    if key not in updates:
+                        continue
+                    copy_range(copy_from, field_start)
+                    if key in pending:
+                        fdst.write(encode_string_entry(key, pending.pop(key)))
+                    # 重复的同名条目直接丢弃
+                    copy_from = field_end
+                copy_range(copy_from, size)
+                for key, value in pending.items():
+                    fdst.write(encode_string_entry(key, value))
+            finally:
+                view.release()
+    except BaseException:
+        # 解析失败或写入中断时清理未写完的临时文件
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    os.replace(tmp_path, dst_path)
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+分阶段计时与统计（各脚本共用）
+
+脚本平时只逐个文件打印结果，看不出时间花在遍历、解析、复制还是编码上。这里提供轻量的计时层：
+  - stage(名称)：上下文管理器，统计各阶段的调用次数与累计耗时（嵌套阶段的耗时同时计入外层）
+  - timed_iter(名称, 可迭代对象)：统计生成器产出每一项所花的时间（如 os.walk 遍历目录）
+  - count(名称, n)：计数器；add_bytes(名称, n) / add_file_bytes(名称, 路径)：按类别累计字节数
+  - 进程退出时打印汇总表；可选输出 Chrome trace JSON（chrome://tracing 或 https://ui.perfetto.dev 打开）
+
+未启用时 stage() 直接返回同一个空上下文对象，count() 等只做一次布尔判断，开销可以忽略。
+启用方式：脚本中调用 enable()，或设置环境变量 TOOLS_PROFILE=1（TOOLS_PROFILE_TRACE=<路径> 同时输出 trace）。
+
+    from common import profiling
+
+    profiling.enable(trace_path="trace.json")
+    for root, dirs, files in profiling.timed_iter("遍历目录", os.walk(src)):
+        with profiling.stage("解析JSON"):
+            ...
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+from common.fileops import display_width, human_bytes
+
+T = TypeVar("T")
+
+# trace 事件数上限（超过后只统计不再记录事件，避免百万级文件时占用过多内存）
+MAX_TRACE_EVENTS = 1_000_000
+
+
+def _pad(text: str, width: int, right: bool = False) -> str:
+    """按显示宽度补空格（中文字符占两列）"""
+    fill = " " * max(0, width - display_width(text))
+    return fill + text if right else text + fill
+
+
+class _NullStage:
+    """未启用时使用的空上下文"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler._record(self.name, self.start, time.perf_counter_ns())
+        return False
+
+
+class Profiler:
+    """计时与统计数据（线程安全）；一般直接使用模块级函数"""
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_path: Optional[str] = None
+        self.start_ns = time.perf_counter_ns()
+        self.stages: Dict[str, List[int]] = defaultdict(lambda: [0, 0])  # 名称 -> [次数, 累计 ns]
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.bytes: Dict[str, int] = defaultdict(int)
+        self.events: List[tuple] = []
+        self.dropped_events = 0
+        self._lock = threading.Lock()
+        self._atexit_registered = False
+
+    def enable(self, trace_path: Optional[str] = None, summary_at_exit: bool = True) -> None:
+        """启用计时（从此时开始计算总耗时）；trace_path 非空时退出时同时写出 Chrome trace"""
+        self.enabled = True
+        self.trace_path = trace_path or None
+        self.start_ns = time.perf_counter_ns()
+        if summary_at_exit and not self._atexit_registered:
+            atexit.register(self.finish)
+            self._atexit_registered = True
+
+    def stage(self, name: str):
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def _record(self, name: str, start: int, end: int) -> None:
+        with self._lock:
+            entry = self.stages[name]
+            entry[0] += 1
+            entry[1] += end - start
+            if self.trace_path:
+                if len(self.events) < MAX_TRACE_EVENTS:
+                    self.events.append((name, start, end - start, threading.get_ident()))
+                else:
+                    self.dropped_events += 1
+
+    def timed_iter(self, name: str, iterable: Iterable[T]) -> Iterator[T]:
+        if not self.enabled:
+            yield from iterable
+            return
+        it = iter(iterable)
+        while True:
+            start = time.perf_counter_ns()
+            try:
+                item = next(it)
+            except StopIteration:
+                self._record(name, start, time.perf_counter_ns())
+                return
+            self._record(name, start, time.perf_counter_ns())
+            yield item
+
+    def count(self, name: str, n: int = 1) -> None:
+        if self.enabled:
+            with self._lock:
+                self.counters[name] += n
+
+    def add_bytes(self, name: str, n: int) -> None:
+        if self.enabled:
+            with self._lock:
+                self.bytes[name] += n
+
+    def add_file_bytes(self, name: str, path: str) -> None:
+        """按文件大小累计字节数（只在启用时 stat，未启用时不产生额外的文件系统调用）"""
+        if self.enabled:
+            try:
+                self.add_bytes(name, os.path.getsize(path))
+            except OSError:
+                pass
+
+    # ---------- 汇总 ----------
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            wall = (time.perf_counter_ns() - self.start_ns) / 1e9
+            return {
+                "wall": wall,
+                "stages": {name: {"calls": calls, "seconds": ns / 1e9} for name, (calls, ns) in self.stages.items()},
+                "counters": dict(self.counters),
+                "bytes": dict(self.bytes),
+            }
+
+    def print_summary(self) -> None:
+        data = self.summary()
+        wall = max(data["wall"], 1e-9)
+        print("\n" + "=" * 72)
+        print(f"耗时统计（总耗时 {wall:.3f} 秒；嵌套阶段的耗时同时计入外层，多线程时各线程累加）")
+        print("-" * 72)
+        if data["stages"]:
+            print(_pad("阶段", 24) + "".join(_pad(title, width, right=True) for title, width in
+                                           (("次数", 10), ("累计(秒)", 12), ("平均(毫秒)", 14), ("占比", 10))))
+            for name, stage in sorted(data["stages"].items(), key=lambda kv: -kv[1]["seconds"]):
+                mean_ms = stage["seconds"] * 1000 / stage["calls"] if stage["calls"] else 0.0
+                print(f"{_pad(name, 24)}{stage['calls']:>10}{stage['seconds']:>12.3f}{mean_ms:>14.3f}"
+                      f"{stage['seconds'] / wall:>10.1%}")
+        for name, value in sorted(data["counters"].items()):
+            print(f"计数 {name}: {value}")
+        for name, value in sorted(data["bytes"].items()):
+            print(f"字节 {name}: {human_bytes(value)}（{human_bytes(value / wall)}/s）")
+        print("=" * 72)
+
+    def write_chrome_trace(self, path: str) -> None:
+        """写出 Chrome trace（Trace Event Format，时间单位微秒）"""
+        pid = os.getpid()
+        with self._lock:
+            events = [{"name": name, "ph": "X", "ts": (start - self.start_ns) / 1000, "dur": dur / 1000,
+                       "pid": pid, "tid": tid} for name, start, dur, tid in self.events]
+            end_ts = (time.perf_counter_ns() - self.start_ns) / 1000
+            for name, value in self.counters.items():
+                events.append({"name": name, "ph": "C", "ts": end_ts, "pid": pid, "args": {"count": value}})
+            for name, value in self.bytes.items():
+                events.append({"name": name, "ph": "C", "ts": end_ts, "pid": pid, "args": {"bytes": value}})
+            dropped = self.dropped_events
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms",
+                       "otherData": {"dropped_events": dropped}}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def finish(self) -> None:
+        """打印汇总并写出 trace（启用后在进程退出时自动调用）"""
+        if not self.enabled:
+            return
+        self.print_summary()
+        if self.trace_path:
+            parent = os.path.dirname(os.path.abspath(self.trace_path))
+            os.makedirs(parent, exist_ok=True)
+            self.write_chrome_trace(self.trace_path)
+            print(f"Chrome trace: {self.trace_path}")
+        self.enabled = False
+
+
+PROFILER = Profiler()
+
+enable = PROFILER.enable
+stage = PROFILER.stage
+timed_iter = PROFILER.timed_iter
+count = PROFILER.count
+add_bytes = PROFILER.add_bytes
+add_file_bytes = PROFILER.add_file_bytes
+
+
+def enabled() -> bool:
+    return PROFILER.enabled
+
+
+if os.environ.get("TOOLS_PROFILE", "").strip() not in ("", "0"):
+    enable(trace_path=os.environ.get("TOOLS_PROFILE_TRACE") or None)
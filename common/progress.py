@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+控制台进度汇总与结构化日志（各脚本共用）
+
+脚本原先每处理一个文件就打印一两行（如 "[OK] 输入 -> 输出"、"修改标签: ..."），在 Windows 控制台上
+逐行输出本身就占了相当一部分耗时，几万行滚动也看不出整体进度。ProgressReporter 把这些输出分成三级：
+  - 进度：同一行节流刷新（已完成 / 总数、失败数、速率、字节数、预计剩余时间）
+  - detail()：逐文件信息，只在 verbose 时打印
+  - info() / warn()：目录级信息与警告，始终打印（先换行，不与进度行混在一起）
+log_path 非空时，每个文件的结果以 JSON Lines 追加写入该文件（不受 verbose 影响），便于事后筛选失败项。
+
+可在多个线程中调用；close() 打印最终统计并关闭日志，之后可继续复用（重新计时）。
+设置环境变量 TOOLS_VERBOSE=1 时所有脚本都按 verbose 输出。
+
+    reporter = ProgressReporter("裁图", verbose=VERBOSE, log_path=LOG_JSONL)
+    reporter.add_total(len(files))
+    for path in files:
+        ...
+        reporter.detail(f"[OK] {path}", event="ok", path=path)
+        reporter.update(nbytes=size)
+    reporter.close()
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional, TextIO
+
+from common.fileops import ProgressTracker, display_width, format_progress
+
+# 控制台不是终端（输出被重定向到文件）时，进度改为逐行输出，间隔放宽到该秒数
+REDIRECTED_INTERVAL = 10.0
+
+ENV_VERBOSE = os.environ.get("TOOLS_VERBOSE", "").strip() not in ("", "0")
+
+
+def format_eta(seconds: float) -> str:
+    """格式化剩余时间：59秒 / 12分03秒 / 2时05分"""
+    seconds = int(seconds + 0.5)
+    if seconds < 60:
+        return f"{seconds}秒"
+    if seconds < 3600:
+        return f"{seconds // 60}分{seconds % 60:02d}秒"
+    return f"{seconds // 3600}时{seconds % 3600 // 60:02d}分"
+
+
+class ProgressReporter:
+    """
+    Args:
+        desc: 进度行前缀（任务名称）
+        total: 总数（未知时为 0，可用 add_total() 边发现边追加）
+        verbose: 是否打印逐文件信息
+        log_path: JSON Lines 日志路径（追加写入）；为空则不写
+        interval: 进度行刷新间隔（秒）
+        stream: 输出流，默认每次输出时取当前的 sys.stdout（跟随 contextlib.redirect_stdout）
+    """
+
+    def __init__(self, desc: str = "", total: int = 0, verbose: bool = False, log_path: Optional[str] = None,
+                 interval: float = 0.5, stream: Optional[TextIO] = None):
+        self.desc = desc
+        self.verbose = verbose or ENV_VERBOSE
+        self.log_path = log_path or None
+        self._stream = stream
+        self.interval = interval
+        self._initial_total = total
+        self._tracker: Optional[ProgressTracker] = None
+        self._log_file: Optional[TextIO] = None
+        self._line_width = 0
+        self._lock = threading.RLock()
+
+    # ---------- 计数 ----------
+
+    @property
+    def tracker(self) -> ProgressTracker:
+        if self._tracker is None:
+            with self._lock:
+                if self._tracker is None:
+                    interval = self.interval if self.is_tty else max(self.interval, REDIRECTED_INTERVAL)
+                    self._tracker = ProgressTracker(self._initial_total, self._render, interval)
+        return self._tracker
+
+    @property
+    def stream(self) -> TextIO:
+        return self._stream or sys.stdout
+
+    @property
+    def is_tty(self) -> bool:
+        try:
+            return self.stream.isatty()
+        except (AttributeError, ValueError):
+            return False
+
+    def add_total(self, count: int) -> None:
+        self.tracker.add_total(count)
+
+    def update(self, count: int = 1, nbytes: int = 0, failed: bool = False) -> None:
+        """完成 count 项（按间隔节流刷新进度行）"""
+        self.tracker.add(count, nbytes, failed)
+
+    def snapshot(self) -> Dict[str, Any]:
+        stats = self.tracker.snapshot()
+        remaining = stats["total"] - stats["done"]
+        stats["eta"] = remaining / stats["rate"] if stats["total"] and remaining > 0 and stats["rate"] > 0 else None
+        return stats
+
+    def format(self, stats: Dict[str, Any]) -> str:
+        text = format_progress(stats)
+        if stats.get("eta") is not None:
+            text += f"，剩余 {format_eta(stats['eta'])}"
+        return f"{self.desc}: {text}" if self.desc else text
+
+    # ---------- 输出 ----------
+
+    def _render(self, _stats: Dict[str, Any]) -> None:
+        line = self.format(self.snapshot())
+        with self._lock:
+            if self.is_tty:
+                # 用空格覆盖上一次更长的进度行
+                width = display_width(line)
+                self.stream.write("\r" + line + " " * max(0, self._line_width - width))
+                self._line_width = max(self._line_width, width)
+            else:
+                self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def _clear_line(self) -> None:
+        if self._line_width:
+            self.stream.write("\r" + " " * self._line_width + "\r")
+            self._line_width = 0
+
+    def _print(self, message: str) -> None:
+        with self._lock:
+            self._clear_line()
+            self.stream.write(message + "\n")
+            self.stream.flush()
+
+    def info(self, message: str, **fields: Any) -> None:
+        """始终打印（目录级信息）；带 event 字段时同时写日志"""
+        self._print(message)
+        if fields:
+            self.log(message=message, **fields)
+
+    def warn(self, message: str, **fields: Any) -> None:
+        """始终打印并写日志（level=warn）"""
+        self._print(message)
+        self.log(level="warn", message=message, **fields)
+
+    def detail(self, message: str, **fields: Any) -> None:
+        """逐文件信息：verbose 时打印；带字段时无论是否 verbose 都写日志"""
+        if self.verbose:
+            self._print(message)
+        if fields:
+            self.log(message=message, **fields)
+
+    def log(self, **fields: Any) -> None:
+        """写一条 JSON Lines 日志（未设置 log_path 时忽略）"""
+        if not self.log_path:
+            return
+        record = {"time": round(time.time(), 3)}
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._log_file is None:
+                parent = os.path.dirname(os.path.abspath(self.log_path))
+                os.makedirs(parent, exist_ok=True)
+                self._log_file = open(self.log_path, "a", encoding="utf-8")
+            self._log_file.write(line + "\n")
+
+    def close(self, summary: bool = True) -> Dict[str, Any]:
+        """结束进度行，打印最终统计并关闭日志；返回最终统计"""
+        stats = self.snapshot()
+        with self._lock:
+            self._clear_line()
+            if summary and (stats["done"] or stats["total"]):
+                self.stream.write(f"{self.format(stats)}，耗时 {stats['elapsed']:.1f} 秒\n")
+                self.stream.flush()
+            if self._log_file is not None:
+                self._log_file.close()
+                self._log_file = None
+            self._tracker = None
+        return stats
+
+    def __enter__(self) -> "ProgressReporter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
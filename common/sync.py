@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+增量目录同步（类似 rsync）
+
+  - 用 os.scandir 一次性取得两侧的大小与修改时间（Windows 下 scandir 自带 stat，不再逐个访问网络盘）
+  - 大小 + 修改时间一致视为未变化；compare_hash=True 时再比对内容哈希
+  - 只复制新增或有变化的文件，并发执行；可选 link_dest（同 rsync --link-dest）：
+    在上一次的输出中找到未变化的文件时直接建立硬链接，不占空间也不传输数据
+  - 返回跳过 / 链接 / 传输的文件数与字节数
+  - 合并移动（merge_move_tree）：目标不存在且同卷时整个目录直接重命名；否则只移动有差异的文件，
+    目标中已有的文件逐字节比对内容一致后才删除源文件
+"""
+
+import filecmp
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from common.checksum import ChecksumManifest, default_algorithm, hash_file
+from common.fileops import FileOpExecutor, copy_file, ensure_parent, human_bytes, relocate_file, same_volume
+
+# 修改时间允许误差（秒）：FAT / 部分 SMB 共享只保存到 2 秒精度
+MTIME_WINDOW = 2.0
+
+
+def scan_tree(root: str) -> Dict[str, Tuple[int, float]]:
+    """递归扫描目录，返回 {相对路径: (大小, 修改时间)}；目录不存在时返回空字典"""
+    result: Dict[str, Tuple[int, float]] = {}
+    stack = [("", root)]
+    while stack:
+        rel_dir, abs_dir = stack.pop()
+        try:
+            it = os.scandir(abs_dir)
+        except FileNotFoundError:
+            continue
+        with it:
+            for entry in it:
+                rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((rel, entry.path))
+                elif entry.is_file():
+                    st = entry.stat()
+                    result[rel] = (st.st_size, st.st_mtime)
+    return result
+
+
+def same_stat(a: Tuple[int, float], b: Tuple[int, float], mtime_window: float = MTIME_WINDOW) -> bool:
+    return a[0] == b[0] and abs(a[1] - b[1]) <= mtime_window
+
+
+def plan_sync(src_dir: str, dst_dir: str, compare_hash: bool = False,
+              link_dest: Optional[str] = None) -> Dict[str, Any]:
+    """
+    对比源与目标，生成同步计划
+
+    Returns:
+        {'copy': [(src, dst, size)], 'link': [(link_src, dst, size)], 'same': [(src, dst, size)],
+         'skipped': 文件数, 'skipped_bytes': 字节数}
+        same 为目标中已相同、无需传输的文件
+    """
+    src_files = scan_tree(src_dir)
+    dst_files = scan_tree(dst_dir)
+    ref_files = scan_tree(link_dest) if link_dest else {}
+    algorithm = default_algorithm()
+
+    def unchanged(rel: str, src_stat, other_root: str, other_stat) -> bool:
+        if other_stat is None or other_stat[0] != src_stat[0]:
+            return False
+        if compare_hash:
+            src_path = os.path.join(src_dir, rel)
+            return hash_file(src_path, algorithm) == hash_file(os.path.join(other_root, rel), algorithm)
+        return same_stat(src_stat, other_stat)
+
+    plan: Dict[str, Any] = {"copy": [], "link": [], "same": [], "skipped": 0, "skipped_bytes": 0}
+    for rel, src_stat in src_files.items():
+        dst_path = os.path.join(dst_dir, rel)
+        if unchanged(rel, src_stat, dst_dir, dst_files.get(rel)):
+            plan["same"].append((os.path.join(src_dir, rel), dst_path, src_stat[0]))
+            plan["skipped"] += 1
+            plan["skipped_bytes"] += src_stat[0]
+        elif link_dest and unchanged(rel, src_stat, link_dest, ref_files.get(rel)):
+            plan["link"].append((os.path.join(link_dest, rel), dst_path, src_stat[0]))
+        else:
+            plan["copy"].append((os.path.join(src_dir, rel), dst_path, src_stat[0]))
+    return plan
+
+
+def link_or_copy(ref: str, dst: str) -> int:
+    """建立硬链接（跨卷等失败时退回复制）。已存在的旧目标先删除"""
+    ensure_parent(dst)
+    if os.path.lexists(dst):
+        os.remove(dst)
+    try:
+        os.link(ref, dst)
+    except OSError:
+        copy_file(ref, dst)
+    return 0
+
+
+def sync_tree(src_dir: str, dst_dir: str, executor: Optional[FileOpExecutor] = None,
+              compare_hash: bool = False, link_dest: Optional[str] = None,
+              manifest: Optional[ChecksumManifest] = None,
+              link_manifest: Optional[ChecksumManifest] = None) -> Dict[str, Any]:
+    """
+    增量同步 src_dir 到 dst_dir（只增不删）
+
+    Args:
+        compare_hash: 大小一致时比对内容哈希（需读取两侧文件），代替修改时间判断
+        link_dest: 参考目录（如前一天的输出），未变化的文件从这里硬链接
+        manifest: 校验清单；传入时复制同时计算哈希，跳过与硬链接的文件也写入清单
+        link_manifest: link_dest 所在输出的校验清单；硬链接的文件优先沿用其中的哈希，不再重新读取
+
+    Returns:
+        统计字典：copied / copied_bytes / linked / skipped / skipped_bytes / failed / errors
+    """
+    executor = executor or FileOpExecutor()
+    os.makedirs(dst_dir, exist_ok=True)
+    plan = plan_sync(src_dir, dst_dir, compare_hash, link_dest)
+    copy_func = manifest.copy if manifest is not None else copy_file
+
+    tasks: List[Tuple[str, Any]] = [("copy", item) for item in plan["copy"]]
+    tasks += [("link", item) for item in plan["link"]]
+    if manifest is not None:
+        tasks += [("same", item) for item in plan["same"]]
+
+    def run(task):
+        kind, (src, dst, _) = task
+        if kind == "same":
+            return manifest.add_existing(dst)
+        if kind == "link":
+            link_or_copy(src, dst)
+            if manifest is not None:
+                return manifest.add_existing(dst, link_manifest, src)
+            return 0
+        # 目标可能是指向旧输出的硬链接，先删除再写入，避免改动旧输出
+        if os.path.lexists(dst):
+            os.remove(dst)
+        return copy_func(src, dst)
+
+    stats = executor.run(run, tasks)
+    failed = {item for (_, item), _ in stats["errors"]}
+    return {
+        "copied": sum(1 for item in plan["copy"] if item not in failed),
+        "copied_bytes": sum(item[2] for item in plan["copy"] if item not in failed),
+        "linked": sum(1 for item in plan["link"] if item not in failed),
+        "linked_bytes": sum(item[2] for item in plan["link"] if item not in failed),
+        "skipped": plan["skipped"],
+        "skipped_bytes": plan["skipped_bytes"],
+        "failed": stats["failed"],
+        "errors": stats["errors"],
+        "cancelled": stats["cancelled"],
+    }
+
+
+def remove_empty_dirs(root: str) -> None:
+    """自底向上删除 root 下（含 root）的空目录"""
+    for dirpath, _, _ in os.walk(root, topdown=False):
+        try:
+            os.rmdir(dirpath)
+        except OSError:
+            pass
+
+
+def merge_move_tree(src_dir: str, dst_dir: str, executor: Optional[FileOpExecutor] = None,
+                    compare_hash: bool = False) -> Dict[str, Any]:
+    """
+    把 src_dir 合并移动到 dst_dir（不删除目标中已有的其他文件）
+
+    目标不存在且与源同卷时直接重命名目录；否则对比两侧，只移动新增或有变化的文件
+    （同卷 os.replace，跨卷复制校验后删除源），最后清理空的源目录。
+    大小与修改时间相同的文件先逐字节比对（compare_hash 时计划阶段已比对过哈希），内容一致才删除源文件，
+    不一致时按有变化的文件移动覆盖目标。
+
+    Returns:
+        统计字典，同 sync_tree，另有 renamed（是否整体重命名）
+    """
+    if not os.path.exists(dst_dir) and same_volume(src_dir, os.path.dirname(dst_dir)):
+        ensure_parent(dst_dir)
+        os.replace(src_dir, dst_dir)
+        return {"renamed": True, "copied": 0, "copied_bytes": 0, "linked": 0, "linked_bytes": 0,
+                "skipped": 0, "skipped_bytes": 0, "failed": 0, "errors": [], "cancelled": False}
+
+    executor = executor or FileOpExecutor()
+    os.makedirs(dst_dir, exist_ok=True)
+    plan = plan_sync(src_dir, dst_dir, compare_hash)
+
+    # 已在目标中的相同文件：内容确认一致后只需删除源文件
+    same = {src for src, _, _ in plan["same"]}
+    tasks = [(src, dst) for src, dst, _ in plan["same"] + plan["copy"]]
+    differed: List[Tuple[str, str, int]] = []
+    lock = threading.Lock()
+
+    def run(task):
+        src, dst = task
+        if src in same:
+            if compare_hash or filecmp.cmp(src, dst, shallow=False):
+                os.remove(src)
+                return 0
+            size = relocate_file(src, dst, overwrite=True)
+            with lock:
+                differed.append((src, dst, size))
+            return size
+        return relocate_file(src, dst, overwrite=True)
+
+    stats = executor.run(run, tasks)
+    remove_empty_dirs(src_dir)
+    failed = {item for item, _ in stats["errors"]}
+    return {
+        "renamed": False,
+        "copied": sum(1 for src, dst, _ in plan["copy"] if (src, dst) not in failed) + len(differed),
+        "copied_bytes": stats["bytes"],
+        "linked": 0,
+        "linked_bytes": 0,
+        "skipped": plan["skipped"] - len(differed),
+        "skipped_bytes": plan["skipped_bytes"] - sum(size for _, _, size in differed),
+        "failed": stats["failed"],
+        "errors": stats["errors"],
+        "cancelled": stats["cancelled"],
+    }
+
+
+def format_sync_summary(summary: Dict[str, Any]) -> str:
+    text = (f"传输 {summary['copied']} 个文件 ({human_bytes(summary['copied_bytes'])})，"
+            f"跳过 {summary['skipped']} 个未变化文件 ({human_bytes(summary['skipped_bytes'])})")
+    if summary.get("linked"):
+        text += f"，硬链接 {summary['linked']} 个 ({human_bytes(summary['linked_bytes'])})"
+    if summary.get("failed"):
+        text += f"，失败 {summary['failed']} 个"
+    return text
+
+
+def merge_summary(total: Dict[str, Any], summary: Dict[str, Any]) -> Dict[str, Any]:
+    """累加多次同步的统计"""
+    for key in ("copied", "copied_bytes", "linked", "linked_bytes", "skipped", "skipped_bytes", "failed"):
+        total[key] = total.get(key, 0) + summary.get(key, 0)
+    return total